@@ -4,32 +4,54 @@ Main entry point for the CloudCostAI application.
 
 import os
 import sys
+import shutil
 import argparse
 
-def main():
-    """Main entry point for the application."""
+def _sniff_subcommand(argv):
+    """
+    Return the first positional token in argv, i.e. the invoked command.
+    
+    Args:
+        argv (list): Command line arguments, without the program name
+        
+    Returns:
+        str: The command name, or None if no positional token was given
+    """
+    for arg in argv:
+        if not arg.startswith('-'):
+            return arg
+    return None
+
+def _build_root_parser():
+    """Build the top-level parser and its subparsers action."""
     parser = argparse.ArgumentParser(description='CloudCostAI - Multi-Cloud Cost Optimization & Forecasting System')
     
     # Add subparsers for different commands
     subparsers = parser.add_subparsers(dest='command', help='Command to run')
     
-    # Dashboard command
-    dashboard_parser = subparsers.add_parser('dashboard', help='Run the Streamlit dashboard')
-    
-    # Collect command
+    return parser, subparsers
+
+def _build_dashboard_parser(subparsers):
+    """Register the dashboard command."""
+    subparsers.add_parser('dashboard', help='Run the Streamlit dashboard')
+
+def _build_collect_parser(subparsers):
+    """Register the collect command."""
     collect_parser = subparsers.add_parser('collect', help='Collect cost data from cloud providers')
     collect_parser.add_argument('--aws', action='store_true', help='Collect AWS data')
     collect_parser.add_argument('--gcp', action='store_true', help='Collect GCP data')
     collect_parser.add_argument('--azure', action='store_true', help='Collect Azure data')
     collect_parser.add_argument('--months', type=int, default=3, help='Number of months to collect')
-    
-    # Analyze command
+
+def _build_analyze_parser(subparsers):
+    """Register the analyze command."""
     analyze_parser = subparsers.add_parser('analyze', help='Analyze cost data and generate reports')
     analyze_parser.add_argument('--report', action='store_true', help='Generate cost report')
     analyze_parser.add_argument('--forecast', action='store_true', help='Generate cost forecast')
     analyze_parser.add_argument('--idle', action='store_true', help='Find idle resources')
-    
-    # Budget command
+
+def _build_budget_parser(subparsers):
+    """Register the budget command and its nested subcommands."""
     budget_parser = subparsers.add_parser('budget', help='Budget management')
     budget_subparsers = budget_parser.add_subparsers(dest='budget_command', help='Budget command')
     
@@ -42,18 +64,64 @@ def main():
     add_budget_parser.add_argument('--service', help='Service name')
     
     # List budgets command
-    list_budgets_parser = budget_subparsers.add_parser('list', help='List all budgets')
+    budget_subparsers.add_parser('list', help='List all budgets')
     
     # Check budgets command
-    check_budgets_parser = budget_subparsers.add_parser('check', help='Check budgets and send alerts')
+    budget_subparsers.add_parser('check', help='Check budgets and send alerts')
+
+# Builders for each command, in the order they appear in --help
+_COMMAND_BUILDERS = {
+    'dashboard': _build_dashboard_parser,
+    'collect': _build_collect_parser,
+    'analyze': _build_analyze_parser,
+    'budget': _build_budget_parser,
+}
+
+def _build_parser(argv):
+    """
+    Build an argument parser for the given command line.
+    
+    Only the invoked command's subparser is constructed. When no known
+    command is given (e.g. top-level --help or a typo), all commands are
+    registered so that help and error messages list every choice.
+    
+    Args:
+        argv (list): Command line arguments, without the program name
+        
+    Returns:
+        argparse.ArgumentParser: The configured parser
+    """
+    parser, subparsers = _build_root_parser()
+    
+    command = _sniff_subcommand(argv)
+    if command in _COMMAND_BUILDERS:
+        _COMMAND_BUILDERS[command](subparsers)
+    else:
+        for build in _COMMAND_BUILDERS.values():
+            build(subparsers)
+    
+    return parser
+
+def main():
+    """Main entry point for the application."""
+    argv = sys.argv[1:]
+    parser = _build_parser(argv)
     
     # Parse arguments
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Execute the appropriate command
     if args.command == 'dashboard':
+        streamlit = shutil.which('streamlit')
+        if streamlit is None:
+            print("streamlit not found on PATH. Install it with: pip install streamlit")
+            sys.exit(1)
+            
         print("Starting CloudCostAI dashboard...")
-        os.system('streamlit run src/dashboards/streamlit_app.py')
+        sys.stdout.flush()
+        
+        # Replace this process with streamlit rather than running it under a shell
+        os.execv(streamlit, [streamlit, 'run', 'src/dashboards/streamlit_app.py'])
         
     elif args.command == 'collect':
         from src.utils.db import init_db, store_cost_data
@@ -96,16 +164,12 @@ def main():
         if args.forecast:
             print("Generating cost forecast...")
             from src.analyzers.forecast import CostForecaster
-            from src.utils.db import get_cost_data
-            import pandas as pd
+            from src.utils.db import get_daily_cost_series
             
-            # Get data from database
-            data = get_cost_data()
-            if not data.empty:
-                # Group by date for forecasting
-                cost_column = 'cost' if 'cost' in data.columns else 'amount'
-                forecast_data = data.groupby('date')[cost_column].sum().reset_index()
-                
+            # Get daily totals from database; summing in SQL keeps memory
+            # independent of how many cost rows the range holds
+            forecast_data = get_daily_cost_series()
+            if not forecast_data.empty:
                 # Generate forecast
                 forecaster = CostForecaster(forecast_days=30)
                 forecaster.train(forecast_data)
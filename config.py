@@ -1,47 +1,74 @@
 """
 Configuration settings for CloudCostAI.
+
+Settings are read from the environment (and the .env file) the first time
+each one is accessed, then cached for the life of the process.
 """
 
 import os
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+_cache = {}
+_dotenv_loaded = False
+
+def _ensure_dotenv():
+    """Load environment variables from .env file, once."""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _dotenv_loaded = True
+
+_SETTINGS = {
+    # AWS Configuration
+    'AWS_PROFILE': lambda: os.getenv('AWS_PROFILE', None),
+    'AWS_REGION': lambda: os.getenv('AWS_REGION', 'us-east-1'),
+
+    # GCP Configuration
+    'GCP_PROJECT_ID': lambda: os.getenv('GCP_PROJECT_ID', None),
+    'GCP_BILLING_ACCOUNT': lambda: os.getenv('GCP_BILLING_ACCOUNT', None),
+    'GCP_CREDENTIALS_PATH': lambda: os.getenv('GOOGLE_APPLICATION_CREDENTIALS', None),
+
+    # Azure Configuration
+    'AZURE_SUBSCRIPTION_ID': lambda: os.getenv('AZURE_SUBSCRIPTION_ID', None),
 
-# AWS Configuration
-AWS_PROFILE = os.getenv('AWS_PROFILE', None)
-AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
+    # Database Configuration
+    'DB_PATH': lambda: os.getenv('DB_PATH', 'data/cloudcostai.db'),
 
-# GCP Configuration
-GCP_PROJECT_ID = os.getenv('GCP_PROJECT_ID', None)
-GCP_BILLING_ACCOUNT = os.getenv('GCP_BILLING_ACCOUNT', None)
-GCP_CREDENTIALS_PATH = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', None)
+    # Reporting Configuration
+    'REPORT_PATH': lambda: os.getenv('REPORT_PATH', 'reports'),
 
-# Azure Configuration
-AZURE_SUBSCRIPTION_ID = os.getenv('AZURE_SUBSCRIPTION_ID', None)
+    # Dashboard Configuration
+    'DASHBOARD_TITLE': lambda: os.getenv('DASHBOARD_TITLE', 'CloudCostAI Dashboard'),
+    'REFRESH_INTERVAL': lambda: int(os.getenv('REFRESH_INTERVAL', '3600')),  # in seconds
 
-# Database Configuration
-DB_PATH = os.getenv('DB_PATH', 'data/cloudcostai.db')
+    # Email Notification Configuration
+    'ENABLE_EMAIL': lambda: os.getenv('ENABLE_EMAIL', 'False').lower() == 'true',
+    'EMAIL_SENDER': lambda: os.getenv('EMAIL_SENDER', ''),
+    'EMAIL_RECIPIENTS': lambda: os.getenv('EMAIL_RECIPIENTS', '').split(',') if os.getenv('EMAIL_RECIPIENTS') else [],
+    'SMTP_SERVER': lambda: os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
+    'SMTP_PORT': lambda: int(os.getenv('SMTP_PORT', '587')),
+    'SMTP_USERNAME': lambda: os.getenv('SMTP_USERNAME', ''),
+    'SMTP_PASSWORD': lambda: os.getenv('SMTP_PASSWORD', ''),
 
-# Reporting Configuration
-REPORT_PATH = os.getenv('REPORT_PATH', 'reports')
+    # Slack Notification Configuration
+    'ENABLE_SLACK': lambda: os.getenv('ENABLE_SLACK', 'False').lower() == 'true',
+    'SLACK_WEBHOOK_URL': lambda: os.getenv('SLACK_WEBHOOK_URL', ''),
 
-# Dashboard Configuration
-DASHBOARD_TITLE = os.getenv('DASHBOARD_TITLE', 'CloudCostAI Dashboard')
-REFRESH_INTERVAL = int(os.getenv('REFRESH_INTERVAL', '3600'))  # in seconds
+    # Budget Alert Configuration
+    'BUDGET_CHECK_INTERVAL': lambda: int(os.getenv('BUDGET_CHECK_INTERVAL', '86400')),  # in seconds, default 24 hours
+}
 
-# Email Notification Configuration
-ENABLE_EMAIL = os.getenv('ENABLE_EMAIL', 'False').lower() == 'true'
-EMAIL_SENDER = os.getenv('EMAIL_SENDER', '')
-EMAIL_RECIPIENTS = os.getenv('EMAIL_RECIPIENTS', '').split(',') if os.getenv('EMAIL_RECIPIENTS') else []
-SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
-SMTP_USERNAME = os.getenv('SMTP_USERNAME', '')
-SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
+def __getattr__(name):
+    """Resolve a setting on first access (PEP 562)."""
+    try:
+        getter = _SETTINGS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
 
-# Slack Notification Configuration
-ENABLE_SLACK = os.getenv('ENABLE_SLACK', 'False').lower() == 'true'
-SLACK_WEBHOOK_URL = os.getenv('SLACK_WEBHOOK_URL', '')
+    if name not in _cache:
+        _ensure_dotenv()
+        _cache[name] = getter()
+    return _cache[name]
 
-# Budget Alert Configuration
-BUDGET_CHECK_INTERVAL = int(os.getenv('BUDGET_CHECK_INTERVAL', '86400'))  # in seconds, default 24 hours
\ No newline at end of file
+def __dir__():
+    return sorted(list(globals()) + list(_SETTINGS))
@@ -2,27 +2,110 @@
 Anomaly detection module for identifying unusual cloud spending patterns.
 """
 
+import functools
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from sklearn.ensemble import IsolationForest
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from src.utils.db import get_cost_data
+from src.utils.db import get_daily_cost_series, get_service_cost_series
+from src.utils.helpers import LazyLoader
+
+# sklearn is only imported the first time a model is built
+sklearn_ensemble = LazyLoader('sklearn_ensemble', globals(), 'sklearn.ensemble')
+
+# Equivalent services across providers
+COMPUTE_SERVICES = frozenset({'EC2', 'Compute Engine', 'Virtual Machines'})
+STORAGE_SERVICES = frozenset({'S3', 'Cloud Storage', 'Storage'})
+
+# Cost decreases have the same causes and actions regardless of service
+_DECREASE_CAUSES = [
+    "Resources terminated or deleted",
+    "Reduced usage",
+    "Reserved instance or savings plan applied",
+    "Price reduction"
+]
+
+_DECREASE_ACTIONS = [
+    "Verify expected resource termination",
+    "Document cost optimization measures",
+    "Share best practices with team"
+]
+
+# Possible causes keyed by (service family, direction)
+_CAUSES = {
+    ('compute', 'increase'): [
+        "New instances launched",
+        "Auto-scaling event",
+        "Instance type changes",
+        "Spot instance price fluctuation"
+    ],
+    ('storage', 'increase'): [
+        "Large data upload",
+        "Increased data retrieval",
+        "Cross-region data transfer",
+        "Lifecycle policy changes"
+    ],
+    ('other', 'increase'): [
+        "New resources provisioned",
+        "Increased usage of existing resources",
+        "Price changes",
+        "End of free tier or promotional pricing"
+    ],
+    ('compute', 'decrease'): _DECREASE_CAUSES,
+    ('storage', 'decrease'): _DECREASE_CAUSES,
+    ('other', 'decrease'): _DECREASE_CAUSES
+}
+
+# Recommended actions keyed by (service family, direction)
+_ACTIONS = {
+    ('compute', 'increase'): [
+        "Review recently launched instances",
+        "Check auto-scaling policies",
+        "Verify instance types and sizes",
+        "Implement reserved instances for stable workloads"
+    ],
+    ('storage', 'increase'): [
+        "Review data transfer patterns",
+        "Implement lifecycle policies",
+        "Check for unauthorized access",
+        "Optimize storage tiers"
+    ],
+    ('other', 'increase'): [
+        "Review resource provisioning",
+        "Check for unauthorized usage",
+        "Implement tagging for cost allocation",
+        "Set up budget alerts"
+    ],
+    ('compute', 'decrease'): _DECREASE_ACTIONS,
+    ('storage', 'decrease'): _DECREASE_ACTIONS,
+    ('other', 'decrease'): _DECREASE_ACTIONS
+}
+
+def _get_service_family(service):
+    """Map a service name to 'compute', 'storage' or 'other'."""
+    if service in COMPUTE_SERVICES:
+        return 'compute'
+    if service in STORAGE_SERVICES:
+        return 'storage'
+    return 'other'
 
 class AnomalyDetector:
     """Detects anomalies in cloud spending patterns."""
     
-    def __init__(self, contamination=0.05):
+    def __init__(self, contamination=0.05, z_threshold=3.5):
         """
         Initialize the anomaly detector.
         
         Args:
             contamination (float): Expected proportion of anomalies in the dataset.
+            z_threshold (float): Absolute modified (median/MAD) z-score above
+                which a service-level cost is flagged as anomalous.
         """
         self.contamination = contamination
+        self.z_threshold = z_threshold
         self.model = None
         
     def detect_daily_anomalies(self, days=30, provider=None):
@@ -40,62 +123,59 @@ class AnomalyDetector:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        cost_data = get_cost_data(
+        # Daily totals are summed in the database
+        daily_costs = get_daily_cost_series(
             start_date=start_date.strftime('%Y-%m-%d'),
             end_date=end_date.strftime('%Y-%m-%d'),
             provider=provider
         )
         
-        if cost_data.empty:
-            return pd.DataFrame()
-        
-        # Ensure date is datetime
-        if 'date' in cost_data.columns and not pd.api.types.is_datetime64_any_dtype(cost_data['date']):
-            cost_data['date'] = pd.to_datetime(cost_data['date'])
-        
-        # Group by date
-        cost_column = 'cost' if 'cost' in cost_data.columns else 'amount'
-        daily_costs = cost_data.groupby('date')[cost_column].sum().reset_index()
-        
         # Need at least 7 data points for meaningful anomaly detection
         if len(daily_costs) < 7:
             return pd.DataFrame()
         
         # Prepare features
-        X = daily_costs[cost_column].values.reshape(-1, 1)
+        X = daily_costs['cost'].values.reshape(-1, 1)
         
-        # Train isolation forest model
-        self.model = IsolationForest(contamination=self.contamination, random_state=42)
-        daily_costs['anomaly'] = self.model.fit_predict(X)
+        # Train isolation forest model and score the training data once;
+        # a negative decision function is exactly what predict() labels -1.
+        # The model is built in a local so concurrent calls on a shared
+        # detector never score with each other's model
+        model = sklearn_ensemble.IsolationForest(contamination=self.contamination, random_state=42)
+        model.fit(X)
+        anomaly_scores = model.decision_function(X)
+        self.model = model
         
         # -1 indicates anomaly, 1 indicates normal
-        anomalies = daily_costs[daily_costs['anomaly'] == -1].copy()
+        is_anomaly = anomaly_scores < 0
+        daily_costs['anomaly'] = np.where(is_anomaly, -1, 1)
+        daily_costs['anomaly_score'] = -anomaly_scores  # Negate so higher is more anomalous
+        
+        anomalies = daily_costs[is_anomaly].copy()
         
         if anomalies.empty:
             return pd.DataFrame()
         
-        # Calculate anomaly score (higher means more anomalous)
-        anomaly_scores = self.model.decision_function(X)
-        daily_costs['anomaly_score'] = -anomaly_scores  # Negate so higher is more anomalous
-        
-        # Calculate percentage difference from mean
-        mean_cost = daily_costs[daily_costs['anomaly'] == 1][cost_column].mean()
-        anomalies['percentage_diff'] = ((anomalies[cost_column] - mean_cost) / mean_cost) * 100
+        # Calculate percentage difference from mean, straight from the feature array
+        costs = X[:, 0]
+        mean_cost = costs[~is_anomaly].mean()
+        anomalies['percentage_diff'] = (costs[is_anomaly] - mean_cost) / mean_cost * 100
         
         # Add severity level
-        anomalies['severity'] = anomalies['percentage_diff'].apply(
-            lambda x: 'High' if abs(x) > 50 else ('Medium' if abs(x) > 25 else 'Low')
-        )
+        anomalies['severity'] = self._get_severity(anomalies['percentage_diff'])
         
         return anomalies
     
-    def detect_service_anomalies(self, days=30, provider=None):
+    def detect_service_anomalies(self, days=30, provider=None, method='zscore'):
         """
         Detect anomalies in service-level spending.
         
         Args:
             days (int): Number of days to analyze
             provider (str, optional): Cloud provider filter
+            method (str, optional): 'zscore' scores every service in one
+                vectorized pass; 'iforest' fits an IsolationForest per service.
+                Defaults to 'zscore'.
             
         Returns:
             pd.DataFrame: Detected service-level anomalies
@@ -104,67 +184,115 @@ class AnomalyDetector:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        cost_data = get_cost_data(
+        # Daily totals per service are summed in the database
+        service_costs = get_service_cost_series(
             start_date=start_date.strftime('%Y-%m-%d'),
             end_date=end_date.strftime('%Y-%m-%d'),
             provider=provider
         )
         
-        if cost_data.empty:
+        if service_costs.empty:
+            return pd.DataFrame()
+        
+        if method == 'iforest':
+            return self._detect_service_anomalies_iforest(service_costs)
+        
+        grouped = service_costs.groupby('service')['cost']
+        
+        # Need at least 7 data points for meaningful anomaly detection
+        enough_points = grouped.transform('size') >= 7
+        
+        # Score every row with a modified z-score against its own service's
+        # median and MAD. A plain mean/std z-score is bounded by (n-1)/sqrt(n)
+        # and cannot reach 3 for under 11 points; the median and MAD are not
+        # pulled by the outlier itself. Series with zero MAD are never anomalous
+        median = grouped.transform('median')
+        deviation = service_costs['cost'] - median
+        mad = deviation.abs().groupby(service_costs['service']).transform('median').replace(0, np.nan)
+        z_scores = 0.6745 * deviation / mad
+        
+        # -1 indicates anomaly, 1 indicates normal
+        service_costs['anomaly'] = np.where(enough_points & (z_scores.abs() > self.z_threshold), -1, 1)
+        
+        anomalies = service_costs[service_costs['anomaly'] == -1].copy()
+        
+        if anomalies.empty:
             return pd.DataFrame()
         
-        # Ensure date is datetime
-        if 'date' in cost_data.columns and not pd.api.types.is_datetime64_any_dtype(cost_data['date']):
-            cost_data['date'] = pd.to_datetime(cost_data['date'])
+        # Calculate percentage difference from the mean of each service's normal days
+        normal_costs = service_costs['cost'].where(service_costs['anomaly'] == 1)
+        mean_cost = normal_costs.groupby(service_costs['service']).transform('mean')[anomalies.index]
+        anomalies['percentage_diff'] = ((anomalies['cost'] - mean_cost) / mean_cost) * 100
         
-        # Group by date and service
-        cost_column = 'cost' if 'cost' in cost_data.columns else 'amount'
-        service_costs = cost_data.groupby(['date', 'service', 'provider'])[cost_column].sum().reset_index()
+        # Add severity level
+        anomalies['severity'] = self._get_severity(anomalies['percentage_diff'])
+        
+        return anomalies.sort_values(['service', 'date']).reset_index(drop=True)
+    
+    def _detect_service_anomalies_iforest(self, service_costs):
+        """
+        Detect service-level anomalies by fitting an IsolationForest per service.
         
-        # Get unique services
-        services = service_costs['service'].unique()
+        Args:
+            service_costs (pd.DataFrame): Daily costs grouped by date, service and provider
+            
+        Returns:
+            pd.DataFrame: Detected service-level anomalies
+        """
+        # One estimator is refitted per service rather than rebuilt each time
+        model = sklearn_ensemble.IsolationForest(contamination=self.contamination, random_state=42)
         
         all_anomalies = []
         
         # Detect anomalies for each service
-        for service in services:
-            service_data = service_costs[service_costs['service'] == service].copy()
-            
+        for service, service_data in service_costs.groupby('service', sort=False):
             # Need at least 7 data points for meaningful anomaly detection
             if len(service_data) < 7:
                 continue
             
             # Prepare features
-            X = service_data[cost_column].values.reshape(-1, 1)
+            X = service_data['cost'].values.reshape(-1, 1)
+            
+            # Constant cost cannot contain anomalies
+            if X.std() == 0:
+                continue
+            
+            # Train isolation forest model and score each point once;
+            # negative scores are what predict() would label -1
+            model.fit(X)
+            anomaly_scores = model.decision_function(X)
+            is_anomaly = anomaly_scores < 0
+            
+            if not is_anomaly.any():
+                continue
             
-            # Train isolation forest model
-            model = IsolationForest(contamination=self.contamination, random_state=42)
-            service_data['anomaly'] = model.fit_predict(X)
+            service_data = service_data.copy()
+            service_data['anomaly'] = np.where(is_anomaly, -1, 1)
+            service_data['anomaly_score'] = -anomaly_scores
             
             # -1 indicates anomaly, 1 indicates normal
-            anomalies = service_data[service_data['anomaly'] == -1].copy()
+            anomalies = service_data[is_anomaly].copy()
             
-            if not anomalies.empty:
-                # Calculate anomaly score
-                anomaly_scores = model.decision_function(X)
-                service_data['anomaly_score'] = -anomaly_scores
-                
-                # Calculate percentage difference from mean
-                mean_cost = service_data[service_data['anomaly'] == 1][cost_column].mean()
-                anomalies['percentage_diff'] = ((anomalies[cost_column] - mean_cost) / mean_cost) * 100
-                
-                # Add severity level
-                anomalies['severity'] = anomalies['percentage_diff'].apply(
-                    lambda x: 'High' if abs(x) > 50 else ('Medium' if abs(x) > 25 else 'Low')
-                )
-                
-                all_anomalies.append(anomalies)
+            # Calculate percentage difference from mean, straight from the feature array
+            costs = X[:, 0]
+            mean_cost = costs[~is_anomaly].mean()
+            anomalies['percentage_diff'] = (costs[is_anomaly] - mean_cost) / mean_cost * 100
+            
+            # Add severity level
+            anomalies['severity'] = self._get_severity(anomalies['percentage_diff'])
+            
+            all_anomalies.append(anomalies)
         
         if all_anomalies:
             return pd.concat(all_anomalies, ignore_index=True)
         else:
             return pd.DataFrame()
     
+    def _get_severity(self, percentage_diff):
+        """Classify percentage differences as High (>50%), Medium (>25%) or Low."""
+        abs_diff = percentage_diff.abs().to_numpy()
+        return np.select([abs_diff > 50, abs_diff > 25], ['High', 'Medium'], default='Low')
+    
     def get_anomaly_insights(self, anomalies_df):
         """
         Generate insights for detected anomalies.
@@ -178,114 +306,46 @@ class AnomalyDetector:
         if anomalies_df.empty:
             return []
         
-        insights = []
+        has_service = 'service' in anomalies_df.columns
         
-        for _, anomaly in anomalies_df.iterrows():
-            date = anomaly['date']
-            cost = anomaly['cost'] if 'cost' in anomaly else anomaly['amount']
-            
-            if 'service' in anomaly:
-                service = anomaly['service']
-                provider = anomaly['provider']
-                percentage_diff = anomaly['percentage_diff']
-                severity = anomaly['severity']
-                
-                # Generate insight
-                direction = 'increase' if percentage_diff > 0 else 'decrease'
-                
-                insight = {
-                    'date': date,
-                    'service': service,
-                    'provider': provider,
-                    'cost': cost,
-                    'percentage_change': abs(percentage_diff),
-                    'direction': direction,
-                    'severity': severity,
-                    'message': f"{severity} severity {direction} of {abs(percentage_diff):.1f}% in {service} costs on {date.strftime('%Y-%m-%d')}",
-                    'possible_causes': self._get_possible_causes(service, provider, direction),
-                    'recommended_actions': self._get_recommended_actions(service, provider, direction)
-                }
-            else:
-                percentage_diff = anomaly['percentage_diff']
-                severity = anomaly['severity']
-                
-                # Generate insight
-                direction = 'increase' if percentage_diff > 0 else 'decrease'
-                
-                insight = {
-                    'date': date,
-                    'cost': cost,
-                    'percentage_change': abs(percentage_diff),
-                    'direction': direction,
-                    'severity': severity,
-                    'message': f"{severity} severity {direction} of {abs(percentage_diff):.1f}% in total costs on {date.strftime('%Y-%m-%d')}",
-                    'possible_causes': self._get_possible_causes(None, None, direction),
-                    'recommended_actions': self._get_recommended_actions(None, None, direction)
-                }
+        # Build the insight columns once, then emit one dict per anomaly
+        insights_df = pd.DataFrame({
+            'date': anomalies_df['date'],
+            'cost': anomalies_df['cost'],
+            'percentage_change': anomalies_df['percentage_diff'].abs(),
+            'direction': np.where(anomalies_df['percentage_diff'] > 0, 'increase', 'decrease'),
+            'severity': anomalies_df['severity']
+        })
+        if has_service:
+            insights_df.insert(1, 'service', anomalies_df['service'])
+            insights_df.insert(2, 'provider', anomalies_df['provider'])
+        
+        insights = insights_df.to_dict('records')
+        
+        for insight in insights:
+            service = insight.get('service')
+            provider = insight.get('provider')
+            direction = insight['direction']
+            subject = f"{service} costs" if has_service else "total costs"
             
-            insights.append(insight)
+            insight['message'] = (
+                f"{insight['severity']} severity {direction} of {insight['percentage_change']:.1f}% "
+                f"in {subject} on {insight['date'].strftime('%Y-%m-%d')}"
+            )
+            # Cached lookups return shared tuples; each insight gets its own list
+            insight['possible_causes'] = list(self._get_possible_causes(service, provider, direction))
+            insight['recommended_actions'] = list(self._get_recommended_actions(service, provider, direction))
         
         return insights
     
-    def _get_possible_causes(self, service, provider, direction):
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_possible_causes(service, provider, direction):
         """Get possible causes for an anomaly."""
-        if direction == 'increase':
-            if service == 'EC2' or service == 'Compute Engine' or service == 'Virtual Machines':
-                return [
-                    "New instances launched",
-                    "Auto-scaling event",
-                    "Instance type changes",
-                    "Spot instance price fluctuation"
-                ]
-            elif service == 'S3' or service == 'Cloud Storage' or service == 'Storage':
-                return [
-                    "Large data upload",
-                    "Increased data retrieval",
-                    "Cross-region data transfer",
-                    "Lifecycle policy changes"
-                ]
-            else:
-                return [
-                    "New resources provisioned",
-                    "Increased usage of existing resources",
-                    "Price changes",
-                    "End of free tier or promotional pricing"
-                ]
-        else:  # decrease
-            return [
-                "Resources terminated or deleted",
-                "Reduced usage",
-                "Reserved instance or savings plan applied",
-                "Price reduction"
-            ]
+        return tuple(_CAUSES[(_get_service_family(service), direction)])
     
-    def _get_recommended_actions(self, service, provider, direction):
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_recommended_actions(service, provider, direction):
         """Get recommended actions for an anomaly."""
-        if direction == 'increase':
-            if service == 'EC2' or service == 'Compute Engine' or service == 'Virtual Machines':
-                return [
-                    "Review recently launched instances",
-                    "Check auto-scaling policies",
-                    "Verify instance types and sizes",
-                    "Implement reserved instances for stable workloads"
-                ]
-            elif service == 'S3' or service == 'Cloud Storage' or service == 'Storage':
-                return [
-                    "Review data transfer patterns",
-                    "Implement lifecycle policies",
-                    "Check for unauthorized access",
-                    "Optimize storage tiers"
-                ]
-            else:
-                return [
-                    "Review resource provisioning",
-                    "Check for unauthorized usage",
-                    "Implement tagging for cost allocation",
-                    "Set up budget alerts"
-                ]
-        else:  # decrease
-            return [
-                "Verify expected resource termination",
-                "Document cost optimization measures",
-                "Share best practices with team"
-            ]
\ No newline at end of file
+        return tuple(_ACTIONS[(_get_service_family(service), direction)])
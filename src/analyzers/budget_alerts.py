@@ -3,17 +3,64 @@ Budget alerts and notifications module.
 Monitors cloud costs against defined budgets and sends alerts when thresholds are exceeded.
 """
 
-import pandas as pd
 import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import string
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from config import EMAIL_SENDER, EMAIL_RECIPIENTS, SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, ENABLE_EMAIL
-from src.utils.db import get_cost_data
+from config import EMAIL_SENDER, EMAIL_RECIPIENTS, ENABLE_EMAIL
+from src.utils.db import get_cost_total, db_has_any_costs
+
+# First day of the current budget period, keyed by period name
+_PERIOD_START = {
+    'monthly': lambda now: datetime.date(now.year, now.month, 1),
+    'quarterly': lambda now: datetime.date(now.year, ((now.month - 1) // 3) * 3 + 1, 1),
+    'yearly': lambda now: datetime.date(now.year, 1, 1)
+}
+
+# Alert email body; only the per-alert fields are substituted on each send
+_ALERT_BODY_TEMPLATE = string.Template("""
+<html>
+<body>
+    <h2>Budget Alert</h2>
+    <p>The following budget has been exceeded:</p>
+    <ul>
+        <li><strong>Budget:</strong> ${name}</li>
+        <li><strong>Amount:</strong> $$${budget}</li>
+        <li><strong>Actual Spend:</strong> $$${actual}</li>
+        <li><strong>Over Budget:</strong> $$${over} (${percentage}%)</li>
+        <li><strong>Period:</strong> ${period}</li>
+        <li><strong>Provider:</strong> ${provider}</li>
+        <li><strong>Service:</strong> ${service}</li>
+    </ul>
+    <p>Please review your cloud spending and take appropriate action.</p>
+</body>
+</html>
+""")
+
+def build_alert_email(alert):
+    """
+    Build the email for a budget threshold breach.
+    
+    Args:
+        alert (dict): Alert information
+        
+    Returns:
+        tuple: (subject, HTML body)
+    """
+    subject = f"Budget Alert: {alert['name']} exceeded by {alert['percentage']:.1f}%"
+    body = _ALERT_BODY_TEMPLATE.substitute(
+        name=alert['name'],
+        budget=f"{alert['budget']:,.2f}",
+        actual=f"{alert['actual']:,.2f}",
+        over=f"{alert['actual'] - alert['budget']:,.2f}",
+        percentage=f"{alert['percentage']:.1f}",
+        period=alert['period'],
+        provider=alert['provider'],
+        service=alert['service']
+    )
+    return subject, body
 
 class BudgetAlert:
     """Monitors cloud costs against defined budgets and sends alerts."""
@@ -51,41 +98,28 @@ class BudgetAlert:
         """
         alerts = []
         
+        # Nothing to check, or nothing to check against
+        if not self.budgets or not db_has_any_costs():
+            return alerts
+        
         # Get current date
         now = datetime.datetime.now()
+        end_date = now.date()
         
         for name, budget in self.budgets.items():
-            # Determine date range based on period
-            if budget['period'] == 'monthly':
-                start_date = datetime.date(now.year, now.month, 1)
-            elif budget['period'] == 'quarterly':
-                quarter_month = ((now.month - 1) // 3) * 3 + 1
-                start_date = datetime.date(now.year, quarter_month, 1)
-            elif budget['period'] == 'yearly':
-                start_date = datetime.date(now.year, 1, 1)
-            else:
+            # Determine date range based on the budget's period
+            start_fn = _PERIOD_START.get(budget['period'])
+            if start_fn is None:
                 continue
-                
-            end_date = now.date()
             
-            # Get cost data for the period
-            cost_data = get_cost_data(
-                start_date=start_date.strftime('%Y-%m-%d'),
+            # Sum the budget's costs in the database rather than fetching rows
+            total_cost = get_cost_total(
+                start_date=start_fn(now).strftime('%Y-%m-%d'),
                 end_date=end_date.strftime('%Y-%m-%d'),
-                provider=budget['provider']
+                provider=budget['provider'],
+                service=budget['service']
             )
             
-            if cost_data.empty:
-                continue
-                
-            # Filter by service if specified
-            if budget['service']:
-                cost_data = cost_data[cost_data['service'] == budget['service']]
-                
-            # Calculate total cost
-            cost_column = 'cost' if 'cost' in cost_data.columns else 'amount'
-            total_cost = cost_data[cost_column].sum()
-            
             # Check if budget is exceeded
             if total_cost > budget['amount']:
                 # Calculate percentage over budget
@@ -120,50 +154,11 @@ class BudgetAlert:
         Returns:
             bool: True if email was sent successfully, False otherwise
         """
-        if not ENABLE_EMAIL or not EMAIL_SENDER or not EMAIL_RECIPIENTS:
-            return False
-            
-        try:
-            # Create message
-            msg = MIMEMultipart()
-            msg['From'] = EMAIL_SENDER
-            msg['To'] = ', '.join(EMAIL_RECIPIENTS)
-            msg['Subject'] = f"Budget Alert: {alert['name']} exceeded by {alert['percentage']:.1f}%"
-            
-            # Create message body
-            body = f"""
-            <html>
-            <body>
-                <h2>Budget Alert</h2>
-                <p>The following budget has been exceeded:</p>
-                <ul>
-                    <li><strong>Budget:</strong> {alert['name']}</li>
-                    <li><strong>Amount:</strong> ${alert['budget']:,.2f}</li>
-                    <li><strong>Actual Spend:</strong> ${alert['actual']:,.2f}</li>
-                    <li><strong>Over Budget:</strong> ${alert['actual'] - alert['budget']:,.2f} ({alert['percentage']:.1f}%)</li>
-                    <li><strong>Period:</strong> {alert['period']}</li>
-                    <li><strong>Provider:</strong> {alert['provider']}</li>
-                    <li><strong>Service:</strong> {alert['service']}</li>
-                </ul>
-                <p>Please review your cloud spending and take appropriate action.</p>
-            </body>
-            </html>
-            """
-            
-            msg.attach(MIMEText(body, 'html'))
-            
-            # Connect to SMTP server and send email
-            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-                server.starttls()
-                if SMTP_USERNAME and SMTP_PASSWORD:
-                    server.login(SMTP_USERNAME, SMTP_PASSWORD)
-                server.send_message(msg)
-                
-            return True
-            
-        except Exception as e:
-            print(f"Error sending email alert: {e}")
-            return False
+        # Imported here so budget checks that never email don't pay for it
+        from src.utils.notification import SMTPSession
+        
+        with SMTPSession() as session:
+            return session.send(*build_alert_email(alert), html=True)
             
     def process_alerts(self):
         """
@@ -174,12 +169,15 @@ class BudgetAlert:
         """
         alerts = self.check_budgets()
         
-        for alert in alerts:
-            # Add to notifications list
-            self.notifications.append(alert)
+        # Add to notifications list
+        self.notifications.extend(alerts)
+        
+        # Send email alerts over a single SMTP connection
+        if alerts and ENABLE_EMAIL and EMAIL_SENDER and EMAIL_RECIPIENTS:
+            from src.utils.notification import SMTPSession
             
-            # Send email alert
-            if ENABLE_EMAIL:
-                self.send_alert_email(alert)
+            with SMTPSession() as session:
+                for alert in alerts:
+                    session.send(*build_alert_email(alert), html=True)
                 
-        return alerts
\ No newline at end of file
+        return alerts
@@ -1,23 +1,161 @@
 """
-Cost forecasting module using Facebook Prophet.
+Cost forecasting module using Facebook Prophet, with a lightweight
+linear trend model for short histories.
 """
 
+import hashlib
+import os
+import pickle
+import time
 import pandas as pd
 import numpy as np
-from prophet import Prophet
-import matplotlib.pyplot as plt
+
+# Below two years of daily points, yearly seasonality can't be estimated and
+# Prophet's Stan fit costs far more than it adds over a simple trend model
+PROPHET_MIN_DAYS = 365 * 2
+
+class LinearTrendModel:
+    """
+    Lightweight forecasting model: a linear trend plus day-of-week effects,
+    fitted by least squares.
+    
+    Exposes the subset of the Prophet interface used by CostForecaster
+    (fit, make_future_dataframe, predict and plot).
+    """
+    
+    # z-score for an 80% interval, matching Prophet's default interval_width
+    INTERVAL_Z = 1.2816
+    
+    def __init__(self):
+        """Initialize an unfitted model."""
+        self.history = None
+        self.start = None
+        self.coef = None
+        self.sigma = 0.0
+        self.weekly = False
+        
+    def _design_matrix(self, ds):
+        """Build the regression features for the given dates."""
+        t = ((ds - self.start) / pd.Timedelta(days=1)).to_numpy(dtype=float)
+        columns = [np.ones_like(t), t]
+        
+        if self.weekly:
+            weekday = ds.dt.dayofweek.to_numpy()
+            columns.extend((weekday == day).astype(float) for day in range(1, 7))
+            
+        return np.column_stack(columns)
+        
+    def fit(self, df):
+        """
+        Fit the model.
+        
+        Args:
+            df (pd.DataFrame): History with 'ds' and 'y' columns
+            
+        Returns:
+            self: For method chaining
+        """
+        self.history = df.assign(ds=pd.to_datetime(df['ds'])).sort_values('ds').reset_index(drop=True)
+        self.start = self.history['ds'].min()
+        
+        # Day-of-week effects need at least two full weeks to be meaningful
+        self.weekly = len(self.history) >= 14
+        
+        X = self._design_matrix(self.history['ds'])
+        y = self.history['y'].to_numpy(dtype=float)
+        self.coef, _, _, _ = np.linalg.lstsq(X, y, rcond=None)
+        
+        residuals = y - X @ self.coef
+        self.sigma = residuals.std(ddof=min(X.shape[1], len(y) - 1))
+        
+        return self
+        
+    def make_future_dataframe(self, periods):
+        """
+        Create a frame of historical plus future daily dates.
+        
+        Args:
+            periods (int): Number of days to extend past the history
+            
+        Returns:
+            pd.DataFrame: Frame with a 'ds' column
+        """
+        last = self.history['ds'].max()
+        future = pd.date_range(last + pd.Timedelta(days=1), periods=periods, freq='D')
+        ds = pd.concat([self.history['ds'], pd.Series(future)], ignore_index=True)
+        return pd.DataFrame({'ds': ds})
+        
+    def predict(self, future):
+        """
+        Predict costs for the given dates.
+        
+        Args:
+            future (pd.DataFrame): Frame with a 'ds' column
+            
+        Returns:
+            pd.DataFrame: Columns 'ds', 'yhat', 'yhat_lower' and 'yhat_upper'
+        """
+        ds = pd.to_datetime(future['ds']).reset_index(drop=True)
+        yhat = self._design_matrix(ds) @ self.coef
+        band = self.INTERVAL_Z * self.sigma
+        
+        return pd.DataFrame({
+            'ds': ds,
+            'yhat': yhat,
+            'yhat_lower': yhat - band,
+            'yhat_upper': yhat + band
+        })
+        
+    def plot(self, fcst):
+        """
+        Plot the history and a forecast.
+        
+        Args:
+            fcst (pd.DataFrame): Output of predict()
+            
+        Returns:
+            matplotlib.figure.Figure: The forecast plot
+        """
+        # Imported here so forecasting without plotting never loads matplotlib
+        import matplotlib.pyplot as plt
+        
+        fig, ax = plt.subplots(figsize=(10, 6))
+        ax.plot(self.history['ds'], self.history['y'], 'k.')
+        ax.plot(fcst['ds'], fcst['yhat'], ls='-', c='#0072B2')
+        ax.fill_between(fcst['ds'], fcst['yhat_lower'], fcst['yhat_upper'], color='#0072B2', alpha=0.2)
+        ax.set_xlabel('ds')
+        ax.set_ylabel('y')
+        fig.tight_layout()
+        return fig
 
 class CostForecaster:
     """Forecasts cloud costs using time series analysis."""
     
-    def __init__(self, forecast_days=30):
+    def __init__(self, forecast_days=30, engine='auto', cache_dir=None, cache_ttl=86400,
+                 uncertainty_samples=1000):
         """
         Initialize the forecaster.
         
         Args:
             forecast_days (int, optional): Number of days to forecast. Defaults to 30.
+            engine (str, optional): 'prophet', 'linear', or 'auto' to use Prophet
+                only for histories of at least PROPHET_MIN_DAYS points. Defaults to 'auto'.
+            cache_dir (str, optional): Directory to cache fitted models in, keyed by
+                a hash of the training data. Defaults to None (no caching).
+            cache_ttl (int, optional): Seconds a cached model stays valid. Defaults to 86400.
+            uncertainty_samples (int, optional): Prophet simulation draws used for the
+                yhat_lower/yhat_upper bands. Set to 0 when only yhat is needed: the
+                bands are then NaN, but predict() skips the dominant sampling cost.
+                Defaults to 1000.
         """
+        if engine not in ('auto', 'prophet', 'linear'):
+            raise ValueError(f"Unknown forecasting engine: {engine}")
+            
         self.forecast_days = forecast_days
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self.uncertainty_samples = uncertainty_samples
         self.model = None
         self.forecast = None
         
@@ -48,17 +186,71 @@ class CostForecaster:
         """
         prophet_df = self.prepare_data(df)
         
-        # Initialize and fit the model
-        self.model = Prophet(
-            yearly_seasonality=True,
-            weekly_seasonality=True,
-            daily_seasonality=False,
-            seasonality_mode='multiplicative'
+        use_prophet = self.engine == 'prophet' or (
+            self.engine == 'auto' and len(prophet_df) >= PROPHET_MIN_DAYS
         )
+        
+        # Reuse a model fitted on identical data, if one is cached
+        cache_path = self._cache_path(prophet_df, use_prophet) if self.cache_dir else None
+        if cache_path:
+            self.model = self._load_cached_model(cache_path)
+            if self.model is not None:
+                return self
+        
+        # Initialize and fit the model
+        if use_prophet:
+            # Imported here since Prophet pulls in Stan at import time
+            from prophet import Prophet
+            
+            self.model = Prophet(
+                yearly_seasonality=True,
+                weekly_seasonality=True,
+                daily_seasonality=False,
+                seasonality_mode='multiplicative',
+                uncertainty_samples=self.uncertainty_samples or 0
+            )
+        else:
+            self.model = LinearTrendModel()
         self.model.fit(prophet_df)
         
+        if cache_path:
+            self._save_cached_model(cache_path)
+        
         return self
         
+    def _cache_path(self, prophet_df, use_prophet):
+        """Get the cache file path for a model trained on the given data."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"prophet:{self.uncertainty_samples or 0}".encode() if use_prophet else b'linear')
+        digest.update(pd.util.hash_pandas_object(prophet_df, index=False).values.tobytes())
+        return os.path.join(self.cache_dir, f"{digest.hexdigest()}.pkl")
+        
+    def _load_cached_model(self, cache_path):
+        """Load a cached model, or return None if missing, expired or unreadable."""
+        try:
+            if time.time() - os.path.getmtime(cache_path) > self.cache_ttl:
+                return None
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading cached forecast model: {e}")
+            return None
+            
+    def _save_cached_model(self, cache_path):
+        """Write the fitted model to the cache."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            
+            # Write to a temporary file first so readers never see a partial pickle
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(self.model, f)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"Error caching forecast model: {e}")
+        
     def predict(self):
         """
         Generate forecast for future periods.
@@ -75,6 +267,11 @@ class CostForecaster:
         # Generate forecast
         self.forecast = self.model.predict(future)
         
+        # Without uncertainty sampling there are no bands to report
+        if not self.uncertainty_samples:
+            self.forecast['yhat_lower'] = np.nan
+            self.forecast['yhat_upper'] = np.nan
+        
         return self.forecast
         
     def plot_forecast(self, save_path=None):
@@ -93,6 +290,7 @@ class CostForecaster:
         fig = self.model.plot(self.forecast)
         
         if save_path:
+            import matplotlib.pyplot as plt
             plt.savefig(save_path)
             
         return fig
@@ -107,18 +305,27 @@ class CostForecaster:
         if self.forecast is None:
             raise ValueError("Must run predict() before getting monthly forecast")
             
-        # Extract date and forecast columns
-        monthly_forecast = self.forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+        columns = ['yhat', 'yhat_lower', 'yhat_upper']
+        
+        if self.forecast.empty:
+            return pd.DataFrame(columns=['month'] + columns)
+        
+        # Extract date and forecast columns, in date order
+        monthly_forecast = self.forecast[['ds'] + columns].sort_values('ds')
+        
+        # Prophet already returns 'ds' as datetime
+        ds = monthly_forecast['ds']
+        if not pd.api.types.is_datetime64_any_dtype(ds):
+            ds = pd.to_datetime(ds)
         
-        # Convert to datetime and extract month
-        monthly_forecast['ds'] = pd.to_datetime(monthly_forecast['ds'])
-        monthly_forecast['month'] = monthly_forecast['ds'].dt.strftime('%Y-%m')
+        # Month keys are monotonic once sorted, so each month is a contiguous
+        # run that can be summed in one pass without hashing; disabled bands
+        # are all NaN and stay NaN
+        months = ds.to_numpy().astype('datetime64[M]')
+        starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        sums = np.add.reduceat(monthly_forecast[columns].to_numpy(dtype=float), starts, axis=0)
         
-        # Group by month and sum
-        monthly_agg = monthly_forecast.groupby('month').agg({
-            'yhat': 'sum',
-            'yhat_lower': 'sum',
-            'yhat_upper': 'sum'
-        }).reset_index()
+        monthly_agg = pd.DataFrame(sums, columns=columns)
+        monthly_agg.insert(0, 'month', np.datetime_as_string(months[starts], unit='M'))
         
-        return monthly_agg
\ No newline at end of file
+        return monthly_agg
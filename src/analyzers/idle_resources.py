@@ -7,7 +7,25 @@ import pandas as pd
 from ..collectors.aws import AWSCostCollector
 from ..collectors.gcp import GCPCostCollector
 from ..collectors.azure import AzureCostCollector
-from ..utils.helpers import calculate_savings_potential
+from ..utils.helpers import calculate_savings_potential, IDLE_RESOURCE_SCHEMA
+
+# Shared schema of the idle resource frames returned by every collector
+IDLE_RESOURCE_COLUMNS = list(IDLE_RESOURCE_SCHEMA)
+
+def _tag(df, name):
+    """
+    Fill in the provider column of an idle resource frame.
+    
+    Args:
+        df (pd.DataFrame): Idle resources from one collector
+        name (str): Provider name to use when the frame has none
+        
+    Returns:
+        pd.DataFrame: Frame with a provider column, or the empty frame as is
+    """
+    if df.empty:
+        return df
+    return df.assign(provider=df['provider'] if 'provider' in df.columns else name)
 
 class IdleResourceAnalyzer:
     """Analyzes idle resources across cloud providers."""
@@ -37,16 +55,23 @@ class IdleResourceAnalyzer:
         if gcp_project_id:
             gcp_idle = self.gcp_collector.get_idle_resources(gcp_project_id)
         
-        # Add provider column if not present
-        if not 'provider' in aws_idle.columns:
-            aws_idle['provider'] = 'AWS'
-        if not 'provider' in gcp_idle.columns and not gcp_idle.empty:
-            gcp_idle['provider'] = 'GCP'
-        if not 'provider' in azure_idle.columns:
-            azure_idle['provider'] = 'Azure'
+        # Add provider column if not present, and align to the shared schema
+        # so the concat doesn't have to union the columns
+        frames = [
+            _tag(df, name).reindex(columns=IDLE_RESOURCE_COLUMNS)
+            for name, df in [('AWS', aws_idle), ('GCP', gcp_idle), ('Azure', azure_idle)]
+            if not df.empty
+        ]
+        
+        if not frames:
+            return pd.DataFrame(columns=IDLE_RESOURCE_COLUMNS)
         
         # Combine all data
-        all_idle = pd.concat([aws_idle, gcp_idle, azure_idle], ignore_index=True)
+        all_idle = pd.concat(frames, ignore_index=True, copy=False, sort=False)
+        
+        # Low-cardinality grouping keys hash as integer codes when categorical
+        all_idle['provider'] = all_idle['provider'].astype('category')
+        all_idle['resource_type'] = all_idle['resource_type'].astype('category')
         
         return all_idle
     
@@ -63,7 +88,7 @@ class IdleResourceAnalyzer:
         if idle_df.empty or 'estimated_monthly_savings' not in idle_df.columns:
             return pd.DataFrame()
             
-        savings_by_provider = idle_df.groupby('provider')['estimated_monthly_savings'].sum().reset_index()
+        savings_by_provider = idle_df.groupby('provider', observed=True)['estimated_monthly_savings'].sum().reset_index()
         savings_by_provider.columns = ['provider', 'potential_monthly_savings']
         
         return savings_by_provider
@@ -81,7 +106,7 @@ class IdleResourceAnalyzer:
         if idle_df.empty or 'estimated_monthly_savings' not in idle_df.columns:
             return pd.DataFrame()
             
-        savings_by_type = idle_df.groupby('resource_type')['estimated_monthly_savings'].sum().reset_index()
+        savings_by_type = idle_df.groupby('resource_type', observed=True)['estimated_monthly_savings'].sum().reset_index()
         savings_by_type.columns = ['resource_type', 'potential_monthly_savings']
         
         return savings_by_type
\ No newline at end of file
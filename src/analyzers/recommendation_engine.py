@@ -2,14 +2,173 @@
 AI-powered recommendation engine for cloud cost optimization.
 """
 
+import importlib.util
+import itertools
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import sys
-import os
+from types import MappingProxyType
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from src.utils.db import get_cost_data, get_idle_resources
+from ..utils.db import get_cost_data, get_idle_resources
+
+# Arrow-backed strings give vectorized str/isin kernels, when pyarrow is installed
+_STRING_DTYPE = 'string[pyarrow]' if importlib.util.find_spec('pyarrow') else None
+
+def _with_string_dtype(df, columns):
+    """
+    Cast the given string columns to the Arrow string dtype, if available.
+    
+    Args:
+        df (pd.DataFrame): Frame to convert
+        columns (tuple): Names of the string columns to cast
+        
+    Returns:
+        pd.DataFrame: Converted frame, or the original when pyarrow is missing
+    """
+    if _STRING_DTYPE is None or df.empty:
+        return df
+    return df.astype({c: _STRING_DTYPE for c in columns if c in df.columns})
+
+# Columns of the recommendations frame, in order
+_REC_COLUMNS = (
+    'resource_id', 'resource_type', 'provider', 'recommendation_type',
+    'current_config', 'recommended_config', 'estimated_savings', 'confidence',
+    'justification', 'implementation_steps'
+)
+
+# Services eligible for reserved instances or savings plans, by provider
+_RESERVABLE_SERVICES = MappingProxyType({
+    'AWS': ('EC2', 'RDS'),
+    'GCP': ('Compute Engine',),
+    'Azure': ('Virtual Machines',)
+})
+
+# The same eligibility as flat (provider, service) pairs, for one-hash lookups
+_RI_ELIGIBLE = frozenset(
+    (provider, service)
+    for provider, services in _RESERVABLE_SERVICES.items()
+    for service in services
+)
+
+# Downsizing targets by provider and current instance type
+_INSTANCE_MAPPING = MappingProxyType({
+    provider: MappingProxyType(mapping) for provider, mapping in {
+        'AWS': {
+            't3.large': 't3.medium',
+            'm5.xlarge': 'm5.large',
+            'c5.2xlarge': 'c5.xlarge'
+        },
+        'GCP': {
+            'n1-standard-2': 'n1-standard-1',
+            'n1-standard-4': 'n1-standard-2',
+            'n2-standard-2': 'e2-standard-2'
+        },
+        'Azure': {
+            'Standard_D2s_v3': 'Standard_B2s',
+            'Standard_D4s_v3': 'Standard_D2s_v3',
+            'Standard_F4s': 'Standard_F2s'
+        }
+    }.items()
+})
+
+# Cheaper storage tiers by provider and current tier
+_TIER_MAPPING = MappingProxyType({
+    provider: MappingProxyType(mapping) for provider, mapping in {
+        'AWS': {
+            'gp2': 'gp3',
+            'io1': 'gp3',
+            'standard': 'sc1'
+        },
+        'GCP': {
+            'Standard': 'Nearline',
+            'SSD': 'Standard'
+        },
+        'Azure': {
+            'Premium SSD': 'Standard SSD',
+            'Standard SSD': 'Standard HDD'
+        }
+    }.items()
+})
+
+# Implementation step templates, filled in with str.format()
+_RESIZE_STEP_TEMPLATES = MappingProxyType({
+    'AWS': (
+        "Stop the EC2 instance {resource_id}",
+        "Change instance type from {current} to {recommended}",
+        "Start the instance"
+    ),
+    'GCP': (
+        "Stop the VM instance {resource_id}",
+        "Change machine type from {current} to {recommended}",
+        "Start the instance"
+    ),
+    'Azure': (
+        "Stop the VM {resource_id}",
+        "Resize from {current} to {recommended}",
+        "Start the VM"
+    )
+})
+
+_STORAGE_TIER_CHANGE_STEP_TEMPLATES = MappingProxyType({
+    'AWS': (
+        "Create a snapshot of volume {resource_id}",
+        "Create a new volume with type {recommended} from the snapshot",
+        "Detach the old volume and attach the new volume"
+    ),
+    'GCP': (
+        "Create a snapshot of disk {resource_id}",
+        "Create a new disk with type {recommended} from the snapshot",
+        "Detach the old disk and attach the new disk"
+    ),
+    'Azure': (
+        "Create a snapshot of disk {resource_id}",
+        "Create a new disk with type {recommended} from the snapshot",
+        "Detach the old disk and attach the new disk"
+    )
+})
+
+_DELETION_STEP_TEMPLATES = MappingProxyType({
+    'AWS': (
+        "Verify that volume {resource_id} is not needed",
+        "Create a final snapshot if needed",
+        "Delete the volume using AWS Console or CLI"
+    ),
+    'GCP': (
+        "Verify that disk {resource_id} is not needed",
+        "Create a final snapshot if needed",
+        "Delete the disk using GCP Console or gcloud"
+    ),
+    'Azure': (
+        "Verify that disk {resource_id} is not needed",
+        "Create a final snapshot if needed",
+        "Delete the disk using Azure Portal or CLI"
+    )
+})
+
+# Keyed by (provider, service); a service of None applies to any service
+_RESERVED_INSTANCE_STEP_TEMPLATES = MappingProxyType({
+    ('AWS', 'EC2'): (
+        "Analyze EC2 usage patterns to determine instance types to reserve",
+        "Purchase {term} EC2 Reserved Instances or Savings Plan through AWS Console",
+        "Monitor utilization of reserved capacity"
+    ),
+    ('AWS', 'RDS'): (
+        "Analyze RDS usage patterns to determine instance types to reserve",
+        "Purchase {term} RDS Reserved Instances through AWS Console",
+        "Monitor utilization of reserved capacity"
+    ),
+    ('GCP', None): (
+        "Analyze {service} usage patterns",
+        "Purchase {term} commitment discounts through GCP Console",
+        "Monitor utilization of committed resources"
+    ),
+    ('Azure', None): (
+        "Analyze {service} usage patterns",
+        "Purchase {term} reserved instances through Azure Portal",
+        "Monitor utilization of reserved capacity"
+    )
+})
 
 class RecommendationEngine:
     """Generates intelligent cost optimization recommendations based on usage patterns."""
@@ -18,6 +177,33 @@ class RecommendationEngine:
         """Initialize the recommendation engine."""
         self.recommendations = []
         
+        # Idle resources by provider, only populated during get_all_recommendations
+        self._idle_cache = None
+        
+    def _get_idle(self, provider=None):
+        """
+        Get idle resources, reusing an earlier fetch within a recommendation run.
+        
+        Args:
+            provider (str, optional): Cloud provider filter
+            
+        Returns:
+            pd.DataFrame: Idle resources
+        """
+        if self._idle_cache is None:
+            return self._fetch_idle(provider)
+        
+        if provider not in self._idle_cache:
+            self._idle_cache[provider] = self._fetch_idle(provider)
+        return self._idle_cache[provider]
+        
+    def _fetch_idle(self, provider=None):
+        """Query idle resources, with string columns in the fastest available dtype."""
+        return _with_string_dtype(
+            get_idle_resources(provider),
+            ('resource_id', 'resource_type', 'provider', 'reason')
+        )
+        
     def analyze_compute_usage(self, provider=None, months=3):
         """
         Analyze compute resource usage patterns and generate rightsizing recommendations.
@@ -30,39 +216,47 @@ class RecommendationEngine:
             list: Compute rightsizing recommendations
         """
         # Get idle resources
-        idle_df = get_idle_resources(provider)
+        idle_df = self._get_idle(provider)
         
-        recommendations = []
+        if idle_df.empty:
+            return []
         
-        if not idle_df.empty:
-            # Filter for compute resources
-            compute_types = ['EC2 Instance', 'Virtual Machine', 'GCE VM']
-            compute_df = idle_df[idle_df['resource_type'].isin(compute_types)]
-            
-            for _, resource in compute_df.iterrows():
-                # Generate recommendation
-                if 'Low CPU utilization' in resource['reason']:
-                    # Suggest downsizing
-                    current_type = self._extract_instance_type(resource['resource_id'], resource['provider'])
-                    recommended_type = self._recommend_instance_type(current_type, resource['provider'])
-                    
-                    recommendations.append({
-                        'resource_id': resource['resource_id'],
-                        'resource_type': resource['resource_type'],
-                        'provider': resource['provider'],
-                        'recommendation_type': 'Rightsizing',
-                        'current_config': current_type,
-                        'recommended_config': recommended_type,
-                        'estimated_savings': resource['estimated_monthly_savings'],
-                        'confidence': 'High' if resource['estimated_monthly_savings'] > 50 else 'Medium',
-                        'justification': f"Instance has {resource['reason']}",
-                        'implementation_steps': self._get_resize_steps(resource['resource_id'], 
-                                                                      current_type, 
-                                                                      recommended_type, 
-                                                                      resource['provider'])
-                    })
-        
-        return recommendations
+        # Filter for compute resources with low CPU utilization
+        compute_types = ['EC2 Instance', 'Virtual Machine', 'GCE VM']
+        compute_df = idle_df[idle_df['resource_type'].isin(compute_types)]
+        compute_df = compute_df[compute_df['reason'].str.contains('Low CPU utilization', regex=False, na=False)]
+        
+        if compute_df.empty:
+            return []
+        
+        # The placeholder extraction only depends on the provider, so resolve
+        # instance types once per provider and map them onto every row
+        providers = compute_df['provider']
+        current_types = {p: self._extract_instance_type(None, p) for p in providers.unique()}
+        recommended_types = {p: self._recommend_instance_type(t, p) for p, t in current_types.items()}
+        current_config = providers.map(current_types)
+        recommended_config = providers.map(recommended_types)
+        savings = compute_df['estimated_monthly_savings']
+        
+        # Suggest downsizing
+        recommendations = pd.DataFrame({
+            'resource_id': compute_df['resource_id'],
+            'resource_type': compute_df['resource_type'],
+            'provider': providers,
+            'recommendation_type': 'Rightsizing',
+            'current_config': current_config,
+            'recommended_config': recommended_config,
+            'estimated_savings': savings,
+            'confidence': np.where(savings > 50, 'High', 'Medium'),
+            'justification': 'Instance has ' + compute_df['reason'],
+            'implementation_steps': [
+                self._get_resize_steps(resource_id, current, recommended, resource_provider)
+                for resource_id, current, recommended, resource_provider
+                in zip(compute_df['resource_id'], current_config, recommended_config, providers)
+            ]
+        })
+        
+        return recommendations.to_dict('records')
     
     def analyze_storage_optimization(self, provider=None):
         """
@@ -75,55 +269,75 @@ class RecommendationEngine:
             list: Storage optimization recommendations
         """
         # Get idle resources
-        idle_df = get_idle_resources(provider)
+        idle_df = self._get_idle(provider)
+        
+        if idle_df.empty:
+            return []
         
-        recommendations = []
+        # Filter for storage resources
+        storage_types = ['EBS Volume', 'Persistent Disk', 'Managed Disk']
+        storage_df = idle_df[idle_df['resource_type'].isin(storage_types)]
         
-        if not idle_df.empty:
-            # Filter for storage resources
-            storage_types = ['EBS Volume', 'Persistent Disk', 'Managed Disk']
-            storage_df = idle_df[idle_df['resource_type'].isin(storage_types)]
+        # Classify every reason in one pass; the lookahead keeps 'Unattached'
+        # taking precedence when a reason mentions both
+        kind = storage_df['reason'].str.extract(
+            r'(Unattached|Low I/O(?!.*Unattached))', expand=False
+        ).astype('category')
+        
+        frames = []
+        
+        # Suggest deletion of unattached volumes
+        unattached_df = storage_df[kind == 'Unattached']
+        if not unattached_df.empty:
+            frames.append(pd.DataFrame({
+                'resource_id': unattached_df['resource_id'],
+                'resource_type': unattached_df['resource_type'],
+                'provider': unattached_df['provider'],
+                'recommendation_type': 'Deletion',
+                'current_config': 'Unattached volume',
+                'recommended_config': 'Delete volume',
+                'estimated_savings': unattached_df['estimated_monthly_savings'],
+                'confidence': 'High',
+                'justification': 'Storage volume has been ' + unattached_df['reason'],
+                'implementation_steps': [
+                    self._get_deletion_steps(resource_id, resource_type, resource_provider)
+                    for resource_id, resource_type, resource_provider
+                    in zip(unattached_df['resource_id'], unattached_df['resource_type'], unattached_df['provider'])
+                ]
+            }))
+        
+        # Suggest changing storage tier for volumes with low I/O
+        low_io_df = storage_df[kind == 'Low I/O']
+        if not low_io_df.empty:
+            # Storage tiers are likewise resolved once per provider
+            providers = low_io_df['provider']
+            current_tiers = {p: self._extract_storage_tier(None, p) for p in providers.unique()}
+            recommended_tiers = {p: self._recommend_storage_tier(t, p) for p, t in current_tiers.items()}
+            current_config = providers.map(current_tiers)
+            recommended_config = providers.map(recommended_tiers)
             
-            for _, resource in storage_df.iterrows():
-                # Generate recommendation
-                if 'Unattached' in resource['reason']:
-                    # Suggest deletion
-                    recommendations.append({
-                        'resource_id': resource['resource_id'],
-                        'resource_type': resource['resource_type'],
-                        'provider': resource['provider'],
-                        'recommendation_type': 'Deletion',
-                        'current_config': 'Unattached volume',
-                        'recommended_config': 'Delete volume',
-                        'estimated_savings': resource['estimated_monthly_savings'],
-                        'confidence': 'High',
-                        'justification': f"Storage volume has been {resource['reason']}",
-                        'implementation_steps': self._get_deletion_steps(resource['resource_id'], 
-                                                                        resource['resource_type'], 
-                                                                        resource['provider'])
-                    })
-                elif 'Low I/O' in resource['reason']:
-                    # Suggest changing storage tier
-                    current_tier = self._extract_storage_tier(resource['resource_id'], resource['provider'])
-                    recommended_tier = self._recommend_storage_tier(current_tier, resource['provider'])
-                    
-                    recommendations.append({
-                        'resource_id': resource['resource_id'],
-                        'resource_type': resource['resource_type'],
-                        'provider': resource['provider'],
-                        'recommendation_type': 'Storage Tier Change',
-                        'current_config': current_tier,
-                        'recommended_config': recommended_tier,
-                        'estimated_savings': resource['estimated_monthly_savings'] * 0.7,  # Estimate savings from tier change
-                        'confidence': 'Medium',
-                        'justification': f"Storage volume has {resource['reason']}",
-                        'implementation_steps': self._get_storage_tier_change_steps(resource['resource_id'], 
-                                                                                  current_tier, 
-                                                                                  recommended_tier, 
-                                                                                  resource['provider'])
-                    })
-        
-        return recommendations
+            frames.append(pd.DataFrame({
+                'resource_id': low_io_df['resource_id'],
+                'resource_type': low_io_df['resource_type'],
+                'provider': providers,
+                'recommendation_type': 'Storage Tier Change',
+                'current_config': current_config,
+                'recommended_config': recommended_config,
+                'estimated_savings': low_io_df['estimated_monthly_savings'] * 0.7,  # Estimate savings from tier change
+                'confidence': 'Medium',
+                'justification': 'Storage volume has ' + low_io_df['reason'],
+                'implementation_steps': [
+                    self._get_storage_tier_change_steps(resource_id, current, recommended, resource_provider)
+                    for resource_id, current, recommended, resource_provider
+                    in zip(low_io_df['resource_id'], current_config, recommended_config, providers)
+                ]
+            }))
+        
+        if not frames:
+            return []
+        
+        # Restore the original resource order across both recommendation kinds
+        return pd.concat(frames).sort_index().to_dict('records')
     
     def analyze_reserved_instance_opportunities(self, provider=None, months=6):
         """
@@ -140,59 +354,63 @@ class RecommendationEngine:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=30*months)
         
+        # Only fetch rows for compute services that can be reserved
+        if provider:
+            services = _RESERVABLE_SERVICES.get(provider, ())
+        else:
+            services = list(itertools.chain.from_iterable(_RESERVABLE_SERVICES.values()))
+        
         cost_data = get_cost_data(
             start_date=start_date.strftime('%Y-%m-%d'),
             end_date=end_date.strftime('%Y-%m-%d'),
-            provider=provider
+            provider=provider,
+            services=services,
+            columns=['provider', 'service', 'cost']
         )
         
-        recommendations = []
+        if cost_data.empty:
+            return []
         
-        if not cost_data.empty:
-            # Filter for compute services
-            compute_services = {
-                'AWS': ['EC2', 'RDS'],
-                'GCP': ['Compute Engine'],
-                'Azure': ['Virtual Machines']
-            }
-            
-            # Group by provider and service
-            cost_column = 'cost' if 'cost' in cost_data.columns else 'amount'
-            grouped = cost_data.groupby(['provider', 'service'])[cost_column].sum().reset_index()
-            
-            for _, row in grouped.iterrows():
-                provider = row['provider']
-                service = row['service']
-                total_cost = row[cost_column]
-                
-                # Check if service is eligible for reserved instances
-                if provider in compute_services and service in compute_services[provider]:
-                    # Calculate potential savings (typically 30-60% for 1-year commitment)
-                    savings_percentage = 0.4  # 40% average savings
-                    estimated_savings = total_cost * savings_percentage
-                    
-                    if estimated_savings > 100:  # Only recommend if savings are significant
-                        commitment_term = '1-year'
-                        if estimated_savings > 500:
-                            # For higher spend, consider 3-year commitment
-                            commitment_term = '3-year'
-                            savings_percentage = 0.6  # 60% average savings for 3-year
-                            estimated_savings = total_cost * savings_percentage
-                        
-                        recommendations.append({
-                            'resource_id': f"{provider}-{service}",
-                            'resource_type': service,
-                            'provider': provider,
-                            'recommendation_type': 'Reserved Instance/Savings Plan',
-                            'current_config': 'On-demand pricing',
-                            'recommended_config': f"{commitment_term} commitment",
-                            'estimated_savings': estimated_savings,
-                            'confidence': 'Medium',
-                            'justification': f"Consistent usage of {service} over the past {months} months",
-                            'implementation_steps': self._get_reserved_instance_steps(provider, service, commitment_term)
-                        })
-        
-        return recommendations
+        cost_data = _with_string_dtype(cost_data, ('provider', 'service'))
+        
+        # Group by provider and service, keeping only eligible pairs
+        grouped = cost_data.groupby(['provider', 'service'], observed=True)['cost'].sum()
+        grouped = grouped[grouped.index.isin(_RI_ELIGIBLE)].reset_index(name='total_cost')
+        
+        # get_cost_data returns provider and service as categories; the
+        # few eligible rows go back to text for the messages built below
+        grouped = grouped.astype({'provider': str, 'service': str})
+        
+        # Potential savings are typically 30-60%: 40% for a 1-year commitment,
+        # or 60% for a 3-year commitment when 1-year savings would exceed 500
+        long_term = grouped['total_cost'] * 0.4 > 500
+        grouped['estimated_savings'] = grouped['total_cost'] * np.where(long_term, 0.6, 0.4)
+        grouped['commitment_term'] = np.where(long_term, '3-year', '1-year')
+        
+        # Only recommend if savings are significant
+        grouped = grouped[grouped['estimated_savings'] > 100]
+        
+        if grouped.empty:
+            return []
+        
+        recommendations = pd.DataFrame({
+            'resource_id': grouped['provider'] + '-' + grouped['service'],
+            'resource_type': grouped['service'],
+            'provider': grouped['provider'],
+            'recommendation_type': 'Reserved Instance/Savings Plan',
+            'current_config': 'On-demand pricing',
+            'recommended_config': grouped['commitment_term'] + ' commitment',
+            'estimated_savings': grouped['estimated_savings'],
+            'confidence': 'Medium',
+            'justification': 'Consistent usage of ' + grouped['service'] + f" over the past {months} months",
+            'implementation_steps': [
+                self._get_reserved_instance_steps(row_provider, service, term)
+                for row_provider, service, term
+                in zip(grouped['provider'], grouped['service'], grouped['commitment_term'])
+            ]
+        })
+        
+        return recommendations.to_dict('records')
     
     def get_all_recommendations(self):
         """
@@ -201,25 +419,26 @@ class RecommendationEngine:
         Returns:
             pd.DataFrame: All recommendations
         """
-        all_recommendations = []
-        
-        # Get compute recommendations
-        compute_recs = self.analyze_compute_usage()
-        all_recommendations.extend(compute_recs)
-        
-        # Get storage recommendations
-        storage_recs = self.analyze_storage_optimization()
-        all_recommendations.extend(storage_recs)
-        
-        # Get reserved instance recommendations
-        ri_recs = self.analyze_reserved_instance_opportunities()
-        all_recommendations.extend(ri_recs)
+        # Compute and storage analysis share one idle resource query, fetched
+        # up front so the worker threads never race to fill the cache
+        self._idle_cache = {}
+        try:
+            self._get_idle()
+            
+            # The analyzers are independent and mostly wait on the database,
+            # so run them concurrently and collect results in a fixed order
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = [
+                    executor.submit(self.analyze_compute_usage),
+                    executor.submit(self.analyze_storage_optimization),
+                    executor.submit(self.analyze_reserved_instance_opportunities)
+                ]
+                results = [future.result() for future in futures]
+        finally:
+            self._idle_cache = None
         
-        # Convert to DataFrame
-        if all_recommendations:
-            return pd.DataFrame(all_recommendations)
-        else:
-            return pd.DataFrame()
+        # Convert to DataFrame with a fixed schema, even when there are no recommendations
+        return pd.DataFrame.from_records(itertools.chain.from_iterable(results), columns=_REC_COLUMNS)
     
     def _extract_instance_type(self, resource_id, provider):
         """Extract instance type from resource ID."""
@@ -237,49 +456,14 @@ class RecommendationEngine:
         """Recommend a more appropriate instance type."""
         # This would use a more sophisticated algorithm in a real implementation
         # Placeholder implementation
-        instance_mapping = {
-            'AWS': {
-                't3.large': 't3.medium',
-                'm5.xlarge': 'm5.large',
-                'c5.2xlarge': 'c5.xlarge'
-            },
-            'GCP': {
-                'n1-standard-2': 'n1-standard-1',
-                'n1-standard-4': 'n1-standard-2',
-                'n2-standard-2': 'e2-standard-2'
-            },
-            'Azure': {
-                'Standard_D2s_v3': 'Standard_B2s',
-                'Standard_D4s_v3': 'Standard_D2s_v3',
-                'Standard_F4s': 'Standard_F2s'
-            }
-        }
-        
-        if provider in instance_mapping and current_type in instance_mapping[provider]:
-            return instance_mapping[provider][current_type]
-        return current_type
+        return _INSTANCE_MAPPING.get(provider, {}).get(current_type, current_type)
     
     def _get_resize_steps(self, resource_id, current_type, recommended_type, provider):
         """Get steps to resize a compute instance."""
-        if provider == 'AWS':
-            return [
-                f"Stop the EC2 instance {resource_id}",
-                f"Change instance type from {current_type} to {recommended_type}",
-                f"Start the instance"
-            ]
-        elif provider == 'GCP':
-            return [
-                f"Stop the VM instance {resource_id}",
-                f"Change machine type from {current_type} to {recommended_type}",
-                f"Start the instance"
-            ]
-        elif provider == 'Azure':
-            return [
-                f"Stop the VM {resource_id}",
-                f"Resize from {current_type} to {recommended_type}",
-                f"Start the VM"
-            ]
-        return []
+        return [
+            step.format(resource_id=resource_id, current=current_type, recommended=recommended_type)
+            for step in _RESIZE_STEP_TEMPLATES.get(provider, ())
+        ]
     
     def _extract_storage_tier(self, resource_id, provider):
         """Extract storage tier from resource ID."""
@@ -295,95 +479,26 @@ class RecommendationEngine:
     def _recommend_storage_tier(self, current_tier, provider):
         """Recommend a more appropriate storage tier."""
         # Placeholder implementation
-        tier_mapping = {
-            'AWS': {
-                'gp2': 'gp3',
-                'io1': 'gp3',
-                'standard': 'sc1'
-            },
-            'GCP': {
-                'Standard': 'Nearline',
-                'SSD': 'Standard'
-            },
-            'Azure': {
-                'Premium SSD': 'Standard SSD',
-                'Standard SSD': 'Standard HDD'
-            }
-        }
-        
-        if provider in tier_mapping and current_tier in tier_mapping[provider]:
-            return tier_mapping[provider][current_tier]
-        return current_tier
+        return _TIER_MAPPING.get(provider, {}).get(current_tier, current_tier)
     
     def _get_storage_tier_change_steps(self, resource_id, current_tier, recommended_tier, provider):
         """Get steps to change storage tier."""
-        if provider == 'AWS':
-            return [
-                f"Create a snapshot of volume {resource_id}",
-                f"Create a new volume with type {recommended_tier} from the snapshot",
-                f"Detach the old volume and attach the new volume"
-            ]
-        elif provider == 'GCP':
-            return [
-                f"Create a snapshot of disk {resource_id}",
-                f"Create a new disk with type {recommended_tier} from the snapshot",
-                f"Detach the old disk and attach the new disk"
-            ]
-        elif provider == 'Azure':
-            return [
-                f"Create a snapshot of disk {resource_id}",
-                f"Create a new disk with type {recommended_tier} from the snapshot",
-                f"Detach the old disk and attach the new disk"
-            ]
-        return []
+        return [
+            step.format(resource_id=resource_id, current=current_tier, recommended=recommended_tier)
+            for step in _STORAGE_TIER_CHANGE_STEP_TEMPLATES.get(provider, ())
+        ]
     
     def _get_deletion_steps(self, resource_id, resource_type, provider):
         """Get steps to delete a resource."""
-        if provider == 'AWS':
-            return [
-                f"Verify that volume {resource_id} is not needed",
-                f"Create a final snapshot if needed",
-                f"Delete the volume using AWS Console or CLI"
-            ]
-        elif provider == 'GCP':
-            return [
-                f"Verify that disk {resource_id} is not needed",
-                f"Create a final snapshot if needed",
-                f"Delete the disk using GCP Console or gcloud"
-            ]
-        elif provider == 'Azure':
-            return [
-                f"Verify that disk {resource_id} is not needed",
-                f"Create a final snapshot if needed",
-                f"Delete the disk using Azure Portal or CLI"
-            ]
-        return []
+        return [
+            step.format(resource_id=resource_id, resource_type=resource_type)
+            for step in _DELETION_STEP_TEMPLATES.get(provider, ())
+        ]
     
     def _get_reserved_instance_steps(self, provider, service, term):
         """Get steps to purchase reserved instances or savings plans."""
-        if provider == 'AWS':
-            if service == 'EC2':
-                return [
-                    f"Analyze EC2 usage patterns to determine instance types to reserve",
-                    f"Purchase {term} EC2 Reserved Instances or Savings Plan through AWS Console",
-                    "Monitor utilization of reserved capacity"
-                ]
-            elif service == 'RDS':
-                return [
-                    f"Analyze RDS usage patterns to determine instance types to reserve",
-                    f"Purchase {term} RDS Reserved Instances through AWS Console",
-                    "Monitor utilization of reserved capacity"
-                ]
-        elif provider == 'GCP':
-            return [
-                f"Analyze {service} usage patterns",
-                f"Purchase {term} commitment discounts through GCP Console",
-                "Monitor utilization of committed resources"
-            ]
-        elif provider == 'Azure':
-            return [
-                f"Analyze {service} usage patterns",
-                f"Purchase {term} reserved instances through Azure Portal",
-                "Monitor utilization of reserved capacity"
-            ]
-        return []
\ No newline at end of file
+        templates = _RESERVED_INSTANCE_STEP_TEMPLATES.get(
+            (provider, service),
+            _RESERVED_INSTANCE_STEP_TEMPLATES.get((provider, None), ())
+        )
+        return [step.format(service=service, term=term) for step in templates]
@@ -3,36 +3,117 @@ AWS Cost Explorer data collector.
 Fetches cost and usage data from AWS Cost Explorer API.
 """
 
-import os
+import copy
 import datetime
+import functools
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
 import pandas as pd
+import numpy as np
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
-import sys
+from concurrent.futures import ThreadPoolExecutor
 
-# Add project root to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from config import AWS_PROFILE, AWS_REGION
-from src.utils.helpers import format_cost_data
+from ..utils.helpers import format_cost_data, format_idle_resources, IDLE_RESOURCE_SCHEMA
+
+# Instances averaging less CPU (%) than this over the lookback are idle
+IDLE_CPU_THRESHOLD = 5.0
+IDLE_LOOKBACK_DAYS = 7
+
+# Maximum number of queries GetMetricData accepts per request
+METRIC_DATA_BATCH_SIZE = 500
+
+# Seconds a disk-cached Cost Explorer response that includes the current
+# month stays valid; responses covering only closed months never expire
+RESPONSE_CACHE_FILE_TTL = 86400
+
+# Seconds to reuse describe_* results, which change faster than billing data
+DESCRIBE_CACHE_TTL = 60
+
+# Recent API responses shared by all collectors in the process, keyed by
+# (call, (profile, region), arguments) and holding (fetched at, value)
+_response_cache = {}
+_response_cache_lock = threading.Lock()
+
+# Keep enough pooled (kept-alive) connections for concurrent calls, let
+# botocore back off adaptively (with jitter) when AWS throttles, and bound
+# how long a stalled connection can hold a worker
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+    connect_timeout=5,
+    read_timeout=30,
+    tcp_keepalive=True
+)
+
+@functools.lru_cache(maxsize=32)
+def _get_session(profile_name, region_name):
+    """
+    Get the shared boto3 session for a profile and region.
+    
+    Args:
+        profile_name (str): AWS profile name, or None for the default chain
+        region_name (str): AWS region name
+        
+    Returns:
+        boto3.Session: Session reused by every collector with the same arguments
+    """
+    if profile_name:
+        return boto3.Session(profile_name=profile_name, region_name=region_name)
+    return boto3.Session(region_name=region_name)
+
+@functools.lru_cache(maxsize=128)
+def _get_client(profile_name, region_name, service_name):
+    """
+    Get the shared client for an AWS service.
+    
+    Clients are thread-safe, so reusing them keeps resolved credentials and
+    pooled connections across collector instances.
+    
+    Args:
+        profile_name (str): AWS profile name, or None for the default chain
+        region_name (str): AWS region name
+        service_name (str): boto3 service name, e.g. 'ce' or 'ec2'
+        
+    Returns:
+        botocore.client.BaseClient: Service client
+    """
+    return _get_session(profile_name, region_name).client(service_name, config=CLIENT_CONFIG)
 
 class AWSCostCollector:
     """Collects and processes AWS cost data using the Cost Explorer API."""
     
-    def __init__(self, profile_name=None, region_name=None):
+    def __init__(self, profile_name=None, region_name=None, cache_ttl=300, cache_dir=None):
         """
         Initialize AWS Cost Explorer client.
         
         Args:
             profile_name (str, optional): AWS profile name to use. Defaults to config value.
             region_name (str, optional): AWS region name. Defaults to config value.
+            cache_ttl (int, optional): Seconds to reuse Cost Explorer responses. Describe
+                calls are reused for at most DESCRIBE_CACHE_TTL seconds. 0 disables caching.
+                Defaults to 300.
+            cache_dir (str, optional): Directory to persist Cost Explorer responses in,
+                keyed by request. Responses for past months are kept indefinitely, others
+                for RESPONSE_CACHE_FILE_TTL seconds. Defaults to None (no disk cache).
         """
         profile_name = profile_name or AWS_PROFILE
         region_name = region_name or AWS_REGION
         
-        session = boto3.Session(profile_name=profile_name, region_name=region_name) if profile_name else boto3.Session(region_name=region_name)
-        self.client = session.client('ce')
-        self.ec2_client = session.client('ec2')
-        self.rds_client = session.client('rds')
+        self.cache_ttl = cache_ttl
+        self.cache_dir = cache_dir
+        self._cache_scope = (profile_name, region_name)
+        
+        self.client = _get_client(profile_name, region_name, 'ce')
+        self.ec2_client = _get_client(profile_name, region_name, 'ec2')
+        self.rds_client = _get_client(profile_name, region_name, 'rds')
+        self.cloudwatch_client = _get_client(profile_name, region_name, 'cloudwatch')
     
     def get_cost_and_usage(self, start_date, end_date, granularity='MONTHLY', metrics=None, group_by=None):
         """
@@ -54,43 +135,270 @@ class AWSCostCollector:
         if group_by is None:
             group_by = [{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
         
+        params = {
+            'TimePeriod': {
+                'Start': start_date,
+                'End': end_date
+            },
+            'Granularity': granularity,
+            'Metrics': metrics,
+            'GroupBy': group_by
+        }
+        
+        # Cost Explorer bills per request, so identical queries are served
+        # from the response cache while it is fresh
+        cache_key = ('get_cost_and_usage', self._cache_scope, json.dumps(params, sort_keys=True))
+        
         try:
-            response = self.client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': start_date,
-                    'End': end_date
-                },
-                Granularity=granularity,
-                Metrics=metrics,
-                GroupBy=group_by
-            )
+            return self._cached(cache_key, self.cache_ttl, lambda: self._load_or_fetch_cost_and_usage(params))
+            
+        except ClientError as e:
+            print(f"Error fetching AWS cost data: {e}")
+            return pd.DataFrame()
+    
+    def _load_or_fetch_cost_and_usage(self, params):
+        """
+        Get Cost Explorer results from the disk cache, or query and cache them.
+        
+        Args:
+            params (dict): get_cost_and_usage request parameters
+            
+        Returns:
+            pd.DataFrame: Processed cost data
+        """
+        if not self.cache_dir:
+            return self._fetch_cost_and_usage(params)
+        
+        cache_path = self._response_cache_path(params)
+        df = self._load_cached_response(cache_path, params['TimePeriod']['End'])
+        if df is None:
+            df = self._fetch_cost_and_usage(params)
+            self._save_cached_response(cache_path, df)
+        return df
+    
+    def _response_cache_path(self, params):
+        """Get the cache file path for a Cost Explorer request."""
+        digest = hashlib.sha256(json.dumps([self._cache_scope, params], sort_keys=True).encode())
+        return os.path.join(self.cache_dir, f"ce-{digest.hexdigest()}.pkl")
+    
+    def _load_cached_response(self, cache_path, end_date):
+        """Load a cached response, or return None if missing, expired or unreadable."""
+        # Cost Explorer's end date is exclusive, so a period ending on or
+        # before the first of this month only covers closed months
+        closed = end_date <= datetime.date.today().replace(day=1).isoformat()
+        try:
+            if not closed and time.time() - os.path.getmtime(cache_path) > RESPONSE_CACHE_FILE_TTL:
+                return None
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading cached AWS cost data: {e}")
+            return None
+    
+    def _save_cached_response(self, cache_path, df):
+        """Write a Cost Explorer response to the disk cache."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            
+            # Write to a temporary file first so readers never see a partial pickle
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(df, f)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"Error caching AWS cost data: {e}")
+    
+    def _fetch_cost_and_usage(self, params):
+        """
+        Run a Cost Explorer query and build the cost DataFrame.
+        
+        Args:
+            params (dict): get_cost_and_usage request parameters
+            
+        Returns:
+            pd.DataFrame: Processed cost data
+        """
+        params = dict(params)
+        
+        # Collect each column separately so the DataFrame is built in
+        # one pass without per-row dicts or dtype inference
+        dates, services, amounts, currencies = [], [], [], []
+        
+        # Follow NextPageToken until exhausted; a single call truncates
+        # accounts with many services
+        while True:
+            response = self.client.get_cost_and_usage(**params)
             
-            # Process the response into a DataFrame
-            results = []
             for time_period in response['ResultsByTime']:
                 period_start = time_period['TimePeriod']['Start']
                 
-                # Handle groups
                 for group in time_period['Groups']:
-                    service = group['Keys'][0]
-                    amount = float(group['Metrics']['UnblendedCost']['Amount'])
-                    currency = group['Metrics']['UnblendedCost']['Unit']
-                    
-                    results.append({
-                        'date': period_start,
-                        'service': service,
-                        'amount': amount,
-                        'currency': currency,
-                        'provider': 'AWS'
-                    })
+                    cost = group['Metrics']['UnblendedCost']
+                    dates.append(period_start)
+                    services.append(group['Keys'][0])
+                    amounts.append(cost['Amount'])
+                    currencies.append(cost['Unit'])
             
-            # Convert to DataFrame
-            df = pd.DataFrame(results)
-            return format_cost_data(df)
+            next_token = response.get('NextPageToken')
+            if not next_token:
+                break
+            params['NextPageToken'] = next_token
+        
+        # Convert to DataFrame
+        df = pd.DataFrame({
+            'date': pd.to_datetime(dates),
+            'service': pd.Categorical(services),
+            'amount': np.array(amounts, dtype=np.float64),
+            'currency': pd.Categorical(currencies),
+            'provider': pd.Categorical(['AWS'] * len(amounts))
+        })
+        return format_cost_data(df)
+    
+    def _cached(self, key, ttl, fetch):
+        """
+        Return a cached response, calling fetch when it is missing or stale.
+        
+        Args:
+            key (tuple): Cache key, scoped to this collector's profile and region
+            ttl (float): Seconds a cached response stays fresh; 0 disables caching
+            fetch (callable): Makes the API call; exceptions are not cached
             
-        except ClientError as e:
-            print(f"Error fetching AWS cost data: {e}")
-            return pd.DataFrame()
+        Returns:
+            A copy of the cached or freshly fetched value
+        """
+        now = time.monotonic()
+        
+        with _response_cache_lock:
+            entry = _response_cache.get(key)
+            
+        if entry is None or now - entry[0] >= ttl:
+            entry = (now, fetch())
+            if ttl > 0:
+                with _response_cache_lock:
+                    _response_cache[key] = entry
+        
+        # Hand out copies so callers can't mutate the cached value
+        return copy.copy(entry[1])
+    
+    def _find_idle_instances(self):
+        """
+        Find running EC2 instances whose average CPU stayed under the idle threshold.
+        
+        Returns:
+            list: Idle resource records for the low-utilization instances
+        """
+        # Ask for the largest pages each API allows to keep round-trips down
+        paginator = self.ec2_client.get_paginator('describe_instances')
+        pages = paginator.paginate(
+            Filters=[{'Name': 'instance-state-name', 'Values': ['running']}],
+            PaginationConfig={'PageSize': 1000}
+        )
+        
+        instance_ids = [
+            instance['InstanceId']
+            for page in pages
+            for reservation in page['Reservations']
+            for instance in reservation['Instances']
+        ]
+        
+        average_cpu = self._get_average_cpu(instance_ids)
+        
+        return [
+            {
+                'resource_id': instance_id,
+                'resource_type': 'EC2 Instance',
+                'region': AWS_REGION,
+                'estimated_monthly_savings': 45.20,  # Placeholder value
+                'reason': f'Low CPU utilization (<{IDLE_CPU_THRESHOLD:g}% for {IDLE_LOOKBACK_DAYS} days)',
+                'recommendation': 'Consider downsizing or terminating',
+                'provider': 'AWS'
+            }
+            for instance_id in instance_ids
+            if instance_id in average_cpu and average_cpu[instance_id] < IDLE_CPU_THRESHOLD
+        ]
+    
+    def _get_average_cpu(self, instance_ids):
+        """
+        Fetch average daily CPU utilization for instances with GetMetricData.
+        
+        One GetMetricData call covers up to 500 instances, where
+        GetMetricStatistics would need a call per instance.
+        
+        Args:
+            instance_ids (list): EC2 instance IDs
+            
+        Returns:
+            dict: Mapping of instance ID to average CPU utilization (%); instances
+                without datapoints are left out
+        """
+        end_time = datetime.datetime.utcnow()
+        start_time = end_time - datetime.timedelta(days=IDLE_LOOKBACK_DAYS)
+        paginator = self.cloudwatch_client.get_paginator('get_metric_data')
+        
+        average_cpu = {}
+        for offset in range(0, len(instance_ids), METRIC_DATA_BATCH_SIZE):
+            batch = instance_ids[offset:offset + METRIC_DATA_BATCH_SIZE]
+            queries = [
+                {
+                    'Id': f'cpu{i}',
+                    'MetricStat': {
+                        'Metric': {
+                            'Namespace': 'AWS/EC2',
+                            'MetricName': 'CPUUtilization',
+                            'Dimensions': [{'Name': 'InstanceId', 'Value': instance_id}]
+                        },
+                        'Period': 86400,
+                        'Stat': 'Average'
+                    }
+                }
+                for i, instance_id in enumerate(batch)
+            ]
+            
+            # Datapoints for one query can be split across pages
+            values = {}
+            for page in paginator.paginate(MetricDataQueries=queries, StartTime=start_time, EndTime=end_time):
+                for result in page['MetricDataResults']:
+                    values.setdefault(result['Id'], []).extend(result['Values'])
+            
+            for i, instance_id in enumerate(batch):
+                datapoints = values.get(f'cpu{i}')
+                if datapoints:
+                    average_cpu[instance_id] = float(np.mean(datapoints))
+        
+        return average_cpu
+    
+    def _find_unattached_volumes(self):
+        """
+        List unattached EBS volumes page by page.
+        
+        Returns:
+            list: Idle resource records for the unattached volumes
+        """
+        unattached_volumes = []
+        
+        # 'available' volumes are the unattached ones, so EC2 filters them for us
+        # and attached volumes never cross the wire
+        paginator = self.ec2_client.get_paginator('describe_volumes')
+        pages = paginator.paginate(
+            Filters=[{'Name': 'status', 'Values': ['available']}],
+            PaginationConfig={'PageSize': 500}
+        )
+        
+        for page in pages:
+            for volume in page['Volumes']:
+                unattached_volumes.append({
+                    'resource_id': volume['VolumeId'],
+                    'resource_type': 'EBS Volume',
+                    'region': AWS_REGION,
+                    'estimated_monthly_savings': 12.80,  # Placeholder value
+                    'reason': 'Unattached for 14 days',
+                    'recommendation': 'Delete if not needed',
+                    'provider': 'AWS'
+                })
+        
+        return unattached_volumes
     
     def get_idle_resources(self):
         """
@@ -101,46 +409,31 @@ class AWSCostCollector:
         """
         idle_resources = []
         
-        try:
-            # Check for idle EC2 instances (this would use CloudWatch metrics in a real implementation)
-            ec2_response = self.ec2_client.describe_instances()
-            for reservation in ec2_response['Reservations']:
-                for instance in reservation['Instances']:
-                    # In a real implementation, we would check CloudWatch metrics
-                    # for CPU utilization over a period of time
-                    if instance['State']['Name'] == 'running':
-                        # This is a placeholder - in reality we would check actual metrics
-                        idle_resources.append({
-                            'resource_id': instance['InstanceId'],
-                            'resource_type': 'EC2 Instance',
-                            'region': AWS_REGION,
-                            'estimated_monthly_savings': 45.20,  # Placeholder value
-                            'reason': 'Low CPU utilization (<5% for 7 days)',
-                            'recommendation': 'Consider downsizing or terminating',
-                            'provider': 'AWS'
-                        })
-                        break  # Just add one example for demonstration
-            
-            # Check for unattached EBS volumes
-            volumes_response = self.ec2_client.describe_volumes()
-            for volume in volumes_response['Volumes']:
-                if 'Attachments' not in volume or len(volume['Attachments']) == 0:
-                    idle_resources.append({
-                        'resource_id': volume['VolumeId'],
-                        'resource_type': 'EBS Volume',
-                        'region': AWS_REGION,
-                        'estimated_monthly_savings': 12.80,  # Placeholder value
-                        'reason': 'Unattached for 14 days',
-                        'recommendation': 'Delete if not needed',
-                        'provider': 'AWS'
-                    })
-                    break  # Just add one example for demonstration
-                    
-        except ClientError as e:
-            print(f"Error checking for idle AWS resources: {e}")
+        # The describe calls are independent, so issue them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            describe_ttl = min(self.cache_ttl, DESCRIBE_CACHE_TTL)
+            futures = {
+                # Idle EC2 instances (low average CPU in CloudWatch)
+                'EC2 instances': executor.submit(
+                    self._cached, ('describe_instances', self._cache_scope), describe_ttl, self._find_idle_instances
+                ),
+                # Unattached EBS volumes
+                'EBS volumes': executor.submit(
+                    self._cached, ('describe_volumes', self._cache_scope), describe_ttl, self._find_unattached_volumes
+                )
+            }
+        
+        # Collect each scan on its own so one failing keeps the other's results
+        failed_scans = 0
+        for scan, future in futures.items():
+            try:
+                idle_resources.extend(future.result())
+            except ClientError as e:
+                failed_scans += 1
+                print(f"Error checking for idle AWS {scan}: {e}")
         
-        # If no real resources found, return placeholder data
-        if not idle_resources:
+        # If every scan failed, return placeholder data
+        if failed_scans == len(futures):
             idle_resources = [
                 {
                     'resource_id': 'i-12345abcdef',
@@ -162,4 +455,4 @@ class AWSCostCollector:
                 }
             ]
         
-        return pd.DataFrame(idle_resources)
\ No newline at end of file
+        return format_idle_resources(pd.DataFrame.from_records(idle_resources, columns=list(IDLE_RESOURCE_SCHEMA)))
\ No newline at end of file
@@ -3,16 +3,20 @@ Azure Cost Management data collector.
 Fetches cost data from Azure Cost Management API.
 """
 
-import os
 import pandas as pd
+from urllib.parse import parse_qs, urlparse
 from azure.identity import DefaultAzureCredential
 from azure.mgmt.costmanagement import CostManagementClient
-import sys
 
-# Add project root to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from config import AZURE_SUBSCRIPTION_ID
-from src.utils.helpers import format_cost_data
+from ..utils.helpers import format_cost_data, format_idle_resources
+
+# Source column summed by the usage query; Cost Management names the result
+# column after it, not after the aggregation's alias
+COST_COLUMN = 'Cost'
+
+# Columns of the cost data frames built by this collector
+_COST_DATA_COLUMNS = ['date', 'service', 'amount', 'currency', 'provider']
 
 class AzureCostCollector:
     """Collects and processes Azure cost data using the Cost Management API."""
@@ -28,7 +32,8 @@ class AzureCostCollector:
         
         try:
             self.credential = DefaultAzureCredential()
-            self.client = CostManagementClient(self.credential, self.subscription_id) if self.subscription_id else None
+            # The client is not bound to a subscription; queries carry it in their scope
+            self.client = CostManagementClient(self.credential) if self.subscription_id else None
         except Exception as e:
             print(f"Error initializing Azure client: {e}")
             self.client = None
@@ -45,24 +50,100 @@ class AzureCostCollector:
         Returns:
             pd.DataFrame: Processed cost data
         """
-        # In a real implementation, we would use the Azure Cost Management API
-        # to fetch actual billing data using the provided dates
+        if self.client and start_date and end_date:
+            try:
+                return self._query_cost_data(start_date, end_date, granularity)
+            except Exception as e:
+                # Return no rows rather than sample data, which callers
+                # would take for, and store as, live costs
+                print(f"Error fetching Azure cost data: {e}")
+                return format_cost_data(pd.DataFrame(columns=_COST_DATA_COLUMNS))
+        
+        # Without a client fall back to sample data
+        # Build column-wise; the scalar currency and provider broadcast
+        df = pd.DataFrame({
+            'date': ['2023-05-01', '2023-05-01', '2023-05-01', '2023-06-01', '2023-06-01', '2023-06-01'],
+            'service': ['Virtual Machines', 'Storage', 'Azure SQL', 'Virtual Machines', 'Storage', 'Azure SQL'],
+            'amount': [145.75, 38.20, 95.50, 152.30, 41.15, 98.75],
+            'currency': 'USD',
+            'provider': 'Azure'
+        }).astype({'service': 'category', 'currency': 'category', 'provider': 'category'})
+        return format_cost_data(df)
+    
+    def _query_cost_data(self, start_date, end_date, granularity):
+        """
+        Run a Cost Management usage query, following next_link across pages.
+        
+        Args:
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            granularity (str): Time granularity ('Daily' or 'Monthly')
+            
+        Returns:
+            pd.DataFrame: Processed cost data
+        """
+        from azure.mgmt.costmanagement.models import (
+            QueryAggregation, QueryDataset, QueryDefinition, QueryGrouping, QueryTimePeriod
+        )
         
-        # For now, return sample data
-        data = [
-            {'date': '2023-05-01', 'service': 'Virtual Machines', 'amount': 145.75, 'currency': 'USD'},
-            {'date': '2023-05-01', 'service': 'Storage', 'amount': 38.20, 'currency': 'USD'},
-            {'date': '2023-05-01', 'service': 'Azure SQL', 'amount': 95.50, 'currency': 'USD'},
-            {'date': '2023-06-01', 'service': 'Virtual Machines', 'amount': 152.30, 'currency': 'USD'},
-            {'date': '2023-06-01', 'service': 'Storage', 'amount': 41.15, 'currency': 'USD'},
-            {'date': '2023-06-01', 'service': 'Azure SQL', 'amount': 98.75, 'currency': 'USD'},
-        ]
+        scope = f'/subscriptions/{self.subscription_id}'
+        query_definition = QueryDefinition(
+            type='ActualCost',
+            timeframe='Custom',
+            # The serializer silently drops strings for these datetime fields
+            time_period=QueryTimePeriod(
+                from_property=pd.Timestamp(start_date).to_pydatetime(),
+                to=pd.Timestamp(end_date).to_pydatetime()
+            ),
+            dataset=QueryDataset(
+                granularity=granularity,
+                aggregation={'totalCost': QueryAggregation(name=COST_COLUMN, function='Sum')},
+                grouping=[QueryGrouping(type='Dimension', name='ServiceName')]
+            )
+        )
         
-        # Add provider information
-        for item in data:
-            item['provider'] = 'Azure'
+        # A Custom timeframe without both bounds is rejected by the API
+        time_period = query_definition.serialize().get('timePeriod', {})
+        if 'from' not in time_period or 'to' not in time_period:
+            raise ValueError(f"Azure query time period is incomplete: {time_period}")
+        
+        # The SDK stops at the first page (1000 rows), so re-issue the query
+        # with the skip token from next_link until there are no more pages
+        rows = []
+        params = {}
+        while True:
+            response = self.client.query.usage(scope, query_definition, params=params)
+            rows.extend(response.rows)
             
-        df = pd.DataFrame(data)
+            if not response.next_link:
+                break
+            skip_token = parse_qs(urlparse(response.next_link).query).get('$skiptoken')
+            if not skip_token:
+                break
+            params = {'$skiptoken': skip_token[0]}
+        
+        # Build the frame column-wise from the column metadata
+        column_names = [column.name for column in response.columns]
+        columns = dict(zip(column_names, zip(*rows))) if rows else dict.fromkeys(column_names, ())
+        date_column = 'UsageDate' if 'UsageDate' in columns else 'BillingMonth'
+        
+        # The summed cost column is named after its source column; failing
+        # that, it is the Number column other than the date
+        amount_column = COST_COLUMN if COST_COLUMN in columns else next(
+            (column.name for column in response.columns
+             if column.type == 'Number' and column.name != date_column),
+            None
+        )
+        if amount_column is None:
+            raise ValueError(f"No cost column in Azure query result columns {column_names}")
+        
+        df = pd.DataFrame({
+            'date': pd.to_datetime(pd.Series(columns.get(date_column, ()), dtype=str), format='mixed'),
+            'service': columns.get('ServiceName', ()),
+            'amount': pd.Series(columns[amount_column], dtype='float64'),
+            'currency': columns.get('Currency', ()),
+            'provider': 'Azure'
+        }).astype({'service': 'category', 'currency': 'category', 'provider': 'category'})
         return format_cost_data(df)
     
     def get_idle_resources(self):
@@ -79,7 +160,7 @@ class AzureCostCollector:
         # - Idle SQL databases
         
         # Return placeholder data
-        return pd.DataFrame({
+        return format_idle_resources(pd.DataFrame({
             'resource_id': ['/subscriptions/sub-id/resourceGroups/rg1/providers/Microsoft.Compute/virtualMachines/vm1', 
                            '/subscriptions/sub-id/resourceGroups/rg1/providers/Microsoft.Compute/disks/disk1'],
             'resource_type': ['Virtual Machine', 'Managed Disk'],
@@ -88,4 +169,4 @@ class AzureCostCollector:
             'reason': ['Low CPU utilization (<5% for 7 days)', 'Unattached for 14 days'],
             'recommendation': ['Consider downsizing or terminating', 'Delete if not needed'],
             'provider': ['Azure', 'Azure']
-        })
\ No newline at end of file
+        }))
\ No newline at end of file
@@ -7,12 +7,9 @@ import os
 import pandas as pd
 from google.cloud import billing
 from google.cloud.billing import CloudCatalogClient, CloudBillingClient
-import sys
 
-# Add project root to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from config import GCP_PROJECT_ID, GCP_BILLING_ACCOUNT, GCP_CREDENTIALS_PATH
-from src.utils.helpers import format_cost_data
+from ..utils.helpers import format_cost_data, format_idle_resources
 
 class GCPCostCollector:
     """Collects and processes GCP billing data."""
@@ -59,20 +56,14 @@ class GCPCostCollector:
         # to fetch actual billing data using the provided dates and billing account
         
         # For now, return sample data
-        data = [
-            {'date': '2023-05-01', 'service': 'Compute Engine', 'amount': 125.45, 'currency': 'USD'},
-            {'date': '2023-05-01', 'service': 'Cloud Storage', 'amount': 42.10, 'currency': 'USD'},
-            {'date': '2023-05-01', 'service': 'BigQuery', 'amount': 78.32, 'currency': 'USD'},
-            {'date': '2023-06-01', 'service': 'Compute Engine', 'amount': 131.87, 'currency': 'USD'},
-            {'date': '2023-06-01', 'service': 'Cloud Storage', 'amount': 45.22, 'currency': 'USD'},
-            {'date': '2023-06-01', 'service': 'BigQuery', 'amount': 82.15, 'currency': 'USD'},
-        ]
-        
-        # Add provider information
-        for item in data:
-            item['provider'] = 'GCP'
-            
-        df = pd.DataFrame(data)
+        # Build column-wise; the scalar currency and provider broadcast
+        df = pd.DataFrame({
+            'date': ['2023-05-01', '2023-05-01', '2023-05-01', '2023-06-01', '2023-06-01', '2023-06-01'],
+            'service': ['Compute Engine', 'Cloud Storage', 'BigQuery', 'Compute Engine', 'Cloud Storage', 'BigQuery'],
+            'amount': [125.45, 42.10, 78.32, 131.87, 45.22, 82.15],
+            'currency': 'USD',
+            'provider': 'GCP'
+        }).astype({'service': 'category', 'currency': 'category', 'provider': 'category'})
         return format_cost_data(df)
     
     def get_idle_resources(self, project_id=None):
@@ -94,7 +85,7 @@ class GCPCostCollector:
         # - Underutilized Cloud SQL instances
         
         # Return placeholder data
-        return pd.DataFrame({
+        return format_idle_resources(pd.DataFrame({
             'resource_id': ['instance-1', 'disk-1'],
             'resource_type': ['GCE VM', 'Persistent Disk'],
             'region': ['us-central1', 'us-central1'],
@@ -102,4 +93,4 @@ class GCPCostCollector:
             'reason': ['Low CPU utilization (<5% for 7 days)', 'Unattached for 14 days'],
             'recommendation': ['Consider downsizing or terminating', 'Delete if not needed'],
             'provider': ['GCP', 'GCP']
-        })
\ No newline at end of file
+        }))
\ No newline at end of file
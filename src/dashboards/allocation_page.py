@@ -10,23 +10,111 @@ import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from src.utils.db import get_cost_data, get_cost_allocations, store_cost_allocation
+from src.utils.db import get_cost_data, get_service_cost_series, get_cost_allocations, get_cost_allocation_totals, store_cost_allocation
+
+# Streamlit reruns the page on every widget change; cache the DB reads,
+# keyed on date strings so hashing the arguments stays cheap
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_cost_allocations(start_date=None, end_date=None):
+    """Cached get_cost_allocations for a date range."""
+    return get_cost_allocations(start_date=start_date, end_date=end_date)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_allocation_totals(start_date=None, end_date=None):
+    """
+    Cached allocated cost per business unit, project, environment and provider.
+    
+    The charts roll up this small aggregate, so only one row per group is
+    read from the database rather than every allocation.
+    """
+    dimensions = ['business_unit', 'project', 'environment', 'provider']
+    totals = get_cost_allocation_totals(dimensions, start_date=start_date, end_date=end_date)
+    return totals.astype({col: 'category' for col in dimensions})
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_service_costs(start_date=None, end_date=None):
+    """Cached get_service_cost_series for a date range."""
+    return get_service_cost_series(start_date=start_date, end_date=end_date)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_cost_lookup():
+    """
+    Cached cost totals for the allocation form.
+    
+    Returns:
+        pd.Series: Total cost indexed by (date string, provider, service)
+    """
+    cost_data = get_cost_data(columns=['date', 'provider', 'service', 'cost'])
+    
+    if cost_data.empty:
+        return pd.Series(dtype='float64')
+    
+    # get_cost_data already parses dates, so only the distinct dates need
+    # formatting; the rows share them through categorical codes
+    codes, unique_dates = pd.factorize(cost_data['date'], sort=True)
+    date_str = pd.Categorical.from_codes(codes, unique_dates.strftime('%Y-%m-%d'))
+    
+    # Sorted categoricals give the form its option lists straight from
+    # the categories, without separate unique() and sorted() passes
+    return (
+        cost_data.assign(
+            date_str=date_str,
+            provider=pd.Categorical(cost_data['provider'], ordered=True),
+            service=pd.Categorical(cost_data['service'], ordered=True)
+        )
+        .groupby(['date_str', 'provider', 'service'], observed=True)['cost'].sum()
+    )
+
+def _clear_cached_data():
+    """Drop cached DB reads so the next render queries the database."""
+    _cached_cost_allocations.clear()
+    _cached_allocation_totals.clear()
+    _cached_service_costs.clear()
+    _cached_cost_lookup.clear()
+
+# Largest categories shown individually in a chart; the rest become 'Other'
+CHART_TOP_N = 20
+
+def _top_n_with_other(costs, label_column, n=CHART_TOP_N):
+    """
+    Keep the n largest rows of a cost rollup and sum the rest into 'Other'.
+    
+    Long tails (e.g. hundreds of services) make charts unreadable and
+    inflate the figure JSON sent to the browser.
+    
+    Args:
+        costs (pd.DataFrame): Rollup with label_column and 'cost' columns
+        label_column (str): Column holding the category labels
+        n (int, optional): Number of rows to keep. Defaults to CHART_TOP_N.
+        
+    Returns:
+        pd.DataFrame: At most n + 1 rows, sorted by cost descending
+    """
+    costs = costs.sort_values('cost', ascending=False)
+    
+    if len(costs) <= n:
+        return costs
+    
+    other = pd.DataFrame({label_column: ['Other'], 'cost': [costs['cost'].iloc[n:].sum()]})
+    return pd.concat([costs.head(n).astype({label_column: 'object'}), other], ignore_index=True)
 
 def render_allocation_page():
     """Render the cost allocation page."""
     st.title("Cost Allocation")
     
-    # Create tabs
-    tab1, tab2, tab3 = st.tabs(["Cost Distribution", "Manage Allocations", "Tag Compliance"])
+    if st.button("Refresh", key="allocation_refresh"):
+        _clear_cached_data()
     
-    with tab1:
-        render_cost_distribution()
-        
-    with tab2:
-        render_manage_allocations()
-        
-    with tab3:
-        render_tag_compliance()
+    # Only the selected view runs; st.tabs would render (and query) every
+    # tab on each rerun
+    views = {
+        "Cost Distribution": render_cost_distribution,
+        "Manage Allocations": render_manage_allocations,
+        "Tag Compliance": render_tag_compliance
+    }
+    view = st.radio("View", list(views), horizontal=True, label_visibility="collapsed", key="allocation_view")
+    
+    views[view]()
 
 def render_cost_distribution():
     """Render cost distribution section."""
@@ -47,15 +135,15 @@ def render_cost_distribution():
             value=datetime.date.today()
         )
     
-    # Get cost allocations from database
-    allocations = get_cost_allocations(
+    # Get allocated cost totals from database
+    allocations = _cached_allocation_totals(
         start_date=start_date.strftime('%Y-%m-%d'),
         end_date=end_date.strftime('%Y-%m-%d')
     )
     
     if allocations.empty:
         # If no allocations, check if we have cost data
-        cost_data = get_cost_data(
+        cost_data = _cached_service_costs(
             start_date=start_date.strftime('%Y-%m-%d'),
             end_date=end_date.strftime('%Y-%m-%d')
         )
@@ -67,29 +155,28 @@ def render_cost_distribution():
             st.warning("No cost allocations defined. Please allocate costs in the 'Manage Allocations' tab.")
             
             # Show unallocated costs
-            cost_column = 'cost' if 'cost' in cost_data.columns else 'amount'
             
             # By provider
-            provider_costs = cost_data.groupby('provider')[cost_column].sum().reset_index()
+            provider_costs = cost_data.groupby('provider', as_index=False, observed=True)['cost'].sum()
             
             fig = px.pie(
                 provider_costs,
-                values=cost_column,
+                values='cost',
                 names='provider',
                 title='Unallocated Costs by Provider'
             )
             st.plotly_chart(fig, use_container_width=True)
             
             # By service
-            service_costs = cost_data.groupby('service')[cost_column].sum().reset_index()
-            service_costs = service_costs.sort_values(cost_column, ascending=False)
+            service_costs = cost_data.groupby('service', as_index=False, observed=True)['cost'].sum()
+            service_costs = _top_n_with_other(service_costs, 'service')
             
             fig = px.bar(
                 service_costs,
                 x='service',
-                y=cost_column,
+                y='cost',
                 title='Unallocated Costs by Service',
-                labels={cost_column: 'Cost ($)', 'service': 'Service'}
+                labels={'cost': 'Cost ($)', 'service': 'Service'}
             )
             st.plotly_chart(fig, use_container_width=True)
             
@@ -99,8 +186,8 @@ def render_cost_distribution():
     
     # By business unit
     if 'business_unit' in allocations.columns:
-        bu_costs = allocations.groupby('business_unit')['cost'].sum().reset_index()
-        bu_costs = bu_costs.sort_values('cost', ascending=False)
+        bu_costs = allocations.groupby('business_unit', as_index=False, observed=True)['cost'].sum()
+        bu_costs = _top_n_with_other(bu_costs, 'business_unit')
         
         fig = px.pie(
             bu_costs,
@@ -112,8 +199,8 @@ def render_cost_distribution():
     
     # By project
     if 'project' in allocations.columns:
-        project_costs = allocations.groupby('project')['cost'].sum().reset_index()
-        project_costs = project_costs.sort_values('cost', ascending=False)
+        project_costs = allocations.groupby('project', as_index=False, observed=True)['cost'].sum()
+        project_costs = _top_n_with_other(project_costs, 'project')
         
         fig = px.bar(
             project_costs,
@@ -126,7 +213,8 @@ def render_cost_distribution():
     
     # By environment
     if 'environment' in allocations.columns:
-        env_costs = allocations.groupby('environment')['cost'].sum().reset_index()
+        env_costs = allocations.groupby('environment', as_index=False, observed=True)['cost'].sum()
+        env_costs = _top_n_with_other(env_costs, 'environment')
         
         fig = px.pie(
             env_costs,
@@ -138,7 +226,7 @@ def render_cost_distribution():
     
     # By provider and business unit
     if 'business_unit' in allocations.columns and 'provider' in allocations.columns:
-        provider_bu_costs = allocations.groupby(['provider', 'business_unit'])['cost'].sum().reset_index()
+        provider_bu_costs = allocations.groupby(['provider', 'business_unit'], as_index=False, observed=True)['cost'].sum()
         
         fig = px.bar(
             provider_bu_costs,
@@ -154,21 +242,17 @@ def render_manage_allocations():
     """Render manage allocations section."""
     st.subheader("Manage Cost Allocations")
     
-    # Get cost data
-    cost_data = get_cost_data()
+    # Get cost totals per date, provider and service
+    cost_lookup = _cached_cost_lookup()
     
-    if cost_data.empty:
+    if cost_lookup.empty:
         st.info("No cost data available. Please collect cost data first.")
         return
     
-    # Ensure date is datetime
-    if 'date' in cost_data.columns and not pd.api.types.is_datetime64_any_dtype(cost_data['date']):
-        cost_data['date'] = pd.to_datetime(cost_data['date'])
-    
-    # Get unique dates, providers, and services
-    dates = sorted(cost_data['date'].dt.strftime('%Y-%m-%d').unique())
-    providers = sorted(cost_data['provider'].unique())
-    services = sorted(cost_data['service'].unique())
+    # Get unique dates, providers, and services (sorted categories)
+    dates = cost_lookup.index.levels[0].categories.tolist()
+    providers = cost_lookup.index.levels[1].categories.tolist()
+    services = cost_lookup.index.levels[2].categories.tolist()
     
     # Form for adding cost allocation
     with st.form("allocation_form"):
@@ -183,15 +267,8 @@ def render_manage_allocations():
         with col2:
             service = st.selectbox("Service", services)
             
-            # Filter cost data to get the amount
-            filtered_data = cost_data[
-                (cost_data['date'].dt.strftime('%Y-%m-%d') == date) & 
-                (cost_data['provider'] == provider) & 
-                (cost_data['service'] == service)
-            ]
-            
-            cost_column = 'cost' if 'cost' in filtered_data.columns else 'amount'
-            amount = filtered_data[cost_column].sum() if not filtered_data.empty else 0
+            # Look up the amount for the selection
+            amount = float(cost_lookup.get((date, provider, service), 0.0))
             
             st.write(f"Cost: ${amount:.2f}")
         
@@ -231,6 +308,7 @@ def render_manage_allocations():
                 )
                 
                 if allocation_id:
+                    _clear_cached_data()
                     st.success(f"Cost allocation added for {service} on {date}")
                 else:
                     st.error("Failed to add cost allocation")
@@ -240,7 +318,7 @@ def render_manage_allocations():
     # Display existing allocations
     st.subheader("Existing Allocations")
     
-    allocations = get_cost_allocations()
+    allocations = _cached_cost_allocations()
     
     if allocations.empty:
         st.info("No cost allocations defined yet.")
@@ -281,13 +359,17 @@ def render_tag_compliance():
     
     compliance_df = pd.DataFrame(compliance_data)
     
-    # Display overall compliance
-    overall_compliance = compliance_df['compliance'].mean()
+    # Display overall compliance, weighted by resource count rather than
+    # averaging per-type percentages
+    overall_compliance = 100 * compliance_df['tagged'].sum() / compliance_df['total'].sum()
     
     st.metric("Overall Tag Compliance", f"{overall_compliance:.1f}%")
     
     # Display compliance by provider
-    provider_compliance = compliance_df.groupby('provider')['compliance'].mean().reset_index()
+    provider_compliance = (
+        compliance_df.groupby('provider', as_index=False, observed=True)[['tagged', 'total']].sum()
+        .assign(compliance=lambda d: 100 * d['tagged'] / d['total'])
+    )
     
     fig = px.bar(
         provider_compliance,
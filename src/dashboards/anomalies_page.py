@@ -3,167 +3,236 @@ Anomalies page for the CloudCostAI dashboard.
 """
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import datetime
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from src.utils.db import get_anomalies, update_anomaly_status, get_cost_data
+from src.utils.db import (
+    get_anomalies, update_anomaly_status, store_anomalies, get_daily_cost_series,
+    get_anomaly_daily_counts, get_anomaly_status_counts, get_anomaly_service_counts
+)
 from src.analyzers.anomaly_detection import AnomalyDetector
+from src.utils.helpers import downsample_min_max
+
+# Display color of anomaly severities
+SEVERITY_COLORS = {'High': 'red', 'Medium': 'orange', 'Low': 'blue'}
+
+# Statuses an anomaly can be set to
+ANOMALY_STATUSES = ['Open', 'Resolved', 'Ignored']
+
+# Most points sent to the browser for one line of a chart
+CHART_MAX_POINTS = 1000
+
+# Streamlit reruns the page on every widget change and button press;
+# cache the DB reads and clear them after every write
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_anomalies(status=None, severity=None, provider=None):
+    """Cached get_anomalies."""
+    return get_anomalies(status=status, severity=severity, provider=provider)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_daily_costs(start_date=None, end_date=None, provider=None):
+    """Cached get_daily_cost_series."""
+    return get_daily_cost_series(start_date=start_date, end_date=end_date, provider=provider)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_anomaly_daily_counts():
+    """Cached get_anomaly_daily_counts."""
+    return get_anomaly_daily_counts()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_anomaly_status_counts():
+    """Cached get_anomaly_status_counts."""
+    return get_anomaly_status_counts()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_anomaly_service_counts():
+    """Cached get_anomaly_service_counts."""
+    return get_anomaly_service_counts()
+
+def _clear_anomaly_caches():
+    """Drop cached anomaly reads after the anomalies table changes."""
+    _cached_anomalies.clear()
+    _cached_anomaly_daily_counts.clear()
+    _cached_anomaly_status_counts.clear()
+    _cached_anomaly_service_counts.clear()
+
+@st.cache_resource(show_spinner=False)
+def _get_anomaly_detector():
+    """Anomaly detector shared across reruns and sessions."""
+    return AnomalyDetector()
 
 def render_anomalies_page():
     """Render the anomalies page."""
     st.title("Cost Anomaly Detection")
     
-    # Create tabs
-    tab1, tab2, tab3 = st.tabs(["Active Anomalies", "Detect Anomalies", "Historical Analysis"])
+    # Only the selected view runs; st.tabs would render (and query) every
+    # tab on each rerun
+    views = {
+        "Active Anomalies": render_active_anomalies,
+        "Detect Anomalies": render_detect_anomalies,
+        "Historical Analysis": render_historical_analysis
+    }
+    view = st.radio("View", list(views), horizontal=True, label_visibility="collapsed", key="anomalies_view")
     
-    with tab1:
-        render_active_anomalies()
-        
-    with tab2:
-        render_detect_anomalies()
-        
-    with tab3:
-        render_historical_analysis()
+    views[view]()
 
 def render_active_anomalies():
     """Render active anomalies section."""
     st.subheader("Active Anomalies")
     
-    # Filters
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        severity_filter = st.multiselect(
-            "Severity",
-            ["High", "Medium", "Low"],
-            default=["High", "Medium"]
-        )
+    # Filters; in a form, edits only rerun the page when applied, and the
+    # widgets keep returning the last applied values in between
+    with st.form("anomaly_filters"):
+        col1, col2 = st.columns(2)
         
-    with col2:
-        provider_filter = st.multiselect(
-            "Cloud Provider",
-            ["AWS", "GCP", "Azure"],
-            default=[]
-        )
+        with col1:
+            severity_filter = st.multiselect(
+                "Severity",
+                ["High", "Medium", "Low"],
+                default=["High", "Medium"]
+            )
+            
+        with col2:
+            provider_filter = st.multiselect(
+                "Cloud Provider",
+                ["AWS", "GCP", "Azure"],
+                default=[]
+            )
+        
+        st.form_submit_button("Apply Filters")
     
     # Get anomalies from database
-    anomalies = get_anomalies(
+    anomalies = _cached_anomalies(
         status="Open",
-        severity=severity_filter[0] if len(severity_filter) == 1 else None,
-        provider=provider_filter[0] if len(provider_filter) == 1 else None
+        severity=tuple(severity_filter) or None,
+        provider=tuple(provider_filter) or None
     )
     
     if anomalies.empty:
         st.info("No active anomalies found.")
         return
     
-    # Apply filters
-    if severity_filter:
-        anomalies = anomalies[anomalies['severity'].isin(severity_filter)]
+    # Sort by severity and date; get_anomalies orders severities most severe first
+    anomalies = anomalies.sort_values(['severity', 'date'], ascending=[True, False])
+    
+    # Statuses are changed in one editable table rather than through a set
+    # of buttons per anomaly, which Streamlit rebuilt on every rerun
+    status_table = anomalies[['id', 'severity', 'date', 'provider', 'service', 'cost', 'status']]
+    edited = st.data_editor(
+        status_table,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'date': st.column_config.DateColumn("Date"),
+            'cost': st.column_config.NumberColumn("Cost", format='$%.2f'),
+            'status': st.column_config.SelectboxColumn("Status", options=ANOMALY_STATUSES, required=True)
+        },
+        disabled=[column for column in status_table.columns if column != 'status'],
+        key="anomaly_status_editor"
+    )
+    
+    changed = edited[edited['status'] != status_table['status']]
+    if not changed.empty:
+        for anomaly_id, status in zip(changed['id'], changed['status']):
+            update_anomaly_status(int(anomaly_id), status)
+        _clear_anomaly_caches()
         
-    if provider_filter:
-        anomalies = anomalies[anomalies['provider'].isin(provider_filter)]
+        # The editor keeps its edits by row position; drop them, since the
+        # updated anomalies leave the list
+        del st.session_state["anomaly_status_editor"]
+        st.experimental_rerun()
+    
+    # Show the details of one anomaly at a time
+    labels = {
+        anomaly.id: f"{anomaly.severity} severity anomaly on {anomaly.date:%Y-%m-%d} - {anomaly.service or 'All services'}"
+        for anomaly in anomalies.itertuples(index=False)
+    }
+    selected_id = st.selectbox("Anomaly details", list(labels), format_func=labels.get)
     
-    # Sort by severity and date
-    severity_order = {'High': 0, 'Medium': 1, 'Low': 2}
-    anomalies['severity_order'] = anomalies['severity'].map(severity_order)
-    anomalies = anomalies.sort_values(['severity_order', 'date'], ascending=[True, False])
+    # get_anomalies always returns every column of the table
+    anomaly = next(anomalies[anomalies['id'] == selected_id].itertuples(index=False))
+    severity_color = SEVERITY_COLORS.get(anomaly.severity, 'gray')
     
-    # Display anomalies
-    for _, anomaly in anomalies.iterrows():
-        # Determine color based on severity
-        severity_color = {
-            'High': 'red',
-            'Medium': 'orange',
-            'Low': 'blue'
-        }.get(anomaly['severity'], 'gray')
+    with st.expander(labels[selected_id], expanded=True):
+        st.markdown(f"<h4 style='color: {severity_color};'>{anomaly.message}</h4>", unsafe_allow_html=True)
         
-        with st.expander(f"{anomaly['severity']} severity anomaly on {anomaly['date']} - {anomaly.get('service', 'All services')}"):
-            col1, col2 = st.columns([3, 1])
-            
-            with col1:
-                st.markdown(f"<h4 style='color: {severity_color};'>{anomaly['message']}</h4>", unsafe_allow_html=True)
-                st.write(f"**Cost:** ${anomaly['cost']:,.2f}")
-                st.write(f"**Change:** {anomaly['percentage_change']:.1f}% {anomaly['direction']}")
-                
-                if 'provider' in anomaly and anomaly['provider']:
-                    st.write(f"**Provider:** {anomaly['provider']}")
-                
-                if 'service' in anomaly and anomaly['service']:
-                    st.write(f"**Service:** {anomaly['service']}")
-                
-                # Possible causes
-                if 'possible_causes' in anomaly and anomaly['possible_causes']:
-                    st.write("**Possible Causes:**")
-                    for cause in anomaly['possible_causes']:
-                        st.write(f"- {cause}")
-                
-                # Recommended actions
-                if 'recommended_actions' in anomaly and anomaly['recommended_actions']:
-                    st.write("**Recommended Actions:**")
-                    for action in anomaly['recommended_actions']:
-                        st.write(f"- {action}")
-                
-            with col2:
-                # Action buttons
-                if st.button(f"Mark Resolved #{anomaly['id']}", key=f"resolve_{anomaly['id']}"):
-                    update_anomaly_status(anomaly['id'], 'Resolved')
-                    st.experimental_rerun()
-                    
-                if st.button(f"Ignore #{anomaly['id']}", key=f"ignore_{anomaly['id']}"):
-                    update_anomaly_status(anomaly['id'], 'Ignored')
-                    st.experimental_rerun()
+        # Send the details as one markdown element rather than one per line;
+        # '$' is escaped so that two amounts in one string don't render as LaTeX
+        parts = [
+            f"**Cost:** ${anomaly.cost:,.2f}",
+            f"**Change:** {anomaly.percentage_change:.1f}% {anomaly.direction}"
+        ]
+        
+        if anomaly.provider:
+            parts.append(f"**Provider:** {anomaly.provider}")
+        
+        if anomaly.service:
+            parts.append(f"**Service:** {anomaly.service}")
+        
+        # Possible causes
+        if anomaly.possible_causes:
+            parts.append("**Possible Causes:**\n" + "\n".join(f"- {cause}" for cause in anomaly.possible_causes))
+        
+        # Recommended actions
+        if anomaly.recommended_actions:
+            parts.append("**Recommended Actions:**\n" + "\n".join(f"- {action}" for action in anomaly.recommended_actions))
+        
+        st.markdown("\n\n".join(parts).replace("$", "\\$"))
 
 def render_detect_anomalies():
     """Render detect anomalies section."""
     st.subheader("Detect New Anomalies")
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        days = st.slider("Analysis Period (days)", 7, 90, 30)
+    # Settings are collected in a form so adjusting them doesn't rerun the page
+    with st.form("detect_anomalies"):
+        col1, col2 = st.columns(2)
         
-    with col2:
-        providers = st.multiselect(
-            "Cloud Providers",
-            ["AWS", "GCP", "Azure"],
-            default=["AWS", "GCP", "Azure"]
+        with col1:
+            days = st.slider("Analysis Period (days)", 7, 90, 30)
+            
+        with col2:
+            providers = st.multiselect(
+                "Cloud Providers",
+                ["AWS", "GCP", "Azure"],
+                default=["AWS", "GCP", "Azure"]
+            )
+        
+        detection_type = st.radio(
+            "Detection Type",
+            ["Daily Total Cost", "Service-Level Cost"],
+            horizontal=True
         )
+        
+        submitted = st.form_submit_button("Detect Anomalies")
     
-    detection_type = st.radio(
-        "Detection Type",
-        ["Daily Total Cost", "Service-Level Cost"],
-        horizontal=True
-    )
-    
-    if st.button("Detect Anomalies"):
+    if submitted:
         with st.spinner("Analyzing cost patterns and detecting anomalies..."):
-            detector = AnomalyDetector()
-            
-            all_anomalies = []
+            detector = _get_anomaly_detector()
             
             if detection_type == "Daily Total Cost":
-                for provider in providers:
-                    anomalies = detector.detect_daily_anomalies(days=days, provider=provider)
-                    if not anomalies.empty:
-                        insights = detector.get_anomaly_insights(anomalies)
-                        all_anomalies.extend(insights)
+                detect = detector.detect_daily_anomalies
             else:  # Service-Level Cost
-                for provider in providers:
-                    anomalies = detector.detect_service_anomalies(days=days, provider=provider)
-                    if not anomalies.empty:
-                        insights = detector.get_anomaly_insights(anomalies)
-                        all_anomalies.extend(insights)
+                detect = detector.detect_service_anomalies
+            
+            # Each provider's detection waits mostly on the database, so run
+            # them concurrently; map() keeps the results in provider order
+            with ThreadPoolExecutor(max_workers=max(len(providers), 1)) as executor:
+                results = list(executor.map(lambda provider: detect(days=days, provider=provider), providers))
+            
+            all_anomalies = []
+            for anomalies in results:
+                if not anomalies.empty:
+                    all_anomalies.extend(detector.get_anomaly_insights(anomalies))
             
             if all_anomalies:
                 # Store in database
-                from src.utils.db import store_anomalies
                 store_anomalies(all_anomalies)
+                _clear_anomaly_caches()
                 
                 st.success(f"Detected {len(all_anomalies)} anomalies!")
                 st.experimental_rerun()
@@ -174,58 +243,43 @@ def render_historical_analysis():
     """Render historical analysis section."""
     st.subheader("Historical Anomaly Analysis")
     
-    # Get all anomalies from database
-    anomalies = get_anomalies()
+    # Only the per-day, per-status and per-service counts are needed here,
+    # so aggregate in the database rather than loading every anomaly
+    timeline = _cached_anomaly_daily_counts()
     
-    if anomalies.empty:
+    if timeline.empty:
         st.info("No historical anomaly data available.")
         return
     
-    # Ensure date is datetime
-    if 'date' in anomalies.columns and not pd.api.types.is_datetime64_any_dtype(anomalies['date']):
-        anomalies['date'] = pd.to_datetime(anomalies['date'])
-    
-    # Calculate statistics
-    total_anomalies = len(anomalies)
-    resolved = len(anomalies[anomalies['status'] == 'Resolved'])
-    ignored = len(anomalies[anomalies['status'] == 'Ignored'])
-    open_anomalies = len(anomalies[anomalies['status'] == 'Open'])
+    status_counts = _cached_anomaly_status_counts()
+    by_status = status_counts.set_index('status')['count']
     
     # Display metrics
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Total Anomalies", total_anomalies)
+        st.metric("Total Anomalies", int(timeline['count'].sum()))
         
     with col2:
-        st.metric("Resolved", resolved)
+        st.metric("Resolved", int(by_status.get('Resolved', 0)))
         
     with col3:
-        st.metric("Open", open_anomalies)
+        st.metric("Open", int(by_status.get('Open', 0)))
     
     # Create timeline of anomalies
-    if not anomalies.empty:
-        # Group by date and count
-        timeline = anomalies.groupby('date').size().reset_index()
-        timeline.columns = ['date', 'count']
-        
-        # Get cost data for comparison
-        start_date = anomalies['date'].min()
-        end_date = anomalies['date'].max()
+    if not timeline.empty:
+        # Get daily cost totals for comparison, summed in the database
+        start_date = timeline['date'].min()
+        end_date = timeline['date'].max()
         
-        cost_data = get_cost_data(
+        daily_costs = _cached_daily_costs(
             start_date=start_date.strftime('%Y-%m-%d'),
             end_date=end_date.strftime('%Y-%m-%d')
         )
         
-        if not cost_data.empty:
-            # Ensure date is datetime
-            if 'date' in cost_data.columns and not pd.api.types.is_datetime64_any_dtype(cost_data['date']):
-                cost_data['date'] = pd.to_datetime(cost_data['date'])
-            
-            # Group by date
-            cost_column = 'cost' if 'cost' in cost_data.columns else 'amount'
-            daily_costs = cost_data.groupby('date')[cost_column].sum().reset_index()
+        if not daily_costs.empty:
+            # A long history would otherwise send every day to the browser
+            daily_costs = downsample_min_max(daily_costs, 'cost', CHART_MAX_POINTS)
             
             # Create dual-axis chart
             fig = go.Figure()
@@ -233,7 +287,7 @@ def render_historical_analysis():
             # Add cost line
             fig.add_trace(go.Scatter(
                 x=daily_costs['date'],
-                y=daily_costs[cost_column],
+                y=daily_costs['cost'],
                 name='Daily Cost',
                 line=dict(color='blue', width=2)
             ))
@@ -274,16 +328,15 @@ def render_historical_analysis():
             
             st.plotly_chart(fig, use_container_width=True)
         
-        # Create pie chart for anomaly status
-        status_counts = anomalies['status'].value_counts().reset_index()
-        status_counts.columns = ['Status', 'Count']
-        
+        # Create pie chart for anomaly status; labels renames the columns
+        # for display without copying the frame
         fig = px.pie(
             status_counts,
-            values='Count',
-            names='Status',
+            values='count',
+            names='status',
             title='Anomaly Status Distribution',
-            color='Status',
+            color='status',
+            labels={'status': 'Status', 'count': 'Count'},
             color_discrete_map={
                 'Open': 'red',
                 'Resolved': 'green',
@@ -293,17 +346,15 @@ def render_historical_analysis():
         st.plotly_chart(fig, use_container_width=True)
         
         # Create bar chart for anomalies by service
-        if 'service' in anomalies.columns:
-            service_counts = anomalies.groupby('service').size().reset_index()
-            service_counts.columns = ['Service', 'Count']
-            service_counts = service_counts.sort_values('Count', ascending=False)
-            
+        service_counts = _cached_anomaly_service_counts()
+        if not service_counts.empty:
             fig = px.bar(
                 service_counts,
-                x='Service',
-                y='Count',
+                x='service',
+                y='count',
                 title='Anomalies by Service',
-                color='Count',
+                color='count',
+                labels={'service': 'Service', 'count': 'Count'},
                 color_continuous_scale='Reds'
             )
             st.plotly_chart(fig, use_container_width=True)
@@ -10,31 +10,99 @@ import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from src.utils.db import get_budgets, create_budget, get_budget_alerts, get_cost_data
+from src.utils.db import get_budgets, create_budget, get_budget_alerts, get_service_cost_series
 from src.analyzers.budget_alerts import BudgetAlert
 
+# Streamlit reruns the page on every widget change; cache the DB reads and
+# clear them after every write
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_budgets():
+    """Cached get_budgets."""
+    return get_budgets()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_budget_alerts():
+    """Cached get_budget_alerts."""
+    return get_budget_alerts()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_service_costs(start_date=None, end_date=None, provider=None):
+    """Cached get_service_cost_series."""
+    return get_service_cost_series(start_date=start_date, end_date=end_date, provider=provider)
+
+# Pandas period frequency and display name format of each budget period
+_BUDGET_PERIODS = {
+    'monthly': ('M', '%B %Y'),
+    'quarterly': ('Q', 'Q%q %Y'),
+    'yearly': ('Y', '%Y')
+}
+
+def _period_bounds(period, now):
+    """
+    Get the start date and display name of the budget period containing now.
+    
+    Args:
+        period (str): Budget period ('monthly', 'quarterly' or 'yearly')
+        now (datetime.datetime): Current date and time
+        
+    Returns:
+        tuple: (start date, period name), or None for an unknown period
+    """
+    if period not in _BUDGET_PERIODS:
+        return None
+    
+    freq, name_format = _BUDGET_PERIODS[period]
+    current = pd.Period(now, freq=freq)
+    return current.start_time.date(), current.strftime(name_format)
+
+def _sum_costs(daily_costs, provider, service, start_date, end_date):
+    """
+    Total the cost of one budget's scope from the pre-aggregated costs.
+    
+    Args:
+        daily_costs (pd.Series): Cost indexed by sorted (provider, service, date)
+        provider (str): Provider filter, or None for all providers
+        service (str): Service filter, or None for all services
+        start_date (datetime.date): First day of the budget period
+        end_date (datetime.date): Last day of the budget period
+        
+    Returns:
+        float: Total cost
+    """
+    if daily_costs.empty:
+        return 0.0
+    
+    key = (
+        provider or slice(None),
+        service or slice(None),
+        slice(pd.Timestamp(start_date), pd.Timestamp(end_date))
+    )
+    try:
+        return float(daily_costs.loc[key].sum())
+    except KeyError:
+        return 0.0
+
 def render_budget_page():
     """Render the budget management page."""
     st.title("Budget Management")
     
-    # Create tabs
-    tab1, tab2, tab3 = st.tabs(["Budget Overview", "Create Budget", "Alert History"])
+    # Only the selected view runs; st.tabs would render (and query) every
+    # tab on each rerun
+    views = {
+        "Budget Overview": render_budget_overview,
+        "Create Budget": render_create_budget,
+        "Alert History": render_alert_history
+    }
+    view = st.radio("View", list(views), horizontal=True, label_visibility="collapsed", key="budget_view")
     
-    with tab1:
-        render_budget_overview()
-        
-    with tab2:
-        render_create_budget()
-        
-    with tab3:
-        render_alert_history()
+    views[view]()
 
 def render_budget_overview():
     """Render the budget overview section."""
     st.subheader("Budget Overview")
     
     # Get budgets from database
-    budgets_df = get_budgets()
+    budgets_df = _cached_budgets()
     
     if budgets_df.empty:
         st.info("No budgets defined yet. Create a budget to get started.")
@@ -42,65 +110,56 @@ def render_budget_overview():
     
     # Get current date
     now = datetime.datetime.now()
+    end_date = now.date()
+    
+    # Each distinct period's start date and label, computed once
+    periods = {
+        period: _period_bounds(period, now)
+        for period in budgets_df['period'].unique()
+    }
+    start_dates = [bounds[0] for bounds in periods.values() if bounds]
+    
+    # Fetch the cost data for the widest budget period once, rather than
+    # once per budget, already summed by day, provider and service in the
+    # database. groupby sorts the index, which lets each budget take its
+    # total with a range lookup.
+    daily_costs = pd.Series(dtype='float64')
+    if start_dates:
+        cost_data = _cached_service_costs(
+            start_date=min(start_dates).strftime('%Y-%m-%d'),
+            end_date=end_date.strftime('%Y-%m-%d')
+        )
+        if not cost_data.empty:
+            daily_costs = cost_data.groupby(['provider', 'service', 'date'])['cost'].sum()
     
     # Create a list to store budget status
     budget_status = []
     
-    for _, budget in budgets_df.iterrows():
-        # Determine date range based on period
-        if budget['period'] == 'monthly':
-            start_date = datetime.date(now.year, now.month, 1)
-            period_name = f"{now.strftime('%B %Y')}"
-        elif budget['period'] == 'quarterly':
-            quarter = (now.month - 1) // 3 + 1
-            quarter_month = ((now.month - 1) // 3) * 3 + 1
-            start_date = datetime.date(now.year, quarter_month, 1)
-            period_name = f"Q{quarter} {now.year}"
-        elif budget['period'] == 'yearly':
-            start_date = datetime.date(now.year, 1, 1)
-            period_name = f"{now.year}"
-        else:
+    for budget in budgets_df.itertuples(index=False):
+        bounds = periods[budget.period]
+        if bounds is None:
             continue
-            
-        end_date = now.date()
+        start_date, period_name = bounds
         
-        # Get cost data for the period
-        cost_data = get_cost_data(
-            start_date=start_date.strftime('%Y-%m-%d'),
-            end_date=end_date.strftime('%Y-%m-%d'),
-            provider=budget['provider']
-        )
-        
-        if cost_data.empty:
-            actual_cost = 0
-        else:
-            # Filter by service if specified
-            if budget['service']:
-                cost_data = cost_data[cost_data['service'] == budget['service']]
-                
-            # Calculate total cost
-            cost_column = 'cost' if 'cost' in cost_data.columns else 'amount'
-            actual_cost = cost_data[cost_column].sum()
+        actual_cost = _sum_costs(daily_costs, budget.provider, budget.service, start_date, end_date)
         
         # Calculate percentage of budget used
-        percentage = (actual_cost / budget['amount']) * 100
+        percentage = (actual_cost / budget.amount) * 100
         
         # Add to budget status list
         budget_status.append({
-            'name': budget['name'],
+            'name': budget.name,
             'period': period_name,
-            'budget': budget['amount'],
+            'budget': budget.amount,
             'actual': actual_cost,
             'percentage': percentage,
-            'provider': budget['provider'] or 'All',
-            'service': budget['service'] or 'All'
+            'provider': budget.provider or 'All',
+            'service': budget.service or 'All'
         })
     
-    # Convert to DataFrame
-    status_df = pd.DataFrame(budget_status)
-    
-    # Display budget status
-    for _, status in status_df.iterrows():
+    # Display budget status straight from the list; a DataFrame is only
+    # built for the chart
+    for status in budget_status:
         col1, col2 = st.columns([3, 1])
         
         with col1:
@@ -127,7 +186,7 @@ def render_budget_overview():
     
     # Create bar chart comparing budget vs actual
     fig = px.bar(
-        status_df,
+        pd.DataFrame(budget_status),
         x='name',
         y=['budget', 'actual'],
         barmode='group',
@@ -168,6 +227,7 @@ def render_create_budget():
                 budget_id = create_budget(name, amount, period, provider, service)
                 
                 if budget_id:
+                    _cached_budgets.clear()
                     st.success(f"Budget '{name}' created successfully")
                 else:
                     st.error("Failed to create budget")
@@ -177,30 +237,34 @@ def render_alert_history():
     st.subheader("Alert History")
     
     # Get alerts from database
-    alerts_df = get_budget_alerts()
+    alerts_df = _cached_budget_alerts()
     
     if alerts_df.empty:
         st.info("No budget alerts yet.")
         return
     
     # Get budget information
-    budgets_df = get_budgets()
+    budgets_df = _cached_budgets()
     
     # Merge alerts with budget information
     if not budgets_df.empty:
-        merged_df = pd.merge(alerts_df, budgets_df, left_on='budget_id', right_on='id', suffixes=('', '_budget'))
-        
-        # Format for display
-        display_df = merged_df[['name', 'actual_cost', 'amount', 'percentage', 'alert_date', 'notified']].copy()
+        # Attach each alert's budget name and amount; alerts of deleted
+        # budgets are dropped
+        display_df = alerts_df.join(
+            budgets_df.set_index('id')[['name', 'amount']], on='budget_id', how='inner'
+        )[['name', 'actual_cost', 'amount', 'percentage', 'alert_date', 'notified']]
         display_df.columns = ['Budget', 'Actual Cost', 'Budget Amount', 'Percentage', 'Alert Date', 'Notified']
         
-        # Format values
-        display_df['Actual Cost'] = display_df['Actual Cost'].map('${:,.2f}'.format)
-        display_df['Budget Amount'] = display_df['Budget Amount'].map('${:,.2f}'.format)
-        display_df['Percentage'] = display_df['Percentage'].map('{:.1f}%'.format)
-        
-        # Display alerts
-        st.dataframe(display_df, use_container_width=True)
+        # Display alerts; the columns stay numeric and are formatted by the table
+        st.dataframe(
+            display_df,
+            use_container_width=True,
+            column_config={
+                'Actual Cost': st.column_config.NumberColumn(format='$%.2f'),
+                'Budget Amount': st.column_config.NumberColumn(format='$%.2f'),
+                'Percentage': st.column_config.NumberColumn(format='%.1f%%')
+            }
+        )
     else:
         st.info("No budget information available.")
 
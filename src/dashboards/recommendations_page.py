@@ -8,109 +8,144 @@ import plotly.express as px
 import datetime
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from src.utils.db import get_recommendations, update_recommendation_status
+from src.utils.db import get_recommendations, update_recommendation_status, store_recommendations
 from src.analyzers.recommendation_engine import RecommendationEngine
 
+# Statuses a recommendation can be set to
+RECOMMENDATION_STATUSES = ['Open', 'Implemented', 'Rejected', 'Deferred']
+
+# Streamlit reruns the page on every widget change and button press;
+# cache the DB reads and clear them after every write
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_recommendations(status=None, provider=None):
+    """Cached get_recommendations."""
+    return get_recommendations(status=status, provider=provider)
+
+@st.cache_resource(show_spinner=False)
+def _get_recommendation_engine():
+    """Recommendation engine shared across reruns and sessions."""
+    return RecommendationEngine()
+
 def render_recommendations_page():
     """Render the recommendations page."""
     st.title("Cost Optimization Recommendations")
     
-    # Create tabs
-    tab1, tab2, tab3 = st.tabs(["All Recommendations", "Generate Recommendations", "Implementation Tracking"])
+    # Only the selected view runs; st.tabs would render (and query) every
+    # tab on each rerun
+    views = {
+        "All Recommendations": render_all_recommendations,
+        "Generate Recommendations": render_generate_recommendations,
+        "Implementation Tracking": render_implementation_tracking
+    }
+    view = st.radio("View", list(views), horizontal=True, label_visibility="collapsed", key="recommendations_view")
     
-    with tab1:
-        render_all_recommendations()
-        
-    with tab2:
-        render_generate_recommendations()
-        
-    with tab3:
-        render_implementation_tracking()
+    views[view]()
 
 def render_all_recommendations():
     """Render all recommendations section."""
     st.subheader("All Recommendations")
     
-    # Filters
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        status_filter = st.multiselect(
-            "Status",
-            ["Open", "Implemented", "Rejected", "Deferred"],
-            default=["Open"]
-        )
+    # Filters; in a form, edits only rerun the page when applied, and the
+    # widgets keep returning the last applied values in between
+    with st.form("recommendation_filters"):
+        col1, col2 = st.columns(2)
         
-    with col2:
-        provider_filter = st.multiselect(
-            "Cloud Provider",
-            ["AWS", "GCP", "Azure"],
-            default=[]
-        )
+        with col1:
+            status_filter = st.multiselect(
+                "Status",
+                RECOMMENDATION_STATUSES,
+                default=["Open"]
+            )
+            
+        with col2:
+            provider_filter = st.multiselect(
+                "Cloud Provider",
+                ["AWS", "GCP", "Azure"],
+                default=[]
+            )
+        
+        st.form_submit_button("Apply Filters")
     
     # Get recommendations from database
-    recommendations = get_recommendations(
-        status=status_filter[0] if len(status_filter) == 1 else None,
-        provider=provider_filter[0] if len(provider_filter) == 1 else None
+    recommendations = _cached_recommendations(
+        status=tuple(status_filter) or None,
+        provider=tuple(provider_filter) or None
     )
     
     if recommendations.empty:
         st.info("No recommendations found. Generate recommendations to get started.")
         return
     
-    # Apply filters
-    if status_filter:
-        recommendations = recommendations[recommendations['status'].isin(status_filter)]
-        
-    if provider_filter:
-        recommendations = recommendations[recommendations['provider'].isin(provider_filter)]
-    
     # Calculate total potential savings
     total_savings = recommendations['estimated_savings'].sum()
     st.metric("Total Potential Monthly Savings", f"${total_savings:,.2f}")
     
-    # Display recommendations
-    for _, rec in recommendations.iterrows():
-        with st.expander(f"{rec['recommendation_type']}: {rec['resource_type']} ({rec['provider']})"):
-            col1, col2, col3 = st.columns([2, 1, 1])
-            
-            with col1:
-                st.write(f"**Resource ID:** {rec['resource_id']}")
-                st.write(f"**Current:** {rec['current_config']}")
-                st.write(f"**Recommended:** {rec['recommended_config']}")
-                st.write(f"**Justification:** {rec['justification']}")
-                
-            with col2:
-                st.write(f"**Estimated Savings:** ${rec['estimated_savings']:,.2f}/month")
-                st.write(f"**Confidence:** {rec['confidence']}")
-                st.write(f"**Status:** {rec['status']}")
-                
-            with col3:
-                # Status update buttons
-                if rec['status'] == 'Open':
-                    if st.button(f"Mark Implemented #{rec['id']}", key=f"impl_{rec['id']}"):
-                        update_recommendation_status(rec['id'], 'Implemented')
-                        st.experimental_rerun()
-                        
-                    if st.button(f"Reject #{rec['id']}", key=f"rej_{rec['id']}"):
-                        update_recommendation_status(rec['id'], 'Rejected')
-                        st.experimental_rerun()
-                        
-                    if st.button(f"Defer #{rec['id']}", key=f"def_{rec['id']}"):
-                        update_recommendation_status(rec['id'], 'Deferred')
-                        st.experimental_rerun()
-                else:
-                    if st.button(f"Reopen #{rec['id']}", key=f"reopen_{rec['id']}"):
-                        update_recommendation_status(rec['id'], 'Open')
-                        st.experimental_rerun()
+    # Statuses are changed in one editable table rather than through a set
+    # of buttons per recommendation, which Streamlit rebuilt on every rerun
+    status_table = recommendations[[
+        'id', 'recommendation_type', 'resource_type', 'provider', 'estimated_savings', 'confidence', 'status'
+    ]]
+    edited = st.data_editor(
+        status_table,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'estimated_savings': st.column_config.NumberColumn("Estimated Savings", format='$%.2f'),
+            'status': st.column_config.SelectboxColumn("Status", options=RECOMMENDATION_STATUSES, required=True)
+        },
+        disabled=[column for column in status_table.columns if column != 'status'],
+        key="recommendation_status_editor"
+    )
+    
+    changed = edited[edited['status'] != status_table['status']]
+    if not changed.empty:
+        for rec_id, status in zip(changed['id'], changed['status']):
+            update_recommendation_status(int(rec_id), status)
+        _cached_recommendations.clear()
+        
+        # The editor keeps its edits by row position; drop them, since the
+        # updated recommendations may leave the filtered list
+        del st.session_state["recommendation_status_editor"]
+        st.experimental_rerun()
+    
+    # Show the details of one recommendation at a time
+    labels = {
+        rec.id: f"{rec.recommendation_type}: {rec.resource_type} ({rec.provider})"
+        for rec in recommendations.itertuples(index=False)
+    }
+    selected_id = st.selectbox("Recommendation details", list(labels), format_func=labels.get)
+    
+    # get_recommendations always returns every column of the table
+    rec = next(recommendations[recommendations['id'] == selected_id].itertuples(index=False))
+    
+    with st.expander(labels[selected_id], expanded=True):
+        # Each column's details go out as one markdown element rather than one
+        # per line; '$' is escaped so amounts never pair up into LaTeX
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            st.markdown("\n\n".join([
+                f"**Resource ID:** {rec.resource_id}",
+                f"**Current:** {rec.current_config}",
+                f"**Recommended:** {rec.recommended_config}",
+                f"**Justification:** {rec.justification}"
+            ]).replace("$", "\\$"))
             
-            # Implementation steps
-            if 'implementation_steps' in rec and rec['implementation_steps']:
-                st.write("**Implementation Steps:**")
-                for i, step in enumerate(rec['implementation_steps'], 1):
-                    st.write(f"{i}. {step}")
+        with col2:
+            st.markdown("\n\n".join([
+                f"**Estimated Savings:** ${rec.estimated_savings:,.2f}/month",
+                f"**Confidence:** {rec.confidence}",
+                f"**Status:** {rec.status}"
+            ]).replace("$", "\\$"))
+        
+        # Implementation steps
+        if rec.implementation_steps:
+            st.markdown("**Implementation Steps:**\n" + "\n".join(
+                f"{i}. {step}" for i, step in enumerate(rec.implementation_steps, 1)
+            ).replace("$", "\\$"))
 
 def render_generate_recommendations():
     """Render generate recommendations section."""
@@ -134,32 +169,33 @@ def render_generate_recommendations():
     
     if st.button("Generate Recommendations"):
         with st.spinner("Analyzing resources and generating recommendations..."):
-            engine = RecommendationEngine()
-            
-            all_recommendations = []
+            engine = _get_recommendation_engine()
             
-            if "Compute Rightsizing" in recommendation_types:
-                for provider in providers:
-                    compute_recs = engine.analyze_compute_usage(provider=provider)
-                    all_recommendations.extend(compute_recs)
+            analyzers = {
+                "Compute Rightsizing": engine.analyze_compute_usage,
+                "Storage Optimization": engine.analyze_storage_optimization,
+                "Reserved Instances/Savings Plans": engine.analyze_reserved_instance_opportunities
+            }
+            tasks = [
+                (analyzers[rec_type], provider)
+                for rec_type in analyzers if rec_type in recommendation_types
+                for provider in providers
+            ]
             
-            if "Storage Optimization" in recommendation_types:
-                for provider in providers:
-                    storage_recs = engine.analyze_storage_optimization(provider=provider)
-                    all_recommendations.extend(storage_recs)
-            
-            if "Reserved Instances/Savings Plans" in recommendation_types:
-                for provider in providers:
-                    ri_recs = engine.analyze_reserved_instance_opportunities(provider=provider)
-                    all_recommendations.extend(ri_recs)
+            # Every (type, provider) analysis is independent and mostly waits
+            # on the database, so run them all in one pool; map() keeps the
+            # results in the same order as the serial loops did
+            with ThreadPoolExecutor(max_workers=max(len(tasks), 1)) as executor:
+                results = executor.map(lambda task: task[0](provider=task[1]), tasks)
+                all_recommendations = [rec for recs in results for rec in recs]
             
             if all_recommendations:
                 # Convert to DataFrame
                 recommendations_df = pd.DataFrame(all_recommendations)
                 
                 # Store in database
-                from src.utils.db import store_recommendations
                 store_recommendations(recommendations_df)
+                _cached_recommendations.clear()
                 
                 st.success(f"Generated {len(all_recommendations)} recommendations!")
                 st.experimental_rerun()
@@ -171,22 +207,25 @@ def render_implementation_tracking():
     st.subheader("Implementation Tracking")
     
     # Get recommendations from database
-    recommendations = get_recommendations()
+    recommendations = _cached_recommendations()
     
     if recommendations.empty:
         st.info("No recommendations found.")
         return
     
+    # Count and sum savings per status in a single pass
+    by_status = recommendations.groupby('status')['estimated_savings'].agg(['size', 'sum'])
+    counts = by_status['size']
+    
     # Calculate statistics
     total_recommendations = len(recommendations)
-    implemented = len(recommendations[recommendations['status'] == 'Implemented'])
-    rejected = len(recommendations[recommendations['status'] == 'Rejected'])
-    deferred = len(recommendations[recommendations['status'] == 'Deferred'])
-    open_recs = len(recommendations[recommendations['status'] == 'Open'])
+    implemented = int(counts.get('Implemented', 0))
+    rejected = int(counts.get('Rejected', 0))
+    open_recs = int(counts.get('Open', 0))
     
     # Calculate potential and realized savings
     potential_savings = recommendations['estimated_savings'].sum()
-    realized_savings = recommendations[recommendations['status'] == 'Implemented']['estimated_savings'].sum()
+    realized_savings = by_status['sum'].get('Implemented', 0.0)
     
     # Display metrics
     col1, col2, col3 = st.columns(3)
@@ -203,16 +242,13 @@ def render_implementation_tracking():
         st.metric("Potential Monthly Savings", f"${potential_savings:,.2f}")
         st.metric("Realized Monthly Savings", f"${realized_savings:,.2f}")
     
-    # Create pie chart for recommendation status
-    status_counts = recommendations['status'].value_counts().reset_index()
-    status_counts.columns = ['Status', 'Count']
-    
+    # Create pie chart for recommendation status, straight from the counts
     fig = px.pie(
-        status_counts,
-        values='Count',
-        names='Status',
+        values=counts.values,
+        names=counts.index,
         title='Recommendation Status Distribution',
-        color='Status',
+        color=counts.index,
+        labels={'names': 'Status', 'values': 'Count', 'color': 'Status'},
         color_discrete_map={
             'Open': 'blue',
             'Implemented': 'green',
@@ -224,15 +260,16 @@ def render_implementation_tracking():
     
     # Create bar chart for savings by recommendation type
     if not recommendations.empty:
-        savings_by_type = recommendations.groupby('recommendation_type')['estimated_savings'].sum().reset_index()
-        savings_by_type = savings_by_type.sort_values('estimated_savings', ascending=False)
+        savings_by_type = (
+            recommendations.groupby('recommendation_type', sort=False, observed=True)['estimated_savings'].sum()
+            .sort_values(ascending=False)
+        )
         
         fig = px.bar(
-            savings_by_type,
-            x='recommendation_type',
-            y='estimated_savings',
+            x=savings_by_type.index,
+            y=savings_by_type.values,
             title='Potential Savings by Recommendation Type',
-            labels={'recommendation_type': 'Recommendation Type', 'estimated_savings': 'Potential Monthly Savings ($)'}
+            labels={'x': 'Recommendation Type', 'y': 'Potential Monthly Savings ($)'}
         )
         st.plotly_chart(fig, use_container_width=True)
 
@@ -3,11 +3,13 @@ Streamlit dashboard for CloudCostAI.
 """
 
 import os
+import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from dateutil.relativedelta import relativedelta
 import sys
 
@@ -20,7 +22,10 @@ from src.collectors.azure import AzureCostCollector
 from src.analyzers.idle_resources import IdleResourceAnalyzer
 from src.analyzers.forecast import CostForecaster
 from src.utils.helpers import generate_date_range
-from src.utils.db import get_cost_data, get_idle_resources, store_cost_data, store_idle_resources, init_db
+from src.utils.db import (
+    get_cost_data, get_idle_resources, store_cost_data, store_idle_resources, init_db,
+    get_recommendation_summary, get_anomaly_summary
+)
 from src.dashboards.budget_page import render_budget_page
 from src.dashboards.recommendations_page import render_recommendations_page
 from src.dashboards.anomalies_page import render_anomalies_page
@@ -37,6 +42,73 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Streamlit reruns this script on every widget change; cache the DB reads
+# behind the dashboard tabs and clear them after every write
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_idle_resources():
+    """Cached get_idle_resources."""
+    return get_idle_resources()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_recommendation_summary(status=None):
+    """Cached get_recommendation_summary."""
+    return get_recommendation_summary(status=status)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_anomaly_summary(status=None):
+    """Cached get_anomaly_summary."""
+    return get_anomaly_summary(status=status)
+
+# Collectors set up SDK sessions and credentials when created; keep one of
+# each per process instead of one per live load
+@st.cache_resource(show_spinner=False)
+def _get_aws_collector():
+    """AWS collector shared across reruns and sessions."""
+    return AWSCostCollector()
+
+@st.cache_resource(show_spinner=False)
+def _get_gcp_collector():
+    """GCP collector shared across reruns and sessions."""
+    return GCPCostCollector()
+
+@st.cache_resource(show_spinner=False)
+def _get_azure_collector():
+    """Azure collector shared across reruns and sessions."""
+    return AzureCostCollector()
+
+@st.cache_resource(show_spinner=False)
+def _get_idle_analyzer():
+    """Idle resource analyzer shared across reruns and sessions."""
+    return IdleResourceAnalyzer()
+
+@st.cache_data(ttl=REFRESH_INTERVAL, show_spinner=False)
+def _scan_idle_resources():
+    """
+    Scan the clouds for idle resources and store what is found.
+    
+    Storing happens here so that it runs once per scan, not on every rerun
+    that reads the cached result.
+    """
+    idle_df = _get_idle_analyzer().get_all_idle_resources()
+    
+    if not idle_df.empty:
+        try:
+            store_idle_resources(idle_df)
+            _cached_idle_resources.clear()
+        except Exception as e:
+            st.warning(f"Could not store idle resources in database: {e}")
+    
+    return idle_df
+
+# Training dominates the forecast tab; Streamlit hashes the input frame,
+# so the model is only retrained when the daily costs change
+@st.cache_data(ttl=REFRESH_INTERVAL, show_spinner=False)
+def _cached_forecast(forecast_data, forecast_days=30):
+    """Train a forecaster and return its (daily, monthly) forecasts."""
+    forecaster = CostForecaster(forecast_days=forecast_days)
+    forecaster.train(forecast_data)
+    return forecaster.predict(), forecaster.get_monthly_forecast()
+
 # Sidebar for configuration
 st.sidebar.title("CloudCostAI")
 st.sidebar.image("https://img.icons8.com/fluency/96/000000/cloud-cost.png", width=100)
@@ -71,9 +143,51 @@ else:
     use_live_data = st.sidebar.checkbox("Use Live Data", value=False, 
                                       help="If checked, will attempt to fetch data from cloud providers. Otherwise, uses sample data.")
 
+    # Drop every cached load and DB read so the next render starts fresh
+    if st.sidebar.button("Refresh", key="dashboard_refresh"):
+        st.cache_data.clear()
+
     # Main dashboard
     st.title("Cloud Cost Optimization Dashboard")
 
+    # Column types of the sample billing file, given up front so the CSV
+    # reader skips type inference; the date column is parsed as it is read
+    SAMPLE_BILLING_DTYPES = {
+        'service': 'category',
+        'amount': 'float64',
+        'currency': 'str',
+        'provider': 'category'
+    }
+
+    @st.cache_data(ttl=REFRESH_INTERVAL, show_spinner=False)
+    def _load_sample_billing():
+        """Load the sample billing file, once for all providers."""
+        return pd.read_csv(
+            'data/sample_billing_data.csv',
+            usecols=['date', *SAMPLE_BILLING_DTYPES],
+            dtype=SAMPLE_BILLING_DTYPES,
+            parse_dates=['date']
+        )
+
+    def _with_cost_dtypes(df):
+        """
+        Give loaded cost data parsed dates and categorical provider/service.
+        
+        The dashboard groups by these columns repeatedly; categories group
+        on integer codes rather than hashing strings.
+        """
+        return df.astype({'date': 'datetime64[ns]', 'provider': 'category', 'service': 'category'})
+
+    def _with_float32_costs(df):
+        """
+        Downcast the cost column of loaded cost data to float32.
+        
+        This halves the memory the raw rows take in the cache and in each
+        groupby; sums made from them are taken back to float64 below.
+        """
+        cost_column = 'cost' if 'cost' in df.columns else 'amount'
+        return df.astype({cost_column: 'float32'})
+
     # Initialize collectors
     @st.cache_data(ttl=REFRESH_INTERVAL)
     def load_data(months, use_live=False):
@@ -86,77 +200,108 @@ else:
         db_data = get_cost_data(start_date=start_date, end_date=end_date)
         
         if not db_data.empty and not use_live:
-            return db_data
+            return _with_float32_costs(_with_cost_dtypes(db_data))
         
-        if use_aws:
-            try:
-                aws_collector = AWSCostCollector()
-                if use_live:
-                    aws_data = aws_collector.get_cost_and_usage(start_date, end_date)
-                else:
-                    # Use sample data
-                    sample_data = pd.read_csv('data/sample_billing_data.csv')
-                    aws_data = sample_data[sample_data['provider'] == 'AWS'].copy()
-                
-                all_data.append(aws_data)
-            except Exception as e:
-                st.error(f"Error loading AWS data: {e}")
+        def fetch_provider_data(provider, collector):
+            """Fetch one provider's cost data from its cloud API."""
+            if provider == 'AWS':
+                return collector.get_cost_and_usage(start_date, end_date)
+            return collector.get_cost_data(start_date=start_date, end_date=end_date)
         
-        if use_gcp:
-            try:
-                gcp_collector = GCPCostCollector()
-                if use_live:
-                    gcp_data = gcp_collector.get_cost_data(start_date=start_date, end_date=end_date)
-                else:
-                    # Use sample data
-                    sample_data = pd.read_csv('data/sample_billing_data.csv')
-                    gcp_data = sample_data[sample_data['provider'] == 'GCP'].copy()
-                    
-                all_data.append(gcp_data)
-            except Exception as e:
-                st.error(f"Error loading GCP data: {e}")
+        providers = [
+            provider for provider, selected in
+            (('AWS', use_aws), ('GCP', use_gcp), ('Azure', use_azure))
+            if selected
+        ]
         
-        if use_azure:
+        if use_live:
+            # The cloud APIs are I/O bound, so fetch the providers concurrently;
+            # the shared collectors are looked up, and results and errors are
+            # handled, here on the script thread
+            collector_getters = {'AWS': _get_aws_collector, 'GCP': _get_gcp_collector, 'Azure': _get_azure_collector}
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = []
+                for provider in providers:
+                    try:
+                        collector = collector_getters[provider]()
+                    except Exception as e:
+                        st.error(f"Error loading {provider} data: {e}")
+                        continue
+                    futures.append((provider, executor.submit(fetch_provider_data, provider, collector)))
+            
+            for provider, future in futures:
+                try:
+                    all_data.append(future.result())
+                except Exception as e:
+                    st.error(f"Error loading {provider} data: {e}")
+        else:
+            # Use sample data, read once and split by provider in one pass
             try:
-                azure_collector = AzureCostCollector()
-                if use_live:
-                    azure_data = azure_collector.get_cost_data(start_date=start_date, end_date=end_date)
-                else:
-                    # Use sample data
-                    sample_data = pd.read_csv('data/sample_billing_data.csv')
-                    azure_data = sample_data[sample_data['provider'] == 'Azure'].copy()
-                    
-                all_data.append(azure_data)
+                sample_by_provider = dict(tuple(_load_sample_billing().groupby('provider', sort=False, observed=True)))
+                all_data.extend(sample_by_provider[provider] for provider in providers if provider in sample_by_provider)
             except Exception as e:
-                st.error(f"Error loading Azure data: {e}")
+                st.error(f"Error loading sample data: {e}")
         
         if all_data:
-            combined_data = pd.concat(all_data, ignore_index=True)
-            # Store in database for future use
-            try:
-                store_cost_data(combined_data)
-            except Exception as e:
-                st.warning(f"Could not store data in database: {e}")
-            return combined_data
+            # Providers' frames with different categories concatenate to
+            # object columns, so set the dtypes again on the combined frame
+            combined_data = _with_cost_dtypes(pd.concat(all_data, ignore_index=True, copy=False))
+            # Store in database for future use; rows the database already
+            # holds for this range are skipped so repeated live loads don't
+            # append duplicates
+            new_data = combined_data
+            if not db_data.empty:
+                keys = ['date', 'provider', 'service']
+                stored = pd.MultiIndex.from_frame(_with_cost_dtypes(db_data)[keys])
+                new_data = combined_data[~pd.MultiIndex.from_frame(combined_data[keys]).isin(stored)]
+            
+            if not new_data.empty:
+                try:
+                    store_cost_data(new_data)
+                except Exception as e:
+                    st.warning(f"Could not store data in database: {e}")
+            # Downcast only after storing, so the database keeps the exact amounts
+            return _with_float32_costs(combined_data)
         return pd.DataFrame()
 
+    @st.cache_data(ttl=REFRESH_INTERVAL, show_spinner=False)
+    def load_cost_rollup(months, use_live=False):
+        """
+        Load cost data summed by date, provider and service.
+        
+        Every metric and chart on the dashboard is rolled up from this much
+        smaller frame. Caching it keeps the groupby over the raw rows to
+        once per load instead of once per rerun.
+        """
+        df = load_data(months, use_live=use_live)
+        if df.empty:
+            return df
+        
+        # The float32 costs are widened again so totals keep their cents
+        cost_column = 'cost' if 'cost' in df.columns else 'amount'
+        agg = df.groupby(
+            ['date', 'provider', 'service'], as_index=False, sort=False, observed=True, dropna=False
+        )[cost_column].sum()
+        return agg.astype({cost_column: 'float64'})
+
     # Load data
     with st.spinner("Loading cloud cost data..."):
-        df = load_data(months_back, use_live=use_live_data)
+        agg = load_cost_rollup(months_back, use_live=use_live_data)
 
-    if df.empty:
+    if agg.empty:
         st.warning("No data available. Please check your cloud provider credentials and selections.")
     else:
+        cost_column = 'cost' if 'cost' in agg.columns else 'amount'
+        
         # Display metrics
         col1, col2, col3 = st.columns(3)
         
         # Total cost
-        total_cost = df['cost'].sum() if 'cost' in df.columns else df['amount'].sum()
+        total_cost = agg[cost_column].sum()
         col1.metric("Total Cloud Spend", f"${total_cost:,.2f}")
         
         # Cost by provider
-        cost_column = 'cost' if 'cost' in df.columns else 'amount'
-        provider_costs = df.groupby('provider')[cost_column].sum()
+        provider_costs = agg.groupby('provider', sort=False, observed=True)[cost_column].sum()
         if 'AWS' in provider_costs:
             col2.metric("AWS Cost", f"${provider_costs.get('AWS', 0):,.2f}")
         if 'GCP' in provider_costs:
@@ -167,21 +312,25 @@ else:
         # Cost trend over time
         st.subheader("Cost Trend Over Time")
         
-        # Ensure date is datetime
-        if 'date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['date']):
-            df['date'] = pd.to_datetime(df['date'])
-        
         # Group by date and provider
-        time_df = df.groupby(['date', 'provider'])[cost_column].sum().reset_index()
+        time_df = agg.groupby(['date', 'provider'], as_index=False, observed=True)[cost_column].sum()
         
-        # Create line chart
-        fig = px.line(
-            time_df, 
-            x='date', 
-            y=cost_column, 
-            color='provider',
+        # Create line chart; WebGL traces stay responsive on long histories
+        # where SVG lines stall the browser
+        fig = go.Figure()
+        for provider, provider_df in time_df.groupby('provider', sort=False, observed=True):
+            fig.add_trace(go.Scattergl(
+                x=provider_df['date'],
+                y=provider_df[cost_column],
+                mode='lines',
+                name=provider
+            ))
+        
+        fig.update_layout(
             title='Cloud Costs Over Time',
-            labels={cost_column: 'Cost ($)', 'date': 'Date', 'provider': 'Cloud Provider'}
+            xaxis_title='Date',
+            yaxis_title='Cost ($)',
+            legend_title='Cloud Provider'
         )
         st.plotly_chart(fig, use_container_width=True)
         
@@ -189,7 +338,7 @@ else:
         st.subheader("Cost Breakdown by Service")
         
         # Group by service and provider
-        service_df = df.groupby(['service', 'provider'])[cost_column].sum().reset_index()
+        service_df = agg.groupby(['service', 'provider'], as_index=False, sort=False, observed=True)[cost_column].sum()
         
         # Create bar chart
         fig = px.bar(
@@ -202,28 +351,28 @@ else:
         )
         st.plotly_chart(fig, use_container_width=True)
         
-        # Create tabs for additional insights
-        tab1, tab2, tab3 = st.tabs(["Idle Resources", "Cost Forecast", "Optimization Summary"])
+        # Additional insights; only the selected view runs, where st.tabs
+        # would scan idle resources, train the forecast and query the
+        # summary on every rerun
+        insights_view = st.radio(
+            "Insights",
+            ["Idle Resources", "Cost Forecast", "Optimization Summary"],
+            horizontal=True,
+            label_visibility="collapsed",
+            key="dashboard_view"
+        )
         
-        with tab1:
+        if insights_view == "Idle Resources":
             # Idle resources
             st.subheader("Idle Resource Analysis")
             
             # Get idle resources
             with st.spinner("Analyzing idle resources..."):
                 # Check if we have idle resources in the database
-                idle_df = get_idle_resources()
+                idle_df = _cached_idle_resources()
                 
                 if idle_df.empty or use_live_data:
-                    analyzer = IdleResourceAnalyzer()
-                    idle_df = analyzer.get_all_idle_resources()
-                    
-                    # Store in database
-                    if not idle_df.empty:
-                        try:
-                            store_idle_resources(idle_df)
-                        except Exception as e:
-                            st.warning(f"Could not store idle resources in database: {e}")
+                    idle_df = _scan_idle_resources()
             
             if not idle_df.empty:
                 # Calculate total potential savings
@@ -235,33 +384,35 @@ else:
                 
                 # Savings by provider
                 if 'provider' in idle_df.columns:
-                    savings_by_provider = idle_df.groupby('provider')['estimated_monthly_savings'].sum().reset_index()
-                    savings_by_provider.columns = ['provider', 'potential_monthly_savings']
+                    savings_by_provider = idle_df.groupby(
+                        'provider', as_index=False, sort=False, observed=True
+                    )['estimated_monthly_savings'].sum()
                     
                     if not savings_by_provider.empty:
-                        fig = px.pie(
+                        fig = px.bar(
                             savings_by_provider, 
-                            values='potential_monthly_savings', 
-                            names='provider',
-                            title='Potential Savings by Provider'
+                            x='provider', 
+                            y='estimated_monthly_savings',
+                            title='Potential Savings by Provider',
+                            labels={'estimated_monthly_savings': 'potential_monthly_savings'}
                         )
+                        # Keep zoom and pan across reruns
+                        fig.update_layout(uirevision='savings')
                         st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("No idle resources detected.")
         
-        with tab2:
+        elif insights_view == "Cost Forecast":
             # Cost forecasting
             st.subheader("Cost Forecast")
             
             # Prepare data for forecasting
-            forecast_data = df.groupby('date')[cost_column].sum().reset_index()
+            # Dates stay sorted here; the forecaster expects them in order
+            forecast_data = agg.groupby('date', as_index=False, observed=True)[cost_column].sum()
             
             if len(forecast_data) >= 3:  # Need enough data points for forecasting
                 with st.spinner("Generating forecast..."):
-                    forecaster = CostForecaster(forecast_days=30)
-                    forecaster.train(forecast_data)
-                    forecast = forecaster.predict()
-                    monthly_forecast = forecaster.get_monthly_forecast()
+                    forecast, monthly_forecast = _cached_forecast(forecast_data, forecast_days=30)
                 
                 # Display monthly forecast
                 st.write("Projected Monthly Costs:")
@@ -271,27 +422,29 @@ else:
                 fig = go.Figure()
                 
                 # Historical data
-                fig.add_trace(go.Scatter(
-                    x=forecast_data['date'],
-                    y=forecast_data[cost_column],
+                fig.add_trace(go.Scattergl(
+                    x=forecast_data['date'].to_numpy(),
+                    y=forecast_data[cost_column].to_numpy(),
                     mode='markers+lines',
                     name='Historical Cost',
                     line=dict(color='blue')
                 ))
                 
                 # Forecast
-                fig.add_trace(go.Scatter(
-                    x=forecast['ds'],
-                    y=forecast['yhat'],
+                fig.add_trace(go.Scattergl(
+                    x=forecast['ds'].to_numpy(),
+                    y=forecast['yhat'].to_numpy(),
                     mode='lines',
                     name='Forecast',
                     line=dict(color='red')
                 ))
                 
-                # Confidence interval
+                # Confidence interval, traced along the upper bound and back
+                # along the lower one; reversing an array is only a view
+                ds = forecast['ds'].to_numpy()
                 fig.add_trace(go.Scatter(
-                    x=forecast['ds'].tolist() + forecast['ds'].tolist()[::-1],
-                    y=forecast['yhat_upper'].tolist() + forecast['yhat_lower'].tolist()[::-1],
+                    x=np.concatenate([ds, ds[::-1]]),
+                    y=np.concatenate([forecast['yhat_upper'].to_numpy(), forecast['yhat_lower'].to_numpy()[::-1]]),
                     fill='toself',
                     fillcolor='rgba(255,0,0,0.2)',
                     line=dict(color='rgba(255,255,255,0)'),
@@ -309,23 +462,14 @@ else:
             else:
                 st.info("Not enough data for forecasting. Need at least 3 data points.")
         
-        with tab3:
+        else:  # Optimization Summary
             # Optimization summary
             st.subheader("Optimization Summary")
             
-            # Get recommendations from database
-            from src.utils.db import get_recommendations
-            recommendations = get_recommendations(status='Open')
-            
-            # Get anomalies from database
-            from src.utils.db import get_anomalies
-            anomalies = get_anomalies(status='Open')
-            
-            # Calculate metrics
-            total_recommendations = len(recommendations)
-            total_anomalies = len(anomalies)
-            
-            potential_savings = recommendations['estimated_savings'].sum() if not recommendations.empty else 0
+            # Get counts, totals and the top few rows from the database;
+            # the full tables are never loaded here
+            total_recommendations, potential_savings, top_recs = _cached_recommendation_summary(status='Open')
+            total_anomalies, recent_anomalies = _cached_anomaly_summary(status='Open')
             
             # Display metrics
             col1, col2, col3 = st.columns(3)
@@ -340,24 +484,26 @@ else:
                 st.metric("Active Anomalies", total_anomalies)
             
             # Display top recommendations
-            if not recommendations.empty:
+            if not top_recs.empty:
                 st.subheader("Top Recommendations")
                 
-                # Sort by estimated savings
-                top_recs = recommendations.sort_values('estimated_savings', ascending=False).head(5)
-                
-                for _, rec in top_recs.iterrows():
-                    st.write(f"**{rec['recommendation_type']}**: {rec['resource_type']} - ${rec['estimated_savings']:,.2f}/month")
+                # One markdown element for the list rather than one per row;
+                # '$' is escaped so that two amounts don't render as LaTeX
+                lines = [
+                    f"**{rec.recommendation_type}**: {rec.resource_type} - ${rec.estimated_savings:,.2f}/month"
+                    for rec in top_recs.itertuples(index=False)
+                ]
+                st.markdown("\n\n".join(lines).replace("$", "\\$"))
             
             # Display recent anomalies
-            if not anomalies.empty:
+            if not recent_anomalies.empty:
                 st.subheader("Recent Anomalies")
                 
-                # Sort by date
-                recent_anomalies = anomalies.sort_values('date', ascending=False).head(5)
-                
-                for _, anomaly in recent_anomalies.iterrows():
-                    st.write(f"**{anomaly['severity']} severity**: {anomaly['message']}")
+                lines = [
+                    f"**{anomaly.severity} severity**: {anomaly.message}"
+                    for anomaly in recent_anomalies.itertuples(index=False)
+                ]
+                st.markdown("\n\n".join(lines).replace("$", "\\$"))
 
 # Footer
 st.markdown("---")
@@ -6,12 +6,45 @@ Can be run as a scheduled task or cron job.
 import os
 import sys
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Add project root to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from src.analyzers.budget_alerts import BudgetAlert
-from src.utils.db import get_budgets, store_budget_alert, mark_alert_notified
-from src.utils.notification import send_email, send_slack_notification
+from src.analyzers.budget_alerts import BudgetAlert, build_alert_email
+from src.utils.db import get_budgets, store_budget_alerts, mark_alert_notified
+from src.utils.notification import SMTPSession, send_slack_notification
+
+# Notifications sent at the same time
+NOTIFICATION_WORKERS = 16
+
+def _alert_slack_message(alert):
+    """
+    Build the Slack message for a budget alert.
+    
+    Args:
+        alert (dict): Alert information
+        
+    Returns:
+        str: Message text
+    """
+    return (
+        f"*Budget Alert*: {alert['name']} exceeded by {alert['percentage']:.1f}%\n" +
+        f"Budget: ${alert['budget']:,.2f}, Actual: ${alert['actual']:,.2f}\n" +
+        f"Please review your cloud spending."
+    )
+
+def _send_alert_emails(alerts):
+    """
+    Email a set of budget alerts over one SMTP connection.
+    
+    Args:
+        alerts (list): Alert information dictionaries
+        
+    Returns:
+        list: Whether each alert's email was sent, in the order of alerts
+    """
+    with SMTPSession() as session:
+        return [session.send(*build_alert_email(alert), html=True) for alert in alerts]
 
 def check_budgets_and_send_alerts():
     """
@@ -30,13 +63,13 @@ def check_budgets_and_send_alerts():
     alert_system = BudgetAlert()
     
     # Add budgets to the alert system
-    for _, budget in budgets_df.iterrows():
+    for budget in budgets_df.itertuples(index=False):
         alert_system.add_budget(
-            name=budget['name'],
-            amount=budget['amount'],
-            period=budget['period'],
-            provider=budget['provider'],
-            service=budget['service']
+            name=budget.name,
+            amount=budget.amount,
+            period=budget.period,
+            provider=budget.provider,
+            service=budget.service
         )
     
     # Check budgets and get alerts
@@ -48,62 +81,48 @@ def check_budgets_and_send_alerts():
     
     print(f"Found {len(alerts)} budget alerts.")
     
-    # Process each alert
+    # Budget ID by name; like the alert system, the last budget of a
+    # repeated name wins
+    budget_ids = dict(zip(budgets_df['name'], budgets_df['id']))
+    
+    # Pair each alert with its budget ID
+    matched_alerts = []
     for alert in alerts:
         print(f"Processing alert for budget '{alert['name']}'...")
         
         # Find the budget ID
-        budget_id = None
-        for _, budget in budgets_df.iterrows():
-            if budget['name'] == alert['name']:
-                budget_id = budget['id']
-                break
+        budget_id = budget_ids.get(alert['name'])
         
         if budget_id is None:
             print(f"Could not find budget ID for '{alert['name']}'")
             continue
         
-        # Store alert in database
-        alert_id = store_budget_alert(
-            budget_id=budget_id,
-            actual_cost=alert['actual'],
-            percentage=alert['percentage']
-        )
-        
-        if not alert_id:
-            print(f"Failed to store alert for budget '{alert['name']}'")
-            continue
-        
-        # Send email notification
-        email_sent = send_email(
-            subject=f"Budget Alert: {alert['name']} exceeded by {alert['percentage']:.1f}%",
-            body=f"""
-            <html>
-            <body>
-                <h2>Budget Alert</h2>
-                <p>The following budget has been exceeded:</p>
-                <ul>
-                    <li><strong>Budget:</strong> {alert['name']}</li>
-                    <li><strong>Amount:</strong> ${alert['budget']:,.2f}</li>
-                    <li><strong>Actual Spend:</strong> ${alert['actual']:,.2f}</li>
-                    <li><strong>Over Budget:</strong> ${alert['actual'] - alert['budget']:,.2f} ({alert['percentage']:.1f}%)</li>
-                    <li><strong>Period:</strong> {alert['period']}</li>
-                    <li><strong>Provider:</strong> {alert['provider']}</li>
-                    <li><strong>Service:</strong> {alert['service']}</li>
-                </ul>
-                <p>Please review your cloud spending and take appropriate action.</p>
-            </body>
-            </html>
-            """,
-            html=True
-        )
-        
-        # Send Slack notification
-        slack_sent = send_slack_notification(
-            message=f"*Budget Alert*: {alert['name']} exceeded by {alert['percentage']:.1f}%\n" +
-                   f"Budget: ${alert['budget']:,.2f}, Actual: ${alert['actual']:,.2f}\n" +
-                   f"Please review your cloud spending."
-        )
+        matched_alerts.append((alert, budget_id))
+    
+    # Store all alerts in database in one transaction
+    try:
+        alert_ids = store_budget_alerts([
+            {'budget_id': budget_id, 'actual_cost': alert['actual'], 'percentage': alert['percentage']}
+            for alert, budget_id in matched_alerts
+        ])
+    except Exception as e:
+        print(f"Failed to store budget alerts: {e}")
+        return
+    
+    stored_alerts = [(alert, alert_id) for (alert, _), alert_id in zip(matched_alerts, alert_ids)]
+    
+    # Notifications are network round trips; send the Slack messages
+    # concurrently, and the emails alongside them over one SMTP connection,
+    # then record the outcomes back here
+    with ThreadPoolExecutor(max_workers=NOTIFICATION_WORKERS) as executor:
+        emails_future = executor.submit(_send_alert_emails, [alert for alert, _ in stored_alerts])
+        slack_futures = [
+            executor.submit(send_slack_notification, _alert_slack_message(alert))
+            for alert, _ in stored_alerts
+        ]
+    
+    for (alert, alert_id), email_sent, slack_future in zip(stored_alerts, emails_future.result(), slack_futures):
+        slack_sent = slack_future.result()
         
         # Mark alert as notified if either notification was sent
         if email_sent or slack_sent:
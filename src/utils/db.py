@@ -2,25 +2,84 @@
 Database utilities for CloudCostAI.
 """
 
+import importlib.util
 import os
+import queue
 import sqlite3
 import pandas as pd
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, MetaData, Table, DateTime, Text, Boolean, ForeignKey, JSON
+from sqlalchemy import create_engine, event, update, Column, Integer, String, Float, Date, MetaData, Table, DateTime, Text, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 import datetime
 import json
 import sys
+import time
+from contextlib import contextmanager
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from config import DB_PATH
 
+# orjson encodes and decodes several times faster than json, when installed;
+# both read and write the same JSON for the lists of strings stored here
+if importlib.util.find_spec('orjson'):
+    import orjson
+    
+    def _json_dumps(value):
+        """Serialize value to a JSON string."""
+        return orjson.dumps(value).decode()
+    
+    _json_loads = orjson.loads
+else:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
 # Ensure data directory exists
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
+# Seconds a connection waits on another's lock before raising "database is locked"
+SQLITE_BUSY_TIMEOUT = 30
+
+# Memory-mapped I/O size for reads, in bytes
+SQLITE_MMAP_SIZE = 268435456
+
+# Idle read connections kept open for reuse by the get_* queries
+READ_POOL_SIZE = 8
+
+# Prepared statements each read connection keeps, keyed by SQL text
+READ_STATEMENT_CACHE_SIZE = 256
+_read_pool = queue.LifoQueue(maxsize=READ_POOL_SIZE)
+
+def _set_pragmas(dbapi_connection, connection_record):
+    """
+    Tune each new SQLite connection of the engine.
+    
+    WAL lets readers run alongside a writer, and with synchronous=NORMAL
+    commits no longer wait on an fsync each. journal_mode is stored in the
+    database file, so the other pragmas are the ones that need setting on
+    every connection.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT * 1000}")
+    cursor.close()
+
 # Create SQLAlchemy engine
-engine = create_engine(f'sqlite:///{DB_PATH}')
+engine = create_engine(
+    f'sqlite:///{DB_PATH}',
+    connect_args={'check_same_thread': False, 'timeout': SQLITE_BUSY_TIMEOUT}
+)
+event.listen(engine, 'connect', _set_pragmas)
+
+# _bulk_insert binds frame values straight through sqlite3, which only
+# adapts plain datetimes; store Timestamps the way the ORM stores datetimes,
+# and missing values (NaT, and pd.NA from nullable dtypes) as NULL
+sqlite3.register_adapter(pd.Timestamp, lambda ts: ts.isoformat(" "))
+sqlite3.register_adapter(type(pd.NaT), lambda nat: None)
+sqlite3.register_adapter(type(pd.NA), lambda na: None)
 Base = declarative_base()
 Session = sessionmaker(bind=engine)
 
@@ -35,6 +94,10 @@ class CostData(Base):
     currency = Column(String, nullable=False)
     provider = Column(String, nullable=False)
     
+    __table_args__ = (
+        Index('ix_cost_data_date_provider_service', 'date', 'provider', 'service'),
+    )
+    
 class IdleResource(Base):
     """Idle resource table model."""
     __tablename__ = 'idle_resources'
@@ -70,6 +133,10 @@ class BudgetAlert(Base):
     percentage = Column(Float, nullable=False)
     alert_date = Column(DateTime, default=datetime.datetime.now)
     notified = Column(Boolean, default=False)
+    
+    __table_args__ = (
+        Index('ix_budget_alerts_budget_id_notified', 'budget_id', 'notified'),
+    )
 
 class Recommendation(Base):
     """Recommendation table model."""
@@ -89,6 +156,10 @@ class Recommendation(Base):
     status = Column(String, default='Open')  # Open, Implemented, Rejected, Deferred
     created_at = Column(DateTime, default=datetime.datetime.now)
     updated_at = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now)
+    
+    __table_args__ = (
+        Index('ix_recommendations_status_provider', 'status', 'provider'),
+    )
 
 class AnomalyDetection(Base):
     """Anomaly detection table model."""
@@ -107,6 +178,10 @@ class AnomalyDetection(Base):
     recommended_actions = Column(Text, nullable=True)  # JSON string of actions
     status = Column(String, default='Open')  # Open, Resolved, Ignored
     created_at = Column(DateTime, default=datetime.datetime.now)
+    
+    __table_args__ = (
+        Index('ix_anomaly_detections_status_severity_provider', 'status', 'severity', 'provider'),
+    )
 
 class ResourceTag(Base):
     """Resource tag table model."""
@@ -118,6 +193,10 @@ class ResourceTag(Base):
     key = Column(String, nullable=False)
     value = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.datetime.now)
+    
+    __table_args__ = (
+        Index('ix_resource_tags_resource_id_provider_key', 'resource_id', 'provider', 'key'),
+    )
 
 class CostAllocation(Base):
     """Cost allocation table model."""
@@ -132,11 +211,59 @@ class CostAllocation(Base):
     project = Column(String, nullable=True)
     environment = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.now)
+    
+    __table_args__ = (
+        Index('ix_cost_allocations_date_business_unit_project', 'date', 'business_unit', 'project'),
+    )
 
 def init_db():
-    """Initialize the database by creating all tables."""
+    """Initialize the database by creating all tables and indexes."""
     Base.metadata.create_all(engine)
     
+    # create_all() only emits indexes for tables it creates, so add any
+    # indexes missing from tables that already existed
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    
+def _insert_rows(table, columns, rows):
+    """
+    Insert rows into a table with one prepared statement and one transaction.
+    
+    Args:
+        table (str): Name of a table defined in this module
+        columns (list): Column names, in the order of each row's values
+        rows (iterable): Tuples of values; consumed as they are inserted
+    """
+    # to_sql created missing tables; keep that for callers that skip init_db
+    Base.metadata.tables[table].create(engine, checkfirst=True)
+    
+    placeholders = ", ".join("?" * len(columns))
+    
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            rows
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def _bulk_insert(table, df):
+    """
+    Append the rows of a DataFrame to a table in one transaction.
+    
+    The rows are streamed from the frame into executemany, where to_sql
+    first copies the whole frame into a list of row values.
+    
+    Args:
+        table (str): Name of a table defined in this module
+        df (pd.DataFrame): Rows to insert; columns must match table columns
+    """
+    _insert_rows(table, list(df.columns), df.itertuples(index=False, name=None))
+
 def store_cost_data(df):
     """
     Store cost data DataFrame in the database.
@@ -144,7 +271,12 @@ def store_cost_data(df):
     Args:
         df (pd.DataFrame): Cost data
     """
-    df.to_sql('cost_data', engine, if_exists='append', index=False)
+    # Write parsed dates as plain dates; timestamps would be stored with a
+    # time part and no longer match the readers' 'YYYY-MM-DD' filters
+    if pd.api.types.is_datetime64_any_dtype(df['date']):
+        df = df.assign(date=df['date'].dt.date)
+    
+    _bulk_insert('cost_data', df)
     
 def store_idle_resources(df):
     """
@@ -153,21 +285,320 @@ def store_idle_resources(df):
     Args:
         df (pd.DataFrame): Idle resources data
     """
-    df.to_sql('idle_resources', engine, if_exists='append', index=False)
+    _bulk_insert('idle_resources', df)
     
-def get_cost_data(start_date=None, end_date=None, provider=None):
+def _connect_ro():
+    """
+    Open a read-only connection for the get_* queries.
+    
+    Returns:
+        sqlite3.Connection: Connection with writes disabled
+    """
+    # Autocommit, so an idle pooled connection never holds a read
+    # transaction open and keeps seeing new writes. The get_* queries build
+    # the same SQL text for the same set of filters, so a pooled connection
+    # reuses the prepared statement rather than parsing the SQL again; the
+    # statement cache is sized to hold every filter combination.
+    conn = sqlite3.connect(
+        DB_PATH, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False, isolation_level=None,
+        cached_statements=READ_STATEMENT_CACHE_SIZE
+    )
+    conn.execute("PRAGMA query_only=ON")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    return conn
+
+@contextmanager
+def _open_ro_conn():
+    """
+    Borrow a read-only connection for the get_* queries.
+    
+    Connections go back to a pool on exit rather than being closed, so
+    repeated queries skip the connect and pragma setup. Up to
+    READ_POOL_SIZE idle connections are kept; any beyond that are closed.
+    The store_* functions write through the engine, which pools its own
+    connections.
+    
+    Yields:
+        sqlite3.Connection: Connection with writes disabled
+    """
+    try:
+        conn = _read_pool.get_nowait()
+    except queue.Empty:
+        conn = _connect_ro()
+    
+    try:
+        yield conn
+    finally:
+        try:
+            _read_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+# Anomaly severities, most severe first; as an ordered categorical the
+# anomalies sort by severity directly
+SEVERITY_DTYPE = pd.CategoricalDtype(['High', 'Medium', 'Low'], ordered=True)
+
+def _with_categories(df, dtypes):
+    """
+    Store repeated, low-cardinality text columns as categories.
+    
+    Args:
+        df (pd.DataFrame): Query result
+        dtypes (dict): Category dtype of each column; missing columns are skipped
+        
+    Returns:
+        pd.DataFrame: Frame with the columns converted
+    """
+    return df.astype({column: dtype for column, dtype in dtypes.items() if column in df.columns})
+
+def _parse_json_lists(series):
+    """
+    Parse a column of JSON list strings, with empty values as [].
+    
+    Stored lists often repeat (anomaly causes and actions come from a few
+    templates), so each distinct string is parsed once and its rows share
+    the result.
+    
+    Args:
+        series (pd.Series): JSON strings, empty strings or nulls
+        
+    Returns:
+        list: Parsed lists, in the order of series
+    """
+    codes, uniques = pd.factorize(series)
+    parsed = [_json_loads(value) if value else [] for value in uniques]
+    return [parsed[code] if code >= 0 else [] for code in codes]
+
+def _match_filter(column, value):
+    """
+    Build the predicate for a filter given as one value or a list of values.
+    
+    Args:
+        column (str): Column to filter on
+        value (str or list): Value to match, or values to match any of
+        
+    Returns:
+        tuple: (clause to append to a WHERE 1=1 query, parameter list)
+    """
+    if isinstance(value, str):
+        return f" AND {column} = ?", [value]
+    
+    values = list(value)
+    if not values:
+        return " AND 0", []
+    return f" AND {column} IN ({', '.join('?' * len(values))})", values
+
+def _cost_data_query(start_date=None, end_date=None, provider=None, services=None, columns=None):
+    """
+    Build the SELECT shared by get_cost_data and get_cost_data_iter.
+    
+    Returns:
+        tuple: (query, parameter list)
+    """
+    query = f"SELECT {', '.join(columns) if columns else '*'} FROM cost_data WHERE 1=1"
+    params = []
+    
+    if start_date:
+        query += " AND date >= ?"
+        params.append(start_date)
+        
+    if end_date:
+        query += " AND date <= ?"
+        params.append(end_date)
+        
+    if provider:
+        query += " AND provider = ?"
+        params.append(provider)
+        
+    if services is not None:
+        clause, values = _match_filter('service', list(services))
+        query += clause
+        params.extend(values)
+        
+    return query, params
+
+def _standardize_cost_columns(df):
+    """Name the cost column 'cost'; tables written from raw provider exports may name it 'amount'."""
+    if 'amount' in df.columns and 'cost' not in df.columns:
+        df = df.rename(columns={'amount': 'cost'})
+    return df
+
+def get_cost_data(start_date=None, end_date=None, provider=None, services=None, columns=None):
     """
     Retrieve cost data from the database with optional filters.
     
+    Args:
+        start_date (str, optional): Start date filter
+        end_date (str, optional): End date filter
+        provider (str, optional): Cloud provider filter
+        services (list, optional): Only return rows for these services
+        columns (list, optional): Only read these columns
+        
+    Returns:
+        pd.DataFrame: Cost data, with 'date' parsed to datetime
+    """
+    query, params = _cost_data_query(start_date, end_date, provider, services, columns)
+        
+    with _open_ro_conn() as conn:
+        df = pd.read_sql_query(
+            query, conn, params=params,
+            parse_dates=['date'] if not columns or 'date' in columns else None
+        )
+        
+    df = _standardize_cost_columns(df)
+    return _with_categories(df, {'provider': 'category', 'service': 'category', 'currency': 'category'})
+
+def get_cost_data_iter(start_date=None, end_date=None, provider=None, services=None, columns=None,
+                       chunksize=50000):
+    """
+    Retrieve cost data in chunks, for aggregating ranges too large to load at once.
+    
+    Args:
+        start_date (str, optional): Start date filter
+        end_date (str, optional): End date filter
+        provider (str, optional): Cloud provider filter
+        services (list, optional): Only return rows for these services
+        columns (list, optional): Only read these columns
+        chunksize (int, optional): Rows per chunk
+        
+    Yields:
+        pd.DataFrame: Chunks of cost data, with 'date' parsed to datetime
+    """
+    query, params = _cost_data_query(start_date, end_date, provider, services, columns)
+    
+    # The connection stays borrowed until the caller finishes iterating
+    with _open_ro_conn() as conn:
+        for chunk in pd.read_sql_query(
+            query, conn, params=params,
+            parse_dates=['date'] if not columns or 'date' in columns else None,
+            chunksize=chunksize
+        ):
+            yield _standardize_cost_columns(chunk)
+    
+def get_cost_data_arrow(start_date=None, end_date=None, provider=None, services=None, columns=None):
+    """
+    Retrieve cost data as an Arrow table, read through the ADBC SQLite driver.
+    
+    Rows go from SQLite into Arrow buffers without becoming Python objects,
+    for callers that work with Arrow directly. Needs the optional
+    adbc-driver-sqlite and pyarrow packages; 'date' is returned as stored,
+    as a 'YYYY-MM-DD' string column.
+    
+    Args:
+        start_date (str, optional): Start date filter
+        end_date (str, optional): End date filter
+        provider (str, optional): Cloud provider filter
+        services (list, optional): Only return rows for these services
+        columns (list, optional): Only read these columns
+        
+    Returns:
+        pyarrow.Table: Cost data
+    """
+    import adbc_driver_sqlite.dbapi
+    
+    query, params = _cost_data_query(start_date, end_date, provider, services, columns)
+    
+    with adbc_driver_sqlite.dbapi.connect(DB_PATH) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetch_arrow_table()
+    
+def db_has_any_costs():
+    """
+    Check whether the cost data table holds any rows.
+    
+    Returns:
+        bool: True if at least one cost row exists, False otherwise
+    """
+    with _open_ro_conn() as conn:
+        try:
+            return conn.execute("SELECT 1 FROM cost_data LIMIT 1").fetchone() is not None
+        except sqlite3.OperationalError:
+            # Table not created yet
+            return False
+    
+def _cost_filters(start_date=None, end_date=None, provider=None):
+    """
+    Build the WHERE clause and parameters shared by the cost aggregate queries.
+    
+    Args:
+        start_date (str, optional): Start date filter
+        end_date (str, optional): End date filter
+        provider (str, optional): Cloud provider filter
+        
+    Returns:
+        tuple: (where clause, parameter list)
+    """
+    where = " WHERE 1=1"
+    params = []
+    
+    if start_date:
+        where += " AND date >= ?"
+        params.append(start_date)
+        
+    if end_date:
+        where += " AND date <= ?"
+        params.append(end_date)
+        
+    if provider:
+        where += " AND provider = ?"
+        params.append(provider)
+        
+    return where, params
+    
+def get_daily_cost_series(start_date=None, end_date=None, provider=None):
+    """
+    Retrieve total cost per day, summed in the database.
+    
+    Args:
+        start_date (str, optional): Start date filter
+        end_date (str, optional): End date filter
+        provider (str, optional): Cloud provider filter
+        
+    Returns:
+        pd.DataFrame: Columns 'date' and 'cost', one row per day
+    """
+    where, params = _cost_filters(start_date, end_date, provider)
+    query = f"SELECT date, SUM(cost) AS cost FROM cost_data{where} GROUP BY date ORDER BY date"
+    
+    with _open_ro_conn() as conn:
+        return pd.read_sql_query(query, conn, params=params, parse_dates=['date'])
+    
+def get_service_cost_series(start_date=None, end_date=None, provider=None):
+    """
+    Retrieve total cost per day, service and provider, summed in the database.
+    
     Args:
         start_date (str, optional): Start date filter
         end_date (str, optional): End date filter
         provider (str, optional): Cloud provider filter
         
     Returns:
-        pd.DataFrame: Cost data
+        pd.DataFrame: Columns 'date', 'service', 'provider' and 'cost'
     """
-    query = "SELECT * FROM cost_data WHERE 1=1"
+    where, params = _cost_filters(start_date, end_date, provider)
+    query = (
+        f"SELECT date, service, provider, SUM(cost) AS cost FROM cost_data{where} "
+        "GROUP BY date, service, provider ORDER BY date, service, provider"
+    )
+    
+    with _open_ro_conn() as conn:
+        return pd.read_sql_query(query, conn, params=params, parse_dates=['date'])
+    
+def get_cost_total(start_date=None, end_date=None, provider=None, service=None):
+    """
+    Sum cost data in the database with optional filters.
+    
+    Args:
+        start_date (str, optional): Start date filter
+        end_date (str, optional): End date filter
+        provider (str, optional): Cloud provider filter
+        service (str, optional): Service filter
+        
+    Returns:
+        float: Total cost, 0.0 if no rows match
+    """
+    query = "SELECT COALESCE(SUM(cost), 0) FROM cost_data WHERE 1=1"
     params = []
     
     if start_date:
@@ -182,8 +613,12 @@ def get_cost_data(start_date=None, end_date=None, provider=None):
         query += " AND provider = ?"
         params.append(provider)
         
-    with sqlite3.connect(DB_PATH) as conn:
-        return pd.read_sql_query(query, conn, params=params)
+    if service:
+        query += " AND service = ?"
+        params.append(service)
+        
+    with _open_ro_conn() as conn:
+        return float(conn.execute(query, params).fetchone()[0])
     
 def get_idle_resources(provider=None):
     """
@@ -202,7 +637,7 @@ def get_idle_resources(provider=None):
         query += " WHERE provider = ?"
         params.append(provider)
         
-    with sqlite3.connect(DB_PATH) as conn:
+    with _open_ro_conn() as conn:
         return pd.read_sql_query(query, conn, params=params)
 
 def create_budget(name, amount, period='monthly', provider=None, service=None):
@@ -231,8 +666,17 @@ def create_budget(name, amount, period='monthly', provider=None, service=None):
     session.commit()
     budget_id = budget.id
     session.close()
+    
+    _budget_cache.clear()
     return budget_id
 
+# Seconds a get_budgets result is reused; budgets change rarely, and
+# create_budget clears the cache
+BUDGET_CACHE_TTL = 60
+
+# (expiry time, budgets frame) of the last get_budgets query
+_budget_cache = {}
+
 def get_budgets():
     """
     Retrieve all budgets.
@@ -240,8 +684,14 @@ def get_budgets():
     Returns:
         pd.DataFrame: Budgets data
     """
-    with sqlite3.connect(DB_PATH) as conn:
-        return pd.read_sql_query("SELECT * FROM budgets", conn)
+    cached = _budget_cache.get('budgets')
+    if cached is None or cached[0] <= time.monotonic():
+        with _open_ro_conn() as conn:
+            budgets = pd.read_sql_query("SELECT * FROM budgets", conn)
+        cached = _budget_cache['budgets'] = (time.monotonic() + BUDGET_CACHE_TTL, budgets)
+    
+    # Callers get their own copy, so changes to it don't reach the cache
+    return cached[1].copy()
 
 def store_budget_alert(budget_id, actual_cost, percentage):
     """
@@ -267,6 +717,31 @@ def store_budget_alert(budget_id, actual_cost, percentage):
     session.close()
     return alert_id
 
+def store_budget_alerts(alerts):
+    """
+    Store multiple budget alerts in one transaction.
+    
+    Args:
+        alerts (list): Dictionaries with 'budget_id', 'actual_cost' and 'percentage'
+        
+    Returns:
+        list: Alert IDs, in the order of alerts
+    """
+    session = Session()
+    rows = [
+        BudgetAlert(
+            budget_id=alert['budget_id'],
+            actual_cost=alert['actual_cost'],
+            percentage=alert['percentage']
+        )
+        for alert in alerts
+    ]
+    session.add_all(rows)
+    session.commit()
+    alert_ids = [row.id for row in rows]
+    session.close()
+    return alert_ids
+
 def get_budget_alerts(budget_id=None, notified=None):
     """
     Retrieve budget alerts with optional filters.
@@ -276,7 +751,7 @@ def get_budget_alerts(budget_id=None, notified=None):
         notified (bool, optional): Notification status filter
         
     Returns:
-        pd.DataFrame: Budget alerts data
+        pd.DataFrame: Budget alerts data, with 'alert_date' parsed to datetime
     """
     query = "SELECT * FROM budget_alerts WHERE 1=1"
     params = []
@@ -289,8 +764,8 @@ def get_budget_alerts(budget_id=None, notified=None):
         query += " AND notified = ?"
         params.append(1 if notified else 0)
         
-    with sqlite3.connect(DB_PATH) as conn:
-        return pd.read_sql_query(query, conn, params=params)
+    with _open_ro_conn() as conn:
+        return pd.read_sql_query(query, conn, params=params, parse_dates=['alert_date'])
 
 def mark_alert_notified(alert_id):
     """
@@ -299,13 +774,19 @@ def mark_alert_notified(alert_id):
     Args:
         alert_id (int): Alert ID
     """
+    # One UPDATE statement, without loading the alert first
     session = Session()
-    alert = session.query(BudgetAlert).filter(BudgetAlert.id == alert_id).first()
-    if alert:
-        alert.notified = True
-        session.commit()
+    session.execute(update(BudgetAlert).where(BudgetAlert.id == alert_id).values(notified=True))
+    session.commit()
     session.close()
 
+# Columns written by store_recommendations, in table order
+_RECOMMENDATION_COLUMNS = [
+    'resource_id', 'resource_type', 'provider', 'recommendation_type',
+    'current_config', 'recommended_config', 'estimated_savings',
+    'confidence', 'justification', 'implementation_steps'
+]
+
 def store_recommendation(recommendation):
     """
     Store a recommendation in the database.
@@ -321,7 +802,7 @@ def store_recommendation(recommendation):
     # Convert implementation steps to JSON string if it's a list
     implementation_steps = recommendation.get('implementation_steps')
     if isinstance(implementation_steps, list):
-        implementation_steps = json.dumps(implementation_steps)
+        implementation_steps = _json_dumps(implementation_steps)
     
     rec = Recommendation(
         resource_id=recommendation['resource_id'],
@@ -348,16 +829,31 @@ def store_recommendations(recommendations_df):
     Args:
         recommendations_df (pd.DataFrame): Recommendations data
     """
-    for _, rec in recommendations_df.iterrows():
-        store_recommendation(rec.to_dict())
+    if recommendations_df.empty:
+        return
+    
+    df = recommendations_df.reindex(columns=_RECOMMENDATION_COLUMNS)
+    
+    # Convert implementation steps to JSON strings where they are lists
+    df['implementation_steps'] = df['implementation_steps'].map(
+        lambda steps: _json_dumps(steps) if isinstance(steps, list) else steps
+    )
+    
+    # Bulk inserts bypass the ORM, so fill in the column defaults ourselves
+    now = datetime.datetime.now()
+    df['status'] = 'Open'
+    df['created_at'] = now
+    df['updated_at'] = now
+    
+    _bulk_insert('recommendations', df)
 
 def get_recommendations(status=None, provider=None):
     """
     Retrieve recommendations with optional filters.
     
     Args:
-        status (str, optional): Status filter
-        provider (str, optional): Provider filter
+        status (str or list, optional): Status, or statuses to match any of
+        provider (str or list, optional): Provider, or providers to match any of
         
     Returns:
         pd.DataFrame: Recommendations data
@@ -365,24 +861,57 @@ def get_recommendations(status=None, provider=None):
     query = "SELECT * FROM recommendations WHERE 1=1"
     params = []
     
-    if status:
-        query += " AND status = ?"
-        params.append(status)
+    for column, value in (('status', status), ('provider', provider)):
+        if value:
+            clause, values = _match_filter(column, value)
+            query += clause
+            params.extend(values)
         
-    if provider:
-        query += " AND provider = ?"
-        params.append(provider)
-        
-    with sqlite3.connect(DB_PATH) as conn:
+    with _open_ro_conn() as conn:
         df = pd.read_sql_query(query, conn, params=params)
         
         # Parse JSON strings
         if not df.empty and 'implementation_steps' in df.columns:
-            df['implementation_steps'] = df['implementation_steps'].apply(
-                lambda x: json.loads(x) if x else []
-            )
+            df['implementation_steps'] = _parse_json_lists(df['implementation_steps'])
             
-        return df
+    # Status is left as text, since the dashboard edits it to values that
+    # may not be present in the result
+    return _with_categories(df, {
+        'provider': 'category', 'resource_type': 'category',
+        'recommendation_type': 'category', 'confidence': 'category'
+    })
+
+def get_recommendation_summary(status=None, limit=5):
+    """
+    Count recommendations and total their savings, with the largest few.
+    
+    Args:
+        status (str or list, optional): Status, or statuses to match any of
+        limit (int, optional): Number of top recommendations to return
+        
+    Returns:
+        tuple: (count, total estimated savings, pd.DataFrame of the `limit`
+            recommendations with the largest savings)
+    """
+    where = " WHERE 1=1"
+    params = []
+    if status:
+        clause, params = _match_filter('status', status)
+        where += clause
+    
+    with _open_ro_conn() as conn:
+        count, total_savings = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(estimated_savings), 0) FROM recommendations{where}",
+            params
+        ).fetchone()
+        top = pd.read_sql_query(
+            "SELECT recommendation_type, resource_type, estimated_savings FROM recommendations"
+            f"{where} ORDER BY estimated_savings DESC LIMIT ?",
+            conn,
+            params=[*params, limit]
+        )
+        
+    return count, total_savings, top
 
 def update_recommendation_status(rec_id, status):
     """
@@ -393,104 +922,196 @@ def update_recommendation_status(rec_id, status):
         status (str): New status
     """
     session = Session()
-    rec = session.query(Recommendation).filter(Recommendation.id == rec_id).first()
-    if rec:
-        rec.status = status
-        rec.updated_at = datetime.datetime.now()
-        session.commit()
+    session.execute(
+        update(Recommendation)
+        .where(Recommendation.id == rec_id)
+        .values(status=status, updated_at=datetime.datetime.now())
+    )
+    session.commit()
     session.close()
 
-def store_anomaly(anomaly):
+def _anomaly_mapping(anomaly):
     """
-    Store an anomaly detection in the database.
+    Map an anomaly dictionary to anomaly_detections column values.
     
     Args:
         anomaly (dict): Anomaly data
         
     Returns:
-        int: Anomaly ID
+        dict: Column values, with list fields as JSON strings
     """
-    session = Session()
-    
     # Convert lists to JSON strings
     possible_causes = anomaly.get('possible_causes')
     if isinstance(possible_causes, list):
-        possible_causes = json.dumps(possible_causes)
+        possible_causes = _json_dumps(possible_causes)
         
     recommended_actions = anomaly.get('recommended_actions')
     if isinstance(recommended_actions, list):
-        recommended_actions = json.dumps(recommended_actions)
-    
-    anom = AnomalyDetection(
-        date=anomaly['date'],
-        service=anomaly.get('service'),
-        provider=anomaly.get('provider'),
-        cost=anomaly['cost'],
-        percentage_change=anomaly['percentage_change'],
-        direction=anomaly['direction'],
-        severity=anomaly['severity'],
-        message=anomaly['message'],
-        possible_causes=possible_causes,
-        recommended_actions=recommended_actions
-    )
+        recommended_actions = _json_dumps(recommended_actions)
+    
+    return {
+        'date': anomaly['date'],
+        'service': anomaly.get('service'),
+        'provider': anomaly.get('provider'),
+        'cost': anomaly['cost'],
+        'percentage_change': anomaly['percentage_change'],
+        'direction': anomaly['direction'],
+        'severity': anomaly['severity'],
+        'message': anomaly['message'],
+        'possible_causes': possible_causes,
+        'recommended_actions': recommended_actions
+    }
+
+def store_anomaly(anomaly):
+    """
+    Store an anomaly detection in the database.
+    
+    Args:
+        anomaly (dict): Anomaly data
+        
+    Returns:
+        int: Anomaly ID
+    """
+    session = Session()
+    anom = AnomalyDetection(**_anomaly_mapping(anomaly))
     session.add(anom)
     session.commit()
     anom_id = anom.id
     session.close()
     return anom_id
 
+# Columns written by store_anomalies, in table order
+_ANOMALY_COLUMNS = [
+    'date', 'service', 'provider', 'cost', 'percentage_change', 'direction',
+    'severity', 'message', 'possible_causes', 'recommended_actions'
+]
+
 def store_anomalies(anomalies):
     """
-    Store multiple anomalies.
+    Store multiple anomalies in one transaction.
     
     Args:
         anomalies (list): List of anomaly dictionaries
     """
-    for anomaly in anomalies:
-        store_anomaly(anomaly)
+    if not anomalies:
+        return
+    
+    df = pd.DataFrame(anomalies).reindex(columns=_ANOMALY_COLUMNS)
+    
+    # Store dates without a time part, as the ORM's Date column does
+    df['date'] = pd.to_datetime(df['date']).dt.date
+    
+    # Convert lists to JSON strings, one pass per column
+    for column in ('possible_causes', 'recommended_actions'):
+        df[column] = df[column].map(lambda items: _json_dumps(items) if isinstance(items, list) else items)
+    
+    # Bulk inserts bypass the ORM, so fill in the column defaults ourselves
+    df['status'] = 'Open'
+    df['created_at'] = datetime.datetime.now()
+    
+    _bulk_insert('anomaly_detections', df)
 
 def get_anomalies(status=None, severity=None, provider=None):
     """
     Retrieve anomalies with optional filters.
     
     Args:
-        status (str, optional): Status filter
-        severity (str, optional): Severity filter
-        provider (str, optional): Provider filter
+        status (str or list, optional): Status, or statuses to match any of
+        severity (str or list, optional): Severity, or severities to match any of
+        provider (str or list, optional): Provider, or providers to match any of
         
     Returns:
-        pd.DataFrame: Anomalies data
+        pd.DataFrame: Anomalies data, with 'date' parsed to datetime
     """
     query = "SELECT * FROM anomaly_detections WHERE 1=1"
     params = []
     
-    if status:
-        query += " AND status = ?"
-        params.append(status)
-        
-    if severity:
-        query += " AND severity = ?"
-        params.append(severity)
-        
-    if provider:
-        query += " AND provider = ?"
-        params.append(provider)
+    for column, value in (('status', status), ('severity', severity), ('provider', provider)):
+        if value:
+            clause, values = _match_filter(column, value)
+            query += clause
+            params.extend(values)
         
-    with sqlite3.connect(DB_PATH) as conn:
-        df = pd.read_sql_query(query, conn, params=params)
+    with _open_ro_conn() as conn:
+        df = pd.read_sql_query(query, conn, params=params, parse_dates=['date'])
         
         # Parse JSON strings
         if not df.empty:
             if 'possible_causes' in df.columns:
-                df['possible_causes'] = df['possible_causes'].apply(
-                    lambda x: json.loads(x) if x else []
-                )
+                df['possible_causes'] = _parse_json_lists(df['possible_causes'])
             if 'recommended_actions' in df.columns:
-                df['recommended_actions'] = df['recommended_actions'].apply(
-                    lambda x: json.loads(x) if x else []
-                )
+                df['recommended_actions'] = _parse_json_lists(df['recommended_actions'])
             
-        return df
+    # Provider and service stay text: they are null for total-cost anomalies,
+    # and callers test them for truth. Status is edited, as for recommendations.
+    return _with_categories(df, {'severity': SEVERITY_DTYPE, 'direction': 'category'})
+
+def _anomaly_counts(column):
+    """Count anomalies per non-null value of column, in the database."""
+    query = (
+        f"SELECT {column}, COUNT(*) AS count FROM anomaly_detections "
+        f"WHERE {column} IS NOT NULL GROUP BY {column}"
+    )
+    
+    with _open_ro_conn() as conn:
+        return pd.read_sql_query(query, conn)
+
+def get_anomaly_daily_counts():
+    """
+    Count anomalies per day.
+    
+    Returns:
+        pd.DataFrame: Columns 'date' and 'count', one row per day, by date
+    """
+    df = _anomaly_counts('date')
+    df['date'] = pd.to_datetime(df['date'])
+    return df.sort_values('date', ignore_index=True)
+
+def get_anomaly_status_counts():
+    """
+    Count anomalies per status.
+    
+    Returns:
+        pd.DataFrame: Columns 'status' and 'count', one row per status
+    """
+    return _anomaly_counts('status')
+
+def get_anomaly_service_counts():
+    """
+    Count anomalies per service, skipping anomalies without a service.
+    
+    Returns:
+        pd.DataFrame: Columns 'service' and 'count', most anomalies first
+    """
+    return _anomaly_counts('service').sort_values('count', ascending=False, ignore_index=True)
+
+def get_anomaly_summary(status=None, limit=5):
+    """
+    Count anomalies, with the most recent few.
+    
+    Args:
+        status (str or list, optional): Status, or statuses to match any of
+        limit (int, optional): Number of recent anomalies to return
+        
+    Returns:
+        tuple: (count, pd.DataFrame of the `limit` most recent anomalies)
+    """
+    where = " WHERE 1=1"
+    params = []
+    if status:
+        clause, params = _match_filter('status', status)
+        where += clause
+    
+    with _open_ro_conn() as conn:
+        (count,) = conn.execute(f"SELECT COUNT(*) FROM anomaly_detections{where}", params).fetchone()
+        recent = pd.read_sql_query(
+            f"SELECT date, severity, message FROM anomaly_detections{where} ORDER BY date DESC LIMIT ?",
+            conn,
+            params=[*params, limit],
+            parse_dates=['date']
+        )
+        
+    return count, recent
 
 def update_anomaly_status(anomaly_id, status):
     """
@@ -501,10 +1122,8 @@ def update_anomaly_status(anomaly_id, status):
         status (str): New status
     """
     session = Session()
-    anomaly = session.query(AnomalyDetection).filter(AnomalyDetection.id == anomaly_id).first()
-    if anomaly:
-        anomaly.status = status
-        session.commit()
+    session.execute(update(AnomalyDetection).where(AnomalyDetection.id == anomaly_id).values(status=status))
+    session.commit()
     session.close()
 
 def store_resource_tag(resource_id, provider, key, value):
@@ -533,6 +1152,21 @@ def store_resource_tag(resource_id, provider, key, value):
     session.close()
     return tag_id
 
+def store_resource_tags(tags):
+    """
+    Store multiple resource tags in one transaction.
+    
+    Args:
+        tags (iterable): (resource_id, provider, key, value) tuples
+    """
+    # Bulk inserts bypass the ORM, so fill in created_at ourselves
+    now = datetime.datetime.now()
+    _insert_rows(
+        'resource_tags',
+        ['resource_id', 'provider', 'key', 'value', 'created_at'],
+        ((*tag, now) for tag in tags)
+    )
+
 def get_resource_tags(resource_id=None, provider=None, key=None):
     """
     Retrieve resource tags with optional filters.
@@ -560,7 +1194,7 @@ def get_resource_tags(resource_id=None, provider=None, key=None):
         query += " AND key = ?"
         params.append(key)
         
-    with sqlite3.connect(DB_PATH) as conn:
+    with _open_ro_conn() as conn:
         return pd.read_sql_query(query, conn, params=params)
 
 def store_cost_allocation(date, cost, provider, service, business_unit=None, project=None, environment=None):
@@ -627,7 +1261,35 @@ def get_cost_allocations(start_date=None, end_date=None, business_unit=None, pro
         query += " AND project = ?"
         params.append(project)
         
-    with sqlite3.connect(DB_PATH) as conn:
+    with _open_ro_conn() as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+# Columns get_cost_allocation_totals may group by
+ALLOCATION_DIMENSIONS = ('provider', 'service', 'business_unit', 'project', 'environment')
+
+def get_cost_allocation_totals(dimensions, start_date=None, end_date=None):
+    """
+    Sum allocated cost per combination of dimensions, in the database.
+    
+    Rows with an unset dimension form their own (NULL) group.
+    
+    Args:
+        dimensions (list): Columns to group by, from ALLOCATION_DIMENSIONS
+        start_date (str, optional): Start date filter
+        end_date (str, optional): End date filter
+        
+    Returns:
+        pd.DataFrame: The dimension columns and 'cost', one row per group
+    """
+    unknown = set(dimensions) - set(ALLOCATION_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown allocation dimensions: {sorted(unknown)}")
+    
+    columns = ", ".join(dimensions)
+    where, params = _cost_filters(start_date, end_date)
+    query = f"SELECT {columns}, SUM(cost) AS cost FROM cost_allocations{where} GROUP BY {columns}"
+    
+    with _open_ro_conn() as conn:
         return pd.read_sql_query(query, conn, params=params)
 
 # Initialize database if this script is run directly
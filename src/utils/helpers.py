@@ -2,8 +2,46 @@
 Helper functions for the CloudCostAI platform.
 """
 
+import numpy as np
 import pandas as pd
-import datetime
+import importlib
+import types
+
+class LazyLoader(types.ModuleType):
+    """
+    Module proxy that defers the real import until first attribute access.
+    
+    On first use the real module is imported and bound into the parent
+    module's globals under ``local_name``, so later lookups bypass the proxy.
+    """
+    
+    def __init__(self, local_name, parent_module_globals, name):
+        """
+        Initialize the lazy loader.
+        
+        Args:
+            local_name (str): Name the module is bound to in the parent module
+            parent_module_globals (dict): globals() of the parent module
+            name (str): Fully qualified name of the module to import
+        """
+        self._local_name = local_name
+        self._parent_module_globals = parent_module_globals
+        super().__init__(name)
+        
+    def _load(self):
+        """Import the target module and replace this proxy with it."""
+        module = importlib.import_module(self.__name__)
+        self._parent_module_globals[self._local_name] = module
+        self.__dict__.update(module.__dict__)
+        return module
+        
+    def __getattr__(self, item):
+        module = self._load()
+        return getattr(module, item)
+        
+    def __dir__(self):
+        module = self._load()
+        return dir(module)
 
 def format_cost_data(df):
     """
@@ -15,22 +53,42 @@ def format_cost_data(df):
     Returns:
         pd.DataFrame: Standardized cost data
     """
-    # Ensure date column is datetime
-    if 'date' in df.columns:
-        df['date'] = pd.to_datetime(df['date'])
+    # Ensure date column is datetime; collectors that build the frame with
+    # parsed dates skip the conversion, and cache=True parses each
+    # repeated date string once
+    if 'date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['date']):
+        df['date'] = pd.to_datetime(df['date'], cache=True)
     
-    # Ensure consistent column names
-    column_mapping = {
-        'service': 'service',
-        'amount': 'cost',
-        'currency': 'currency',
-        'provider': 'provider'
-    }
-    
-    df = df.rename(columns={k: v for k, v in column_mapping.items() if k in df.columns})
+    # Ensure consistent column names; 'amount' is the only one that differs
+    if 'amount' in df.columns:
+        df = df.rename(columns={'amount': 'cost'}, copy=False)
     
     return df
 
+# Column dtypes shared by the idle resource frames of every collector;
+# the repeated, low-cardinality text columns are stored as categories
+IDLE_RESOURCE_SCHEMA = {
+    'resource_id': 'string',
+    'resource_type': 'category',
+    'region': 'category',
+    'estimated_monthly_savings': 'float64',
+    'reason': 'string',
+    'recommendation': 'category',
+    'provider': 'category'
+}
+
+def format_idle_resources(df):
+    """
+    Standardize idle resource data format across different cloud providers.
+    
+    Args:
+        df (pd.DataFrame): Raw idle resource data from a cloud provider
+        
+    Returns:
+        pd.DataFrame: Idle resource data with the shared columns and dtypes
+    """
+    return df.reindex(columns=list(IDLE_RESOURCE_SCHEMA)).astype(IDLE_RESOURCE_SCHEMA)
+
 def generate_date_range(months_back=3):
     """
     Generate start and end dates for cost queries.
@@ -41,8 +99,9 @@ def generate_date_range(months_back=3):
     Returns:
         tuple: (start_date, end_date) as strings in YYYY-MM-DD format
     """
-    end_date = datetime.date.today()
-    start_date = (end_date - datetime.timedelta(days=30*months_back))
+    # Calendar months, rather than 30-day blocks that drift from month ends
+    end_date = pd.Timestamp.today().normalize()
+    start_date = end_date - pd.DateOffset(months=months_back)
     
     return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
 
@@ -51,11 +110,45 @@ def calculate_savings_potential(idle_resources_df):
     Calculate total potential savings from idle resources.
     
     Args:
-        idle_resources_df (pd.DataFrame): DataFrame with idle resource information
+        idle_resources_df (pd.DataFrame or iterable): DataFrame with idle
+            resource information, or an iterable of DataFrame chunks
         
     Returns:
         float: Total potential monthly savings
     """
-    if 'estimated_monthly_savings' in idle_resources_df.columns:
-        return idle_resources_df['estimated_monthly_savings'].sum()
-    return 0.0
\ No newline at end of file
+    chunks = [idle_resources_df] if isinstance(idle_resources_df, pd.DataFrame) else idle_resources_df
+    
+    # Sum chunk by chunk, so only one chunk needs to be in memory at a time
+    total = 0.0
+    for chunk in chunks:
+        if 'estimated_monthly_savings' in chunk.columns:
+            total += chunk['estimated_monthly_savings'].sum()
+    return total
+
+def downsample_min_max(df, column, n_out=1000):
+    """
+    Thin a time-ordered DataFrame to about n_out rows for plotting.
+    
+    The rows are split into n_out / 2 equal buckets and the rows holding
+    each bucket's minimum and maximum of column are kept, along with the
+    first and last rows, so spikes and dips survive the downsampling.
+    
+    Args:
+        df (pd.DataFrame): Rows sorted along the x axis
+        column (str): Column plotted on the y axis
+        n_out (int): Maximum number of rows to return
+        
+    Returns:
+        pd.DataFrame: df itself if it is short enough, otherwise a subset of its rows
+    """
+    if len(df) <= n_out:
+        return df
+    
+    values = pd.Series(df[column].to_numpy())
+    buckets = values.groupby(np.arange(len(values)) * (n_out // 2 - 1) // len(values))
+    keep = np.unique(np.concatenate([
+        [0, len(values) - 1],
+        buckets.idxmin().dropna().to_numpy(dtype=int),
+        buckets.idxmax().dropna().to_numpy(dtype=int)
+    ]))
+    return df.iloc[keep]
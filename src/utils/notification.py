@@ -4,7 +4,8 @@ Notification utilities for CloudCostAI.
 
 import smtplib
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import sys
@@ -17,48 +18,137 @@ from config import (
     SLACK_WEBHOOK_URL, ENABLE_SLACK
 )
 
-def send_email(subject, body, recipients=None, html=True):
+# Seconds to wait on the Slack webhook before giving up
+SLACK_TIMEOUT = 5
+
+# One HTTP session for all Slack posts, so keep-alive reuses the TLS
+# connection instead of opening one per message; sized for the budget
+# check's concurrent notifications
+_slack_session = requests.Session()
+_slack_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2)
+))
+
+def _build_email(subject, body, recipients, html=True):
     """
-    Send an email notification.
+    Build an email message from the configured sender.
     
     Args:
         subject (str): Email subject
         body (str): Email body
-        recipients (list, optional): List of recipients. Defaults to config value.
+        recipients (list): List of recipients
         html (bool, optional): Whether body is HTML. Defaults to True.
         
     Returns:
-        bool: True if email was sent successfully, False otherwise
+        MIMEMultipart: Message ready to send
     """
-    if not ENABLE_EMAIL or not EMAIL_SENDER:
-        return False
+    msg = MIMEMultipart()
+    msg['From'] = EMAIL_SENDER
+    msg['To'] = ', '.join(recipients)
+    msg['Subject'] = subject
+    
+    # Attach body
+    msg.attach(MIMEText(body, 'html' if html else 'plain'))
+    return msg
+
+class SMTPSession:
+    """
+    SMTP connection reused for several emails.
+    
+    Connecting, STARTTLS and logging in happen once, on the first send,
+    rather than once per email. Not safe to share between threads.
+    
+    Usage:
+        with SMTPSession() as session:
+            for subject, body in emails:
+                session.send(subject, body)
+    """
+    
+    def __init__(self):
+        """Initialize the session; the connection is opened on first send."""
+        self.server = None
         
-    recipients = recipients or EMAIL_RECIPIENTS
-    if not recipients:
-        return False
+    def __enter__(self):
+        return self
         
-    try:
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_SENDER
-        msg['To'] = ', '.join(recipients)
-        msg['Subject'] = subject
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
         
-        # Attach body
-        msg.attach(MIMEText(body, 'html' if html else 'plain'))
+    def _connect(self):
+        """Connect to the SMTP server and log in."""
+        self.server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
+        self.server.starttls()
+        if SMTP_USERNAME and SMTP_PASSWORD:
+            self.server.login(SMTP_USERNAME, SMTP_PASSWORD)
+            
+    def close(self):
+        """Close the connection, if one is open."""
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except smtplib.SMTPException:
+                pass
+            self.server = None
+            
+    def send(self, subject, body, recipients=None, html=True):
+        """
+        Send an email over the session's connection.
         
-        # Connect to SMTP server and send email
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            if SMTP_USERNAME and SMTP_PASSWORD:
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(msg)
+        Args:
+            subject (str): Email subject
+            body (str): Email body
+            recipients (list, optional): List of recipients. Defaults to config value.
+            html (bool, optional): Whether body is HTML. Defaults to True.
+            
+        Returns:
+            bool: True if email was sent successfully, False otherwise
+        """
+        if not ENABLE_EMAIL or not EMAIL_SENDER:
+            return False
+            
+        recipients = recipients or EMAIL_RECIPIENTS
+        if not recipients:
+            return False
             
-        return True
+        try:
+            msg = _build_email(subject, body, recipients, html)
+            
+            if self.server is None:
+                self._connect()
+            
+            try:
+                self.server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped an idle connection; reconnect once
+                self._connect()
+                self.server.send_message(msg)
+                
+            return True
+            
+        except Exception as e:
+            print(f"Error sending email: {e}")
+            self.close()
+            return False
+
+def send_email(subject, body, recipients=None, html=True):
+    """
+    Send an email notification.
+    
+    Opens a connection for this one email; use SMTPSession to send several.
+    
+    Args:
+        subject (str): Email subject
+        body (str): Email body
+        recipients (list, optional): List of recipients. Defaults to config value.
+        html (bool, optional): Whether body is HTML. Defaults to True.
         
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
+    Returns:
+        bool: True if email was sent successfully, False otherwise
+    """
+    with SMTPSession() as session:
+        return session.send(subject, body, recipients=recipients, html=html)
 
 def send_slack_notification(message, webhook_url=None):
     """
@@ -79,11 +169,10 @@ def send_slack_notification(message, webhook_url=None):
         return False
         
     try:
-        payload = {"text": message}
-        response = requests.post(
+        response = _slack_session.post(
             webhook_url,
-            data=json.dumps(payload),
-            headers={"Content-Type": "application/json"}
+            json={"text": message},
+            timeout=SLACK_TIMEOUT
         )
         
         return response.status_code == 200